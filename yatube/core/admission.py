@@ -0,0 +1,161 @@
+"""Контроль допуска запросов при перегрузке процесса.
+
+Процесс перегружен, когда в нём одновременно выполняется не меньше
+``ADMISSION_MAX_IN_FLIGHT`` запросов или запрос дольше
+``ADMISSION_MAX_QUEUE_WAIT_MS`` ждал свободного потока в пуле ASGI.
+Тогда дорогие запросы - представления, среднее время ответа которых
+не меньше ``ADMISSION_EXPENSIVE_LATENCY_MS``, и дальние страницы лент -
+не выполняются: аноним получает последнюю сохранённую копию страницы
+из ``ADMISSION_STALE_VIEWS``, остальные - 503 с ``Retry-After``.
+Дешёвые запросы и запись от вошедших пользователей выполняются всегда.
+
+Время ответа - экспоненциальное скользящее среднее по имени маршрута.
+Счётчики свои у каждого процесса: перегрузка тоже у каждого своя.
+"""
+import hashlib
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+
+from .asgi import QUEUED_AT_KEY
+from .ratelimit import UNSAFE_METHODS
+from .views import service_unavailable
+
+# Вес последнего запроса в среднем времени ответа.
+LATENCY_WEIGHT = 0.2
+# Копия страницы обновляется не чаще раза в столько секунд.
+STALE_REFRESH_SECONDS = 10
+DEGRADED_HEADER = 'X-Degraded'
+
+
+class AdmissionStats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.in_flight = 0
+        self.latency = {}
+        self.stale_saved = {}
+
+    def enter(self):
+        with self.lock:
+            self.in_flight += 1
+            return self.in_flight
+
+    def leave(self, view_name, seconds):
+        with self.lock:
+            self.in_flight -= 1
+            if view_name is None:
+                return
+            average = self.latency.get(view_name)
+            self.latency[view_name] = seconds if average is None else (
+                average + LATENCY_WEIGHT * (seconds - average)
+            )
+
+    def should_save_stale(self, key, now):
+        """Только один поток раз в STALE_REFRESH_SECONDS пишет копию."""
+        with self.lock:
+            if now - self.stale_saved.get(key, 0) < STALE_REFRESH_SECONDS:
+                return False
+            self.stale_saved[key] = now
+            return True
+
+    def reset(self):
+        with self.lock:
+            self.latency.clear()
+            self.stale_saved.clear()
+
+
+stats = AdmissionStats()
+
+
+def stale_key(request):
+    """Копия своя у каждого адреса: у групп один маршрут на всех."""
+    path = hashlib.md5(request.path.encode()).hexdigest()
+    return f'admission:stale:{path}'
+
+
+def wants_stale_copy(request, view_name):
+    """Первая страница без параметров для анонима: её можно подменить."""
+    return (
+        view_name in settings.ADMISSION_STALE_VIEWS
+        and request.method == 'GET'
+        and not request.GET
+        and not request.user.is_authenticated
+    )
+
+
+def is_deep_page(request):
+    page = request.GET.get('page', '')
+    return page.isdigit() and int(page) > settings.ADMISSION_DEEP_PAGE
+
+
+class AdmissionControlMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not settings.ADMISSION_CONTROL_ENABLED:
+            return self.get_response(request)
+        request.in_flight = stats.enter()
+        started = time.monotonic()
+        queued_at = request.META.get(QUEUED_AT_KEY)
+        request.queue_wait = 0 if queued_at is None else started - queued_at
+        request.admission_shed = False
+        view_name = None
+        try:
+            response = self.get_response(request)
+            match = request.resolver_match
+            if match is not None and not request.admission_shed:
+                view_name = match.view_name
+                self.save_stale_copy(request, response, view_name)
+        finally:
+            stats.leave(view_name, time.monotonic() - started)
+        return response
+
+    def overloaded(self, request):
+        queue_wait_ms = request.queue_wait * 1000
+        return (
+            request.in_flight >= settings.ADMISSION_MAX_IN_FLIGHT
+            or queue_wait_ms >= settings.ADMISSION_MAX_QUEUE_WAIT_MS
+        )
+
+    def is_expensive(self, request, view_name):
+        latency = stats.latency.get(view_name, 0)
+        return (
+            latency * 1000 >= settings.ADMISSION_EXPENSIVE_LATENCY_MS
+            or is_deep_page(request)
+        )
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if not settings.ADMISSION_CONTROL_ENABLED:
+            return None
+        if not self.overloaded(request):
+            return None
+        if (request.method in UNSAFE_METHODS
+                and request.user.is_authenticated):
+            return None
+        view_name = request.resolver_match.view_name
+        if not self.is_expensive(request, view_name):
+            return None
+        request.admission_shed = True
+        if wants_stale_copy(request, view_name):
+            stale = cache.get(stale_key(request))
+            if stale is not None:
+                content, content_type = stale
+                response = HttpResponse(content, content_type=content_type)
+                response[DEGRADED_HEADER] = 'stale'
+                return response
+        return service_unavailable(request, settings.ADMISSION_RETRY_AFTER)
+
+    def save_stale_copy(self, request, response, view_name):
+        if (response.status_code != 200 or response.streaming
+                or not wants_stale_copy(request, view_name)):
+            return
+        key = stale_key(request)
+        if stats.should_save_stale(key, time.monotonic()):
+            cache.set(
+                key, (response.content, response['Content-Type']),
+                settings.ADMISSION_STALE_TIMEOUT,
+            )
@@ -0,0 +1,223 @@
+"""ASGI-обёртка над WSGI-приложением Django.
+
+Django 2.2 не умеет выполнять асинхронные представления, поэтому
+каждый запрос целиком (ORM, шаблоны) выполняется в ограниченном пуле
+потоков, а соединения клиентов, чтение тела запроса и отправка ответа
+обслуживаются циклом событий. Медленные клиенты и долгие ответы не
+занимают поток-обработчик, а число одновременно работающих
+представлений ограничено ``ASGI_THREADS``.
+"""
+import asyncio
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+
+# Когда запрос встал в очередь пула (time.monotonic): время ожидания
+# потока учитывает core.admission.
+QUEUED_AT_KEY = 'yatube.queued_at'
+
+
+class RequestTooLarge(Exception):
+    pass
+
+
+def get_body_limit():
+    """Наибольший размер тела запроса: файл и текстовые поля формы."""
+    return (
+        settings.UPLOAD_MAX_SIZE
+        + (settings.DATA_UPLOAD_MAX_MEMORY_SIZE or 0)
+    )
+
+
+def get_content_length(scope):
+    for name, value in scope.get('headers', []):
+        if name.lower() == b'content-length':
+            try:
+                return int(value)
+            except ValueError:
+                return None
+    return None
+
+
+def build_environ(scope, body):
+    """WSGI environ для HTTP-запроса ASGI."""
+    server_name, server_port = scope.get('server') or ('localhost', 80)
+    client_host, client_port = scope.get('client') or ('', 0)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', '').encode().decode('latin1'),
+        'PATH_INFO': scope['path'].encode().decode('latin1'),
+        'QUERY_STRING': scope.get('query_string', b'').decode('latin1'),
+        'SERVER_NAME': server_name,
+        'SERVER_PORT': str(server_port),
+        'SERVER_PROTOCOL': f'HTTP/{scope.get("http_version", "1.1")}',
+        'REMOTE_ADDR': client_host,
+        'REMOTE_PORT': str(client_port),
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': body,
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+        QUEUED_AT_KEY: time.monotonic(),
+    }
+    for raw_name, raw_value in scope.get('headers', []):
+        name = raw_name.decode('latin1').upper().replace('-', '_')
+        value = raw_value.decode('latin1')
+        if name not in ('CONTENT_TYPE', 'CONTENT_LENGTH'):
+            name = f'HTTP_{name}'
+        if name in environ:
+            value = f'{environ[name]},{value}'
+        environ[name] = value
+    return environ
+
+
+class ThreadPoolWSGIAdapter:
+    """ASGI-приложение, выполняющее WSGI-приложение в пуле потоков."""
+
+    def __init__(self, wsgi_application, max_workers=None):
+        self.wsgi_application = wsgi_application
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_workers or settings.ASGI_THREADS,
+            thread_name_prefix='asgi-wsgi',
+        )
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self.lifespan(receive, send)
+        elif scope['type'] == 'http':
+            await self.http(scope, receive, send)
+        else:
+            raise ValueError(f'Неподдерживаемый тип запроса {scope["type"]}')
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                self.executor.shutdown(wait=False)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def read_body(self, receive):
+        """Тело запроса; большое тело уходит во временный файл.
+
+        Тело больше ``get_body_limit()`` дочитывать не нужно.
+        """
+        body = tempfile.SpooledTemporaryFile(
+            max_size=settings.FILE_UPLOAD_MAX_MEMORY_SIZE
+        )
+        limit = get_body_limit()
+        while True:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                body.close()
+                return None
+            body.write(message.get('body', b''))
+            if body.tell() > limit:
+                body.close()
+                raise RequestTooLarge()
+            if not message.get('more_body', False):
+                break
+        body.seek(0)
+        return body
+
+    async def reject_too_large(self, send):
+        await send({
+            'type': 'http.response.start',
+            'status': 413,
+            'headers': [(b'content-type', b'text/plain; charset=utf-8')],
+        })
+        await send({
+            'type': 'http.response.body',
+            'body': 'Слишком большой запрос'.encode(),
+        })
+
+    def start(self, environ):
+        """Выполнить представление; возвращает статус, заголовки, тело."""
+        response = {}
+
+        def start_response(status, headers, exc_info=None):
+            response['status'] = int(status.split(' ', 1)[0])
+            response['headers'] = [
+                (name.lower().encode('latin1'), value.encode('latin1'))
+                for name, value in headers
+            ]
+
+        result = self.wsgi_application(environ, start_response)
+        return response['status'], response['headers'], result
+
+    async def iterate(self, result):
+        """Куски тела ответа; потоковый ответ читается в пуле потоков."""
+        if not getattr(result, 'streaming', False):
+            for chunk in result:
+                yield chunk
+            return
+        loop = asyncio.get_running_loop()
+        iterator = iter(result)
+        while True:
+            chunk = await loop.run_in_executor(
+                self.executor, next, iterator, None
+            )
+            if chunk is None:
+                return
+            yield chunk
+
+    async def http(self, scope, receive, send):
+        content_length = get_content_length(scope)
+        try:
+            if content_length is not None and (
+                    content_length > get_body_limit()):
+                raise RequestTooLarge()
+            body = await self.read_body(receive)
+        except RequestTooLarge:
+            await self.reject_too_large(send)
+            return
+        if body is None:
+            return
+        loop = asyncio.get_running_loop()
+        try:
+            status, headers, result = await loop.run_in_executor(
+                self.executor, self.start, build_environ(scope, body)
+            )
+            try:
+                await send({
+                    'type': 'http.response.start',
+                    'status': status,
+                    'headers': headers,
+                })
+                async for chunk in self.iterate(result):
+                    await send({
+                        'type': 'http.response.body',
+                        'body': chunk,
+                        'more_body': True,
+                    })
+                await send({'type': 'http.response.body', 'body': b''})
+            finally:
+                # close() посылает request_finished и освобождает соединения.
+                if hasattr(result, 'close'):
+                    await loop.run_in_executor(self.executor, result.close)
+        finally:
+            body.close()
+
+
+class PathRouter:
+    """Отдаёт запросы с путями из ``routes`` отдельным ASGI-приложениям.
+
+    Остальные запросы и события lifespan уходят в ``default``.
+    """
+
+    def __init__(self, routes, default):
+        self.routes = routes
+        self.default = default
+
+    async def __call__(self, scope, receive, send):
+        application = self.default
+        if scope['type'] == 'http':
+            application = self.routes.get(scope['path'], self.default)
+        await application(scope, receive, send)
@@ -0,0 +1,136 @@
+"""Проверки настроек, влияющих на производительность.
+
+Запускаются вместе с ``python manage.py check --deploy``, отдельно —
+``python manage.py check --deploy --tag performance``.
+"""
+from django.conf import settings
+from django.core.checks import Tags, Warning, register
+
+PERFORMANCE_TAG = 'performance'
+
+LOCAL_CACHE_BACKENDS = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+CACHED_TEMPLATE_LOADER = 'django.template.loaders.cached.Loader'
+DEBUG_CONTEXT_PROCESSOR = 'django.template.context_processors.debug'
+HASHED_STATIC_STORAGES = (
+    'django.contrib.staticfiles.storage.ManifestStaticFilesStorage',
+    'django.contrib.staticfiles.storage.CachedStaticFilesStorage',
+)
+GZIP_MIDDLEWARE = 'django.middleware.gzip.GZipMiddleware'
+COMPRESSION_MIDDLEWARES = (
+    'core.middleware.CompressionMiddleware',
+    GZIP_MIDDLEWARE,
+)
+CONDITIONAL_GET_MIDDLEWARE = 'django.middleware.http.ConditionalGetMiddleware'
+
+
+def _uses_cached_loader(template_settings):
+    options = template_settings.get('OPTIONS', {})
+    loaders = options.get('loaders')
+    if loaders is None:
+        # Без явных loaders Django сам включает кэш, когда debug выключен.
+        return not options.get('debug', settings.DEBUG)
+    return any(
+        (loader[0] if isinstance(loader, (list, tuple)) else loader)
+        == CACHED_TEMPLATE_LOADER
+        for loader in loaders
+    )
+
+
+@register(PERFORMANCE_TAG, deploy=True)
+def check_persistent_connections(app_configs, **kwargs):
+    """Соединение с БД не должно открываться на каждый запрос."""
+    return [
+        Warning(
+            f'База данных {alias!r} открывает новое соединение '
+            f'на каждый запрос.',
+            hint='Задайте CONN_MAX_AGE > 0 (переменная окружения '
+                 'CONN_MAX_AGE).',
+            id='core.W001',
+        )
+        for alias, database in settings.DATABASES.items()
+        if not database.get('CONN_MAX_AGE')
+    ]
+
+
+@register(Tags.templates, PERFORMANCE_TAG, deploy=True)
+def check_template_caching(app_configs, **kwargs):
+    """Шаблоны должны компилироваться один раз на процесс."""
+    errors = []
+    for template_settings in settings.TEMPLATES:
+        options = template_settings.get('OPTIONS', {})
+        if not _uses_cached_loader(template_settings):
+            errors.append(Warning(
+                'Шаблоны перечитываются и компилируются на каждый запрос.',
+                hint='Используйте django.template.loaders.cached.Loader.',
+                id='core.W002',
+            ))
+        if DEBUG_CONTEXT_PROCESSOR in options.get('context_processors', ()):
+            errors.append(Warning(
+                'Подключён контекстный процессор debug.',
+                hint=f'Уберите {DEBUG_CONTEXT_PROCESSOR} из боевых '
+                     f'настроек.',
+                id='core.W003',
+            ))
+    return errors
+
+
+@register(Tags.caches, PERFORMANCE_TAG, deploy=True)
+def check_shared_cache(app_configs, **kwargs):
+    """Кэш должен быть общим для всех процессов."""
+    backend = settings.CACHES.get('default', {}).get('BACKEND')
+    if backend in LOCAL_CACHE_BACKENDS:
+        return [Warning(
+            f'Кэш по умолчанию ({backend}) не разделяется между '
+            f'процессами.',
+            hint='Используйте memcached или другой общий кэш '
+                 '(переменные окружения CACHE_BACKEND, CACHE_LOCATION).',
+            id='core.W004',
+        )]
+    return []
+
+
+@register(PERFORMANCE_TAG, deploy=True)
+def check_static_files(app_configs, **kwargs):
+    """Статика должна отдаваться с хешем в имени файла."""
+    if settings.STATICFILES_STORAGE not in HASHED_STATIC_STORAGES:
+        return [Warning(
+            'Имена статических файлов не содержат хеш содержимого, '
+            'их нельзя кэшировать надолго.',
+            hint='Используйте ManifestStaticFilesStorage.',
+            id='core.W005',
+        )]
+    return []
+
+
+@register(PERFORMANCE_TAG, deploy=True)
+def check_middleware(app_configs, **kwargs):
+    """Ответы должны сжиматься и поддерживать условные запросы."""
+    errors = []
+    if not set(COMPRESSION_MIDDLEWARES) & set(settings.MIDDLEWARE):
+        errors.append(Warning(
+            'Ответы отдаются без сжатия.',
+            hint=f'Добавьте {COMPRESSION_MIDDLEWARES[0]} в MIDDLEWARE.',
+            id='core.W006',
+        ))
+    if CONDITIONAL_GET_MIDDLEWARE not in settings.MIDDLEWARE:
+        errors.append(Warning(
+            'Не поддерживаются условные запросы (ETag/Last-Modified).',
+            hint=f'Добавьте {CONDITIONAL_GET_MIDDLEWARE} в MIDDLEWARE.',
+            id='core.W007',
+        ))
+    return errors
+
+
+@register(PERFORMANCE_TAG, deploy=True)
+def check_debug(app_configs, **kwargs):
+    """DEBUG копит в памяти все SQL-запросы каждого запроса."""
+    if settings.DEBUG:
+        return [Warning(
+            'Включён DEBUG: каждый SQL-запрос сохраняется в памяти.',
+            hint='Используйте профиль prod (DJANGO_ENV=prod).',
+            id='core.W008',
+        )]
+    return []
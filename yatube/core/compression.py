@@ -0,0 +1,116 @@
+"""Сжатие ответов (brotli, gzip) и сжатие пробелов в HTML.
+
+brotli - необязательная зависимость: без пакета ``brotli`` ответы
+сжимаются только gzip.
+"""
+import re
+import zlib
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Содержимое этих тегов выводится как есть, пробелы в нём значимы.
+PRESERVED_RE = re.compile(
+    r'(<(pre|textarea|script|style)\b.*?</\2\s*>)', re.DOTALL | re.IGNORECASE
+)
+NEWLINE_SPACE_RE = re.compile(r'\s*\n\s*')
+SPACES_RE = re.compile(r'[ \t]{2,}')
+COMPRESSIBLE_TYPES = (
+    'text/',
+    'application/json',
+    'application/javascript',
+    'application/xml',
+    'application/rss+xml',
+    'application/atom+xml',
+    'image/svg+xml',
+)
+# Потоки событий должны уходить клиенту без буферизации.
+STREAMING_EXCLUDED_TYPES = ('text/event-stream',)
+
+
+def minify_html(html):
+    """Схлопнуть пробелы вне ``<pre>``, ``<textarea>``, скриптов и стилей.
+
+    Браузер отображает любую последовательность пробелов как один
+    пробел, поэтому вид страницы не меняется.
+    """
+    parts = PRESERVED_RE.split(html)
+    result = []
+    # split с двумя группами: текст, блок, имя тега, текст, ...
+    for index in range(0, len(parts), 3):
+        text = NEWLINE_SPACE_RE.sub('\n', parts[index])
+        result.append(SPACES_RE.sub(' ', text))
+        if index + 1 < len(parts):
+            result.append(parts[index + 1])
+    return ''.join(result)
+
+
+def parse_accept_encoding(header):
+    """Кодировки из Accept-Encoding с ненулевым весом."""
+    accepted = set()
+    for item in header.split(','):
+        name, _, params = item.strip().partition(';')
+        quality = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        if name and quality > 0:
+            accepted.add(name.strip().lower())
+    return accepted
+
+
+def choose_encoding(header):
+    """brotli, если он есть и клиент его принимает, иначе gzip."""
+    accepted = parse_accept_encoding(header)
+    if brotli is not None and 'br' in accepted:
+        return 'br'
+    if 'gzip' in accepted:
+        return 'gzip'
+    return None
+
+
+class Compressor:
+    """Потоковый компрессор с общим интерфейсом для gzip и brotli."""
+
+    def __init__(self, encoding, level):
+        self.encoding = encoding
+        if encoding == 'br':
+            self.compressor = brotli.Compressor(quality=level['br'])
+        else:
+            self.compressor = zlib.compressobj(level['gzip'], wbits=31)
+
+    def compress(self, data):
+        if self.encoding == 'br':
+            return self.compressor.process(data)
+        return self.compressor.compress(data)
+
+    def flush(self):
+        """Отдать всё накопленное, не завершая поток."""
+        if self.encoding == 'br':
+            return self.compressor.flush()
+        return self.compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        if self.encoding == 'br':
+            return self.compressor.finish()
+        return self.compressor.flush()
+
+
+def compress_bytes(data, encoding, level):
+    compressor = Compressor(encoding, level)
+    return compressor.compress(data) + compressor.finish()
+
+
+def compress_stream(chunks, encoding, level):
+    """Сжимать поток по кускам: каждый кусок сразу уходит клиенту."""
+    compressor = Compressor(encoding, level)
+    for chunk in chunks:
+        data = compressor.compress(chunk) + compressor.flush()
+        if data:
+            yield data
+    yield compressor.finish()
@@ -0,0 +1,138 @@
+"""Шина событий и поток Server-Sent Events поверх ASGI.
+
+Представления публикуют события из потоков пула через ``bus.publish``,
+а ``EventStreamApplication`` раздаёт их подписанным клиентам в цикле
+событий. Простаивающее соединение стоит одну корутину и одну очередь,
+поток-обработчик оно не занимает. Шина работает внутри одного процесса;
+клиенты других процессов получают события через опрос (polling).
+"""
+import asyncio
+import json
+import re
+from collections import defaultdict
+from urllib.parse import parse_qs
+
+TOPIC_RE = re.compile(r'^(feed|(group|author|post):[\w.@+-]+)$')
+HEARTBEAT_SECONDS = 15
+MAX_TOPICS = 50
+
+
+class EventBus:
+    def __init__(self, queue_size=100):
+        self.queue_size = queue_size
+        self.subscribers = defaultdict(set)
+        self.loop = None
+
+    def subscribe(self, topics):
+        """Очередь, получающая события по всем ``topics``."""
+        self.loop = asyncio.get_running_loop()
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        for topic in topics:
+            self.subscribers[topic].add(queue)
+        return queue
+
+    def unsubscribe(self, topics, queue):
+        for topic in topics:
+            self.subscribers[topic].discard(queue)
+            if not self.subscribers[topic]:
+                del self.subscribers[topic]
+
+    def publish(self, topic, event):
+        """Опубликовать событие; можно вызывать из любого потока."""
+        if self.loop is None or self.loop.is_closed():
+            return
+        self.loop.call_soon_threadsafe(self.dispatch, topic, event)
+
+    def dispatch(self, topic, event):
+        for queue in tuple(self.subscribers.get(topic, ())):
+            try:
+                queue.put_nowait(event)
+            except asyncio.QueueFull:
+                # Медленный клиент пропустит событие и догонит опросом.
+                pass
+
+
+bus = EventBus()
+
+
+def format_event(event):
+    """Событие в формате text/event-stream."""
+    return (
+        f'id: {event["id"]}\n'
+        f'event: {event["type"]}\n'
+        f'data: {json.dumps(event, ensure_ascii=False)}\n\n'
+    ).encode()
+
+
+class EventStreamApplication:
+    """ASGI-приложение: поток событий по темам из ``?topic=``.
+
+    Темы: ``feed``, ``group:<slug>``, ``author:<username>``,
+    ``post:<id>``.
+    """
+
+    def __init__(self, event_bus=bus, heartbeat=HEARTBEAT_SECONDS):
+        self.bus = event_bus
+        self.heartbeat = heartbeat
+
+    async def __call__(self, scope, receive, send):
+        query = parse_qs(scope.get('query_string', b'').decode('latin1'))
+        topics = set(query.get('topic', ()))
+        if (scope['method'] != 'GET' or not topics
+                or len(topics) > MAX_TOPICS
+                or not all(TOPIC_RE.match(topic) for topic in topics)):
+            await send({
+                'type': 'http.response.start',
+                'status': 400,
+                'headers': [(b'content-type', b'text/plain; charset=utf-8')],
+            })
+            await send({
+                'type': 'http.response.body',
+                'body': 'Неверный список тем'.encode(),
+            })
+            return
+        queue = self.bus.subscribe(topics)
+        disconnected = asyncio.ensure_future(self.wait_disconnect(receive))
+        try:
+            await send({
+                'type': 'http.response.start',
+                'status': 200,
+                'headers': [
+                    (b'content-type', b'text/event-stream; charset=utf-8'),
+                    (b'cache-control', b'no-cache'),
+                    (b'x-accel-buffering', b'no'),
+                ],
+            })
+            await send({
+                'type': 'http.response.body',
+                'body': b'retry: 5000\n\n',
+                'more_body': True,
+            })
+            while not disconnected.done():
+                getter = asyncio.ensure_future(queue.get())
+                done, _ = await asyncio.wait(
+                    (getter, disconnected),
+                    timeout=self.heartbeat,
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+                if getter in done:
+                    body = format_event(getter.result())
+                else:
+                    getter.cancel()
+                    if disconnected.done():
+                        break
+                    body = b': ping\n\n'
+                await send({
+                    'type': 'http.response.body',
+                    'body': body,
+                    'more_body': True,
+                })
+        finally:
+            disconnected.cancel()
+            self.bus.unsubscribe(topics, queue)
+
+    async def wait_disconnect(self, receive):
+        while True:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                return
@@ -0,0 +1,122 @@
+import asyncio
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand
+from django.test import RequestFactory
+
+from core.asgi import ThreadPoolWSGIAdapter
+from posts.models import Group, Post
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнить пропускную способность WSGI и ASGI на страницах лент. '
+        'Задержка клиента имитирует медленную отдачу ответа по сети.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200)
+        parser.add_argument('--threads', type=int, default=4)
+        parser.add_argument('--concurrency', type=int, default=64)
+        parser.add_argument(
+            '--client-delay', type=float, default=0.05,
+            help='Секунд на отдачу ответа медленному клиенту.'
+        )
+
+    def get_paths(self):
+        paths = ['/', '/?page=2']
+        group = Group.objects.first()
+        if group:
+            paths.append(f'/group/{group.slug}/')
+        post = Post.objects.select_related('author').first()
+        if post:
+            paths.append(f'/profile/{post.author.username}/')
+            paths.append(f'/posts/{post.pk}/')
+        return paths
+
+    def report(self, name, latencies, elapsed):
+        latencies.sort()
+        self.stdout.write(
+            f'{name}: {len(latencies) / elapsed:8.1f} запросов/с, '
+            f'p50 {statistics.median(latencies) * 1000:7.1f} мс, '
+            f'p95 {latencies[int(len(latencies) * 0.95) - 1] * 1000:7.1f} мс'
+        )
+
+    def bench_wsgi(self, paths, options):
+        handler = WSGIHandler()
+        factory = RequestFactory()
+
+        def call(path):
+            started = time.perf_counter()
+            path, _, query = path.partition('?')
+            environ = factory._base_environ(
+                PATH_INFO=path, QUERY_STRING=query
+            )
+            response = handler(environ, lambda status, headers: None)
+            b''.join(response)
+            # Поток занят, пока ответ уходит медленному клиенту.
+            time.sleep(options['client_delay'])
+            response.close()
+            return time.perf_counter() - started
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options['threads']) as executor:
+            latencies = list(executor.map(
+                call, (paths[n % len(paths)]
+                       for n in range(options['requests']))
+            ))
+        self.report('WSGI', latencies, time.perf_counter() - started)
+
+    def bench_asgi(self, paths, options):
+        application = ThreadPoolWSGIAdapter(
+            WSGIHandler(), max_workers=options['threads']
+        )
+        semaphore = asyncio.Semaphore(options['concurrency'])
+
+        async def call(path):
+            path, _, query = path.partition('?')
+            scope = {
+                'type': 'http',
+                'method': 'GET',
+                'path': path,
+                'query_string': query.encode(),
+                'headers': [(b'host', b'testserver')],
+                'server': ('testserver', 80),
+            }
+
+            async def receive():
+                return {'type': 'http.request', 'body': b''}
+
+            async def send(message):
+                if message['type'] == 'http.response.body' and not message.get(
+                        'more_body'):
+                    await asyncio.sleep(options['client_delay'])
+
+            async with semaphore:
+                started = time.perf_counter()
+                await application(scope, receive, send)
+                return time.perf_counter() - started
+
+        async def run():
+            return await asyncio.gather(*(
+                call(paths[n % len(paths)])
+                for n in range(options['requests'])
+            ))
+
+        started = time.perf_counter()
+        latencies = asyncio.run(run())
+        self.report('ASGI', latencies, time.perf_counter() - started)
+        application.executor.shutdown()
+
+    def handle(self, *args, **options):
+        paths = self.get_paths()
+        self.stdout.write(
+            f'{options["requests"]} запросов к {", ".join(paths)}; '
+            f'{options["threads"]} потоков, '
+            f'задержка клиента {options["client_delay"]} с'
+        )
+        self.bench_wsgi(paths, options)
+        self.bench_asgi(paths, options)
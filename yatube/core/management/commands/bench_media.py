@@ -0,0 +1,80 @@
+import os
+import shutil
+import tempfile
+import time
+
+from django.core.management.base import BaseCommand
+from django.test import RequestFactory, override_settings
+from django.views.static import serve
+
+from core.media import serve_media
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнить отдачу медиа через django.views.static.serve и '
+        'core.media.serve_media.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=500)
+        parser.add_argument(
+            '--size', type=int, default=512 * 1024,
+            help='Размер файла в байтах.'
+        )
+
+    def run(self, name, view, requests, **headers):
+        factory = RequestFactory()
+        sent = 0
+        started = time.perf_counter()
+        for _ in range(requests):
+            response = view(factory.get('/media/bench.jpg', **headers))
+            if getattr(response, 'streaming', False):
+                sent += sum(len(chunk) for chunk in response)
+            else:
+                sent += len(response.content)
+            response.close()
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            f'{name:<28} {requests / elapsed:9.1f} запросов/с, '
+            f'через Python {sent / requests / 1024:8.1f} КБ на запрос'
+        )
+
+    def handle(self, *args, **options):
+        media_root = tempfile.mkdtemp()
+        try:
+            with open(os.path.join(media_root, 'bench.jpg'), 'wb') as file:
+                file.write(os.urandom(options['size']))
+            with override_settings(MEDIA_ROOT=media_root, MEDIA_SENDFILE=''):
+                self.bench(options['requests'], media_root)
+        finally:
+            shutil.rmtree(media_root)
+
+    def bench(self, requests, media_root):
+        etag = serve_media(
+            RequestFactory().get('/'), 'bench.jpg'
+        )['ETag']
+        self.run(
+            'static.serve', lambda request: serve(
+                request, 'bench.jpg', document_root=media_root
+            ), requests,
+        )
+        self.run(
+            'serve_media',
+            lambda request: serve_media(request, 'bench.jpg'), requests,
+        )
+        self.run(
+            'serve_media Range 64 КБ',
+            lambda request: serve_media(request, 'bench.jpg'), requests,
+            HTTP_RANGE='bytes=0-65535',
+        )
+        self.run(
+            'serve_media If-None-Match',
+            lambda request: serve_media(request, 'bench.jpg'), requests,
+            HTTP_IF_NONE_MATCH=etag,
+        )
+        with override_settings(MEDIA_SENDFILE='x-accel-redirect'):
+            self.run(
+                'serve_media X-Accel-Redirect',
+                lambda request: serve_media(request, 'bench.jpg'), requests,
+            )
@@ -0,0 +1,76 @@
+import time
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.http import HttpResponse
+from django.test import RequestFactory, override_settings
+
+from core.ratelimit import client_key, ratelimit
+
+
+def view(request):
+    return HttpResponse('ok')
+
+
+class Command(BaseCommand):
+    help = (
+        'Измерить накладные расходы ограничения частоты запросов на '
+        'текущем кэше (CACHES["default"]).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=20000)
+        parser.add_argument(
+            '--clients', type=int, default=100,
+            help='Сколько разных клиентов (корзин) делают запросы.'
+        )
+
+    def run(self, name, view, requests, baseline=None):
+        rejected = 0
+        started = time.perf_counter()
+        for number in range(requests):
+            response = view(self.requests[number % len(self.requests)])
+            rejected += response.status_code == 429
+        elapsed = (time.perf_counter() - started) / requests * 1e6
+        overhead = '' if baseline is None else (
+            f', накладные расходы {elapsed - baseline:6.1f} мкс'
+        )
+        self.stdout.write(
+            f'{name:<22} {elapsed:7.1f} мкс на запрос, '
+            f'отклонено {rejected}{overhead}'
+        )
+        return elapsed
+
+    def handle(self, *args, **options):
+        factory = RequestFactory()
+        self.requests = []
+        for number in range(options['clients']):
+            request = factory.post(
+                '/', REMOTE_ADDR=f'10.0.{number // 256}.{number % 256}'
+            )
+            request.user = AnonymousUser()
+            self.requests.append(request)
+        keys = [
+            f'ratelimit:{scope}:{client_key(request)}:{part}'
+            for scope in ('bench', 'bench_exhausted')
+            for request in self.requests
+            for part in ('start', 'used')
+        ]
+        requests = options['requests']
+        cache.delete_many(keys)
+        try:
+            with override_settings(RATELIMIT_ENABLED=True):
+                baseline = self.run('без ограничения', view, requests)
+                self.run(
+                    'запас не исчерпан',
+                    ratelimit('bench', rate=f'{requests}/s')(view),
+                    requests, baseline,
+                )
+                self.run(
+                    'запас исчерпан (429)',
+                    ratelimit('bench_exhausted', rate='1/d')(view),
+                    requests, baseline,
+                )
+        finally:
+            cache.delete_many(keys)
@@ -0,0 +1,28 @@
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core import prerender
+
+
+class Command(BaseCommand):
+    help = (
+        'Отрендерить страницы «О проекте» и страницы ошибок в '
+        'PRERENDER_ROOT. Запускать при каждом деплое.'
+    )
+
+    def handle(self, *args, **options):
+        root = settings.PRERENDER_ROOT
+        if not root:
+            raise CommandError('PRERENDER_ROOT не задан.')
+        for name, template_name in prerender.PAGES.items():
+            path = os.path.join(root, name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            content = prerender.render_page(template_name)
+            # Воркеры не должны прочитать недописанный файл.
+            temporary_path = f'{path}.tmp'
+            with open(temporary_path, 'w', encoding='utf-8') as file:
+                file.write(content)
+            os.replace(temporary_path, path)
+            self.stdout.write(f'{path}: {len(content.encode())} байт')
@@ -0,0 +1,188 @@
+"""Отдача загруженных файлов (MEDIA_ROOT).
+
+Представление отвечает на условные запросы по сильному ETag и
+Last-Modified, отдаёт диапазоны байт (Range) и ставит долгий
+``Cache-Control: immutable`` миниатюрам, имена которых меняются вместе
+с содержимым. С ``MEDIA_SENDFILE`` тело файла отдаёт веб-сервер:
+представление только проверяет запрос и ставит заголовок ``X-Sendfile``
+(Apache, lighttpd) или ``X-Accel-Redirect`` (nginx).
+"""
+import mimetypes
+import os
+import posixpath
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import (
+    FileResponse, Http404, HttpResponse, HttpResponseNotModified,
+    StreamingHttpResponse,
+)
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_http_date_safe
+from django.views.decorators.http import require_safe
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+CHUNK_SIZE = 64 * 1024
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+
+def get_etag(stat):
+    """Сильный ETag из размера и времени изменения файла."""
+    return f'"{stat.st_size:x}-{stat.st_mtime_ns:x}"'
+
+
+def parse_range(header, size):
+    """Один диапазон ``bytes=`` как (начало, конец включительно).
+
+    None - заголовок не поддерживается и файл отдаётся целиком,
+    ValueError - диапазон за пределами файла.
+    """
+    match = RANGE_RE.match(header.strip())
+    if not match or match.groups() == ('', ''):
+        return None
+    start, end = match.groups()
+    if not start:
+        # bytes=-N: последние N байт.
+        length = int(end)
+        if not length:
+            raise ValueError(header)
+        return max(size - length, 0), size - 1
+    start = int(start)
+    end = min(int(end), size - 1) if end else size - 1
+    if start >= size or start > end:
+        raise ValueError(header)
+    return start, end
+
+
+def range_applies(request, etag, mtime):
+    """If-Range: диапазон отдаётся, только если файл не изменился."""
+    if_range = request.META.get('HTTP_IF_RANGE')
+    if not if_range:
+        return True
+    if if_range.startswith('"'):
+        return if_range == etag
+    modified = parse_http_date_safe(if_range)
+    return modified is not None and int(mtime) <= modified
+
+
+def read_range(path, start, length):
+    with open(path, 'rb') as file:
+        file.seek(start)
+        while length > 0:
+            chunk = file.read(min(CHUNK_SIZE, length))
+            if not chunk:
+                return
+            length -= len(chunk)
+            yield chunk
+
+
+def get_cache_control(path):
+    if path.startswith(tuple(settings.MEDIA_IMMUTABLE_PREFIXES)):
+        return IMMUTABLE_CACHE_CONTROL
+    return f'public, max-age={settings.MEDIA_CACHE_MAX_AGE}'
+
+
+def get_full_path(path):
+    path = posixpath.normpath(path).lstrip('/')
+    # Временные файлы загрузок (.uploads) и прочие скрытые не отдаются.
+    if any(part.startswith('.') for part in path.split('/')):
+        raise Http404
+    try:
+        full_path = safe_join(settings.MEDIA_ROOT, path)
+    except SuspiciousFileOperation:
+        raise Http404
+    return path, full_path
+
+
+def guess_type(full_path):
+    content_type, encoding = mimetypes.guess_type(full_path)
+    return content_type or 'application/octet-stream', encoding
+
+
+def offload(response, path, full_path):
+    """Передать отдачу тела веб-серверу.
+
+    Путь кодируется процентами: иначе Django запишет не-ASCII имя в
+    заголовок MIME-словом ``=?utf-8?b?...?=``, которое веб-сервер не
+    разберёт. nginx и mod_xsendfile (``XSendFileUnescape On`` по
+    умолчанию) раскодируют путь сами.
+    """
+    if settings.MEDIA_SENDFILE == 'x-accel-redirect':
+        response['X-Accel-Redirect'] = quote(
+            settings.MEDIA_ACCEL_PREFIX + path
+        )
+    else:
+        response['X-Sendfile'] = quote(full_path)
+    return response
+
+
+@require_safe
+def serve_media(request, path):
+    path, full_path = get_full_path(path)
+    try:
+        stat = os.stat(full_path)
+    except OSError:
+        raise Http404
+    if not os.path.isfile(full_path):
+        raise Http404
+    etag = get_etag(stat)
+    headers = {
+        'ETag': etag,
+        'Last-Modified': http_date(stat.st_mtime),
+        'Cache-Control': get_cache_control(path),
+        'Accept-Ranges': 'bytes',
+    }
+    response = get_conditional_response(
+        request, etag=etag, last_modified=int(stat.st_mtime)
+    )
+    if response is not None:
+        if isinstance(response, HttpResponseNotModified):
+            for name, value in headers.items():
+                response[name] = value
+        return response
+
+    if settings.MEDIA_SENDFILE:
+        response = offload(
+            HttpResponse(content_type=guess_type(full_path)[0]),
+            path, full_path,
+        )
+    else:
+        response = build_response(request, full_path, stat, etag)
+    for name, value in headers.items():
+        response[name] = value
+    return response
+
+
+def build_response(request, full_path, stat, etag):
+    content_type, encoding = guess_type(full_path)
+    size = stat.st_size
+    byte_range = None
+    range_header = request.META.get('HTTP_RANGE')
+    if range_header and range_applies(request, etag, stat.st_mtime):
+        try:
+            byte_range = parse_range(range_header, size)
+        except ValueError:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{size}'
+            return response
+    if byte_range is None:
+        # FileResponse отдаётся через wsgi.file_wrapper (sendfile).
+        response = FileResponse(
+            open(full_path, 'rb'), content_type=content_type
+        )
+        response['Content-Length'] = str(size)
+    else:
+        start, end = byte_range
+        response = StreamingHttpResponse(
+            read_range(full_path, start, end - start + 1),
+            status=206,
+            content_type=content_type,
+        )
+        response['Content-Length'] = str(end - start + 1)
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+    if encoding:
+        response['Content-Encoding'] = encoding
+    return response
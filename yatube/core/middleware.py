@@ -0,0 +1,118 @@
+import time
+from http import HTTPStatus
+
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+
+from . import compression, routers
+
+PRIMARY_PIN_COOKIE = 'primary_pin'
+
+
+class ReplicaPinningMiddleware:
+    """Закрепить клиента за основной БД на время после его записи.
+
+    Пока не истёк срок cookie, выставленной после записи, все чтения
+    идут в основную БД и пользователь сразу видит свои изменения.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not settings.DATABASE_REPLICAS:
+            return self.get_response(request)
+        routers.reset()
+        pinned_until = request.COOKIES.get(PRIMARY_PIN_COOKIE, '')
+        if pinned_until.isdigit() and int(pinned_until) > time.time():
+            routers.pin_to_primary()
+        try:
+            response = self.get_response(request)
+            if routers.has_written():
+                pin_seconds = settings.REPLICA_PIN_SECONDS
+                response.set_cookie(
+                    PRIMARY_PIN_COOKIE,
+                    str(int(time.time()) + pin_seconds),
+                    max_age=pin_seconds,
+                    httponly=True,
+                )
+        finally:
+            routers.reset()
+        return response
+
+
+class CompressionMiddleware:
+    """Сжатие ответов brotli или gzip и сжатие пробелов в HTML.
+
+    Замена GZipMiddleware: brotli выбирается, если установлен пакет
+    ``brotli`` и клиент его принимает. Ответы короче
+    ``COMPRESSION_MIN_LENGTH`` не сжимаются, потоковые сжимаются по
+    кускам без буферизации, поток событий (text/event-stream) и части
+    ответа на запрос Range не трогаются. При ``HTML_MINIFY`` из HTML
+    убираются лишние пробелы.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.level = {
+            'gzip': settings.COMPRESSION_GZIP_LEVEL,
+            'br': settings.COMPRESSION_BROTLI_QUALITY,
+        }
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        content_type = response.get('Content-Type', '').lower()
+        if not content_type.startswith(compression.COMPRESSIBLE_TYPES):
+            return response
+        if content_type.startswith(compression.STREAMING_EXCLUDED_TYPES):
+            return response
+        if response.has_header('Content-Encoding'):
+            return response
+        # Смещения Content-Range относятся к несжатому телу.
+        if (response.status_code == HTTPStatus.PARTIAL_CONTENT
+                or response.has_header('Content-Range')):
+            return response
+        if not response.streaming and settings.HTML_MINIFY:
+            self.minify(response, content_type)
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encoding = compression.choose_encoding(
+            request.META.get('HTTP_ACCEPT_ENCODING', '')
+        )
+        if encoding is None:
+            return response
+        if response.streaming:
+            response.streaming_content = compression.compress_stream(
+                response.streaming_content, encoding, self.level
+            )
+            del response['Content-Length']
+        else:
+            if len(response.content) < settings.COMPRESSION_MIN_LENGTH:
+                return response
+            content = compression.compress_bytes(
+                response.content, encoding, self.level
+            )
+            if len(content) >= len(response.content):
+                return response
+            response.content = content
+            response['Content-Length'] = str(len(content))
+        self.weaken_etag(response)
+        response['Content-Encoding'] = encoding
+        return response
+
+    def minify(self, response, content_type):
+        if not content_type.startswith('text/html'):
+            return
+        charset = response.charset
+        content = response.content.decode(charset)
+        minified = compression.minify_html(content)
+        if minified != content:
+            response.content = minified.encode(charset)
+            if response.has_header('Content-Length'):
+                response['Content-Length'] = str(len(response.content))
+            self.weaken_etag(response)
+
+    def weaken_etag(self, response):
+        """Тело изменилось: ETag больше не совпадает побайтно."""
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
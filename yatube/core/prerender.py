@@ -0,0 +1,106 @@
+"""Заранее отрендеренные страницы «О проекте» и страницы ошибок.
+
+Эти страницы не зависят от данных, кроме ссылок входа в шапке и адреса
+на странице 404. Команда ``prerender_pages`` при деплое рендерит их в
+``PRERENDER_ROOT``, оставляя на месте ссылок и адреса метки. При отдаче
+метки заменяются: ссылки - крошечным шаблоном
+``includes/auth_links.html`` для пользователя запроса, без цепочки
+контекст-процессоров. Если файла нет, страница рендерится как обычно.
+"""
+import hashlib
+import os
+import threading
+
+from django.conf import settings
+from django.http import HttpResponse
+from django.template.loader import render_to_string
+from django.utils.cache import (
+    get_conditional_response, patch_cache_control, patch_vary_headers
+)
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+from django.views.generic.base import TemplateView
+
+from .context_processors.year import year
+
+AUTH_MARKER = '<!--prerender:auth-->'
+PATH_MARKER = '<!--prerender:path-->'
+# Имя файла -> шаблон.
+PAGES = {
+    'about/author.html': 'about/author.html',
+    'about/tech.html': 'about/tech.html',
+    '403csrf.html': 'core/403csrf.html',
+    '404.html': 'core/404.html',
+    '500.html': 'core/500.html',
+}
+
+_pages = {}
+_lock = threading.Lock()
+
+
+def render_page(template_name):
+    """Страница с метками вместо ссылок входа и адреса запроса."""
+    return render_to_string(template_name, {
+        'prerender': True,
+        'path': mark_safe(PATH_MARKER),
+        **year(None),
+    })
+
+
+def load_page(name):
+    """Отрендеренная страница из PRERENDER_ROOT или None.
+
+    Файл читается один раз и перечитывается, если изменился.
+    """
+    if not settings.PRERENDER_ROOT:
+        return None
+    path = os.path.join(settings.PRERENDER_ROOT, name)
+    try:
+        modified = os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+    cached = _pages.get(name)
+    if cached is not None and cached[0] == modified:
+        return cached[1]
+    with open(path, encoding='utf-8') as file:
+        content = file.read()
+    with _lock:
+        _pages[name] = (modified, content)
+    return content
+
+
+def auth_links(user):
+    return render_to_string('includes/auth_links.html', {'user': user})
+
+
+def serve(name, user=None, path='', status=200):
+    """Ответ из отрендеренной страницы или None, если её нет.
+
+    ``user=None`` - ссылки для анонима, без обращения к сессии.
+    """
+    content = load_page(name)
+    if content is None:
+        return None
+    content = content.replace(AUTH_MARKER, auth_links(user), 1)
+    content = content.replace(PATH_MARKER, escape(path))
+    return HttpResponse(content, status=status)
+
+
+class PrerenderedTemplateView(TemplateView):
+    """Страница без данных: из PRERENDER_ROOT с долгим кэшированием."""
+
+    def get(self, request, *args, **kwargs):
+        response = serve(self.template_name, request.user)
+        if response is None:
+            return super().get(request, *args, **kwargs)
+        etag = '"{}"'.format(hashlib.md5(response.content).hexdigest())
+        response['ETag'] = etag
+        # Ссылки входа зависят от сессии, а имя пользователя в шапке
+        # нельзя хранить в общих кэшах.
+        patch_vary_headers(response, ('Cookie',))
+        if request.user.is_authenticated:
+            patch_cache_control(response, private=True)
+        patch_cache_control(response, max_age=settings.PRERENDER_MAX_AGE)
+        return get_conditional_response(
+            request, etag=etag, response=response
+        )
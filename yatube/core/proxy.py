@@ -0,0 +1,25 @@
+"""Адрес клиента за доверенным обратным прокси.
+
+За nginx ``REMOTE_ADDR`` у всех запросов - адрес самого прокси, и
+ограничения по IP делили бы один счётчик на всех клиентов. Прокси
+передаёт адрес клиента в заголовке ``CLIENT_IP_HEADER`` (ключ
+``request.META``, например ``HTTP_X_FORWARDED_FOR``). В
+``X-Forwarded-For`` каждый прокси дописывает адрес в конец, а начало
+списка присылает сам клиент, поэтому берётся адрес, записанный
+``TRUSTED_PROXY_COUNT``-м прокси с конца.
+"""
+from django.conf import settings
+
+
+def get_client_ip(request):
+    """IP-адрес клиента; без заголовка прокси - ``REMOTE_ADDR``."""
+    header = settings.CLIENT_IP_HEADER
+    if header:
+        addresses = [
+            address.strip()
+            for address in request.META.get(header, '').split(',')
+            if address.strip()
+        ]
+        if len(addresses) >= settings.TRUSTED_PROXY_COUNT:
+            return addresses[-settings.TRUSTED_PROXY_COUNT]
+    return request.META.get('REMOTE_ADDR', '')
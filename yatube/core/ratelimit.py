@@ -0,0 +1,124 @@
+"""Ограничение частоты запросов маркерной корзиной в общем кэше.
+
+Корзина клиента вмещает N маркеров и наполняется со скоростью N за
+период ограничения ``'N/период'``. Её состояние - два ключа кэша:
+время, от которого считается пополнение, и число израсходованных
+маркеров. Расход - атомарный ``incr``, поэтому воркеры не теряют
+запросы друг друга. Время сдвигается, только когда корзина была
+полна: тогда гонка лишь уменьшает запас до полной корзины.
+
+Ограничения задаются в ``RATELIMITS`` по областям: декоратор
+``ratelimit`` ограничивает представление, ``RateLimitMiddleware`` -
+все небезопасные запросы клиента (область ``'write'``). Превышение
+даёт ответ 429 с заголовком ``Retry-After``.
+"""
+import math
+import time
+from functools import lru_cache, wraps
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .proxy import get_client_ip
+from .views import too_many_requests
+
+PERIODS = {'s': 1, 'm': 60, 'h': 60 * 60, 'd': 24 * 60 * 60}
+UNSAFE_METHODS = ('POST', 'PUT', 'PATCH', 'DELETE')
+# Сколько периодов хранится корзина без обращений. Полной она
+# становится уже через один период, дальше ключи просто занимают кэш.
+BUCKET_TIMEOUT_PERIODS = 10
+
+
+@lru_cache(maxsize=None)
+def parse_rate(rate):
+    """``'10/m'`` -> (10, 60): ёмкость корзины и период в секундах."""
+    tokens, period = rate.split('/')
+    return int(tokens), PERIODS[period]
+
+
+def client_key(request):
+    """Пользователь для вошедших, иначе IP-адрес (с учётом прокси)."""
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated:
+        return f'user:{user.pk}'
+    return f'ip:{get_client_ip(request)}'
+
+
+def consume(scope, client, rate, now=None):
+    """Взять маркер из корзины; вернуть 0 или секунды до следующего."""
+    capacity, period = parse_rate(rate)
+    refill = capacity / period
+    timeout = period * BUCKET_TIMEOUT_PERIODS
+    now = time.time() if now is None else now
+    start_key = f'ratelimit:{scope}:{client}:start'
+    used_key = f'ratelimit:{scope}:{client}:used'
+    if cache.add(start_key, now, timeout):
+        cache.set(used_key, 0, timeout)
+        start = now
+    else:
+        start = cache.get(start_key, now)
+    try:
+        used = cache.incr(used_key)
+    except ValueError:
+        cache.add(used_key, 0, timeout)
+        used = cache.incr(used_key)
+    refilled = refill * (now - start)
+    if used > capacity + refilled:
+        # Отклонённый запрос маркер не расходует.
+        cache.decr(used_key)
+        return (used - capacity - refilled) / refill
+    if refilled > used - 1:
+        # До запроса корзина была полна: лишнее пополнение сгорает.
+        cache.set(start_key, now - (used - 1) / refill, timeout)
+    return 0
+
+
+def check(request, scope, rate=None, key=client_key):
+    """Ответ 429, если клиент исчерпал ограничение области, иначе None."""
+    if not settings.RATELIMIT_ENABLED:
+        return None
+    rate = rate or settings.RATELIMITS.get(scope)
+    if rate is None:
+        return None
+    retry_after = consume(scope, key(request), rate)
+    if not retry_after:
+        return None
+    return too_many_requests(request, math.ceil(retry_after))
+
+
+def ratelimit(scope, rate=None, methods=None, key=client_key):
+    """Ограничить представление по области ``scope`` из ``RATELIMITS``.
+
+    ``rate`` задаёт ограничение в коде, если области нет в настройках;
+    ``methods`` - какие методы расходуют маркеры (по умолчанию все).
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapped(request, *args, **kwargs):
+            if methods is None or request.method in methods:
+                response = check(request, scope, rate, key)
+                if response is not None:
+                    return response
+            return view(request, *args, **kwargs)
+        return wrapped
+    return decorator
+
+
+class RateLimitMiddleware:
+    """Общее ограничение небезопасных запросов клиента (область write).
+
+    Маркер берётся в ``process_view``, когда ``CsrfViewMiddleware``
+    выше по списку уже пропустил запрос: поддельный межсайтовый POST не
+    расходует корзину вошедшего пользователя.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        return self.get_response(request)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if request.method not in UNSAFE_METHODS:
+            return None
+        return check(request, 'write')
@@ -0,0 +1,66 @@
+"""Маршрутизация запросов между основной БД и репликами.
+
+Чтение моделей из ``REPLICA_ROUTED_APPS`` уходит на одну из реплик
+``DATABASE_REPLICAS``, запись - всегда в ``default``. После записи поток
+закрепляется за основной БД до конца запроса, а
+``core.middleware.ReplicaPinningMiddleware`` продлевает закрепление
+на следующие запросы того же клиента (read-your-writes).
+"""
+import random
+import threading
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+_state = threading.local()
+
+
+def pin_to_primary():
+    """Читать из основной БД до вызова ``reset``."""
+    _state.pinned = True
+
+
+def has_written():
+    """Была ли запись в маршрутизируемые модели с последнего ``reset``."""
+    return getattr(_state, 'written', False)
+
+
+def reset():
+    _state.pinned = False
+    _state.written = False
+
+
+def is_pinned():
+    return getattr(_state, 'pinned', False) or has_written()
+
+
+class PrimaryReplicaRouter:
+    def _is_routed(self, model):
+        return model._meta.app_label in settings.REPLICA_ROUTED_APPS
+
+    def _pool(self):
+        return {DEFAULT_DB_ALIAS, *settings.DATABASE_REPLICAS}
+
+    def db_for_read(self, model, **hints):
+        if not self._is_routed(model):
+            return None
+        replicas = settings.DATABASE_REPLICAS
+        if not replicas or is_pinned():
+            return DEFAULT_DB_ALIAS
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        if not self._is_routed(model):
+            return None
+        _state.written = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Реплики содержат те же данные, что и основная БД.
+        pool = self._pool()
+        if obj1._state.db in pool and obj2._state.db in pool:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return None
@@ -0,0 +1,35 @@
+"""Настройка соединений SQLite для конкурентной нагрузки.
+
+В режиме WAL читатели не блокируются пишущей транзакцией, а
+``busy_timeout`` заставляет писателей ждать освобождения блокировки
+вместо немедленной ошибки ``database is locked``.
+"""
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+
+def get_sqlite_pragmas():
+    """PRAGMA, выполняемые на каждом новом соединении."""
+    return (
+        ('journal_mode', 'WAL'),
+        ('synchronous', 'NORMAL'),
+        ('busy_timeout', settings.SQLITE_BUSY_TIMEOUT),
+        ('cache_size', settings.SQLITE_CACHE_SIZE),
+        ('mmap_size', settings.SQLITE_MMAP_SIZE),
+        ('temp_store', 'MEMORY'),
+    )
+
+
+def apply_sqlite_pragmas(cursor):
+    """Применить PRAGMA к соединению через его курсор (DB-API)."""
+    for name, value in get_sqlite_pragmas():
+        cursor.execute(f'PRAGMA {name} = {value}')
+
+
+@receiver(connection_created)
+def configure_sqlite_connection(sender, connection, **kwargs):
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        apply_sqlite_pragmas(cursor)
@@ -0,0 +1,113 @@
+"""Тестовый раннер с отчётом о времени прогона.
+
+``python manage.py test --timing`` выводит время создания тестовых БД,
+прогона и удаления БД, а при последовательном прогоне - ещё и самые
+медленные тесты. Тесты с меткой ``slow`` пропускаются через
+``--exclude-tag slow``.
+"""
+import time
+from collections import Counter
+from contextlib import contextmanager
+from unittest import TextTestResult
+
+from django.test.runner import DiscoverRunner
+
+SLOWEST_TESTS_NUMBER = 10
+
+
+class TimedTextTestResult(TextTestResult):
+    """Результат прогона, запоминающий время тестов и классов тестов.
+
+    Время класса включает setUpClass и setUpTestData: оно считается от
+    конца предыдущего теста.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.durations = []
+        self.class_durations = Counter()
+        self.stopped = time.perf_counter()
+
+    def startTest(self, test):
+        self.started = time.perf_counter()
+        super().startTest(test)
+
+    def stopTest(self, test):
+        super().stopTest(test)
+        now = time.perf_counter()
+        self.durations.append((now - self.started, test.id()))
+        test_class = type(test)
+        self.class_durations[
+            f'{test_class.__module__}.{test_class.__qualname__}'
+        ] += now - self.stopped
+        self.stopped = now
+
+
+class TimingTestRunner(DiscoverRunner):
+    def __init__(self, timing=False, **kwargs):
+        super().__init__(**kwargs)
+        self.timing = timing
+        self.timings = []
+        self.slowest = self.slowest_classes = ()
+
+    @classmethod
+    def add_arguments(cls, parser):
+        super().add_arguments(parser)
+        parser.add_argument(
+            '--timing', action='store_true',
+            help='Вывести время создания БД, прогона и самые медленные '
+                 'тесты.',
+        )
+
+    @contextmanager
+    def measure(self, name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings.append((name, time.perf_counter() - started))
+
+    def get_resultclass(self):
+        resultclass = super().get_resultclass()
+        # В параллельном прогоне события тестов приходят из процессов
+        # пачкой, и время отдельных тестов не измерить.
+        if resultclass is None and self.timing and self.parallel <= 1:
+            return TimedTextTestResult
+        return resultclass
+
+    def setup_databases(self, **kwargs):
+        with self.measure('Создание тестовых БД'):
+            return super().setup_databases(**kwargs)
+
+    def run_suite(self, suite, **kwargs):
+        with self.measure('Прогон тестов'):
+            result = super().run_suite(suite, **kwargs)
+        self.slowest = sorted(
+            getattr(result, 'durations', ()), reverse=True
+        )[:SLOWEST_TESTS_NUMBER]
+        self.slowest_classes = getattr(
+            result, 'class_durations', Counter()
+        ).most_common(SLOWEST_TESTS_NUMBER)
+        return result
+
+    def teardown_databases(self, old_config, **kwargs):
+        with self.measure('Удаление тестовых БД'):
+            super().teardown_databases(old_config, **kwargs)
+
+    def suite_result(self, suite, result, **kwargs):
+        if self.timing:
+            self.report()
+        return super().suite_result(suite, result, **kwargs)
+
+    def report(self):
+        print('\nВремя:')
+        for name, seconds in self.timings:
+            print(f'  {name}: {seconds:.2f} с')
+        if self.slowest_classes:
+            print('Самые медленные классы (с подготовкой данных):')
+            for test_class, seconds in self.slowest_classes:
+                print(f'  {seconds:.2f} с  {test_class}')
+        if self.slowest:
+            print('Самые медленные тесты:')
+            for seconds, test_id in self.slowest:
+                print(f'  {seconds:.2f} с  {test_id}')
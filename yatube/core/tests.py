@@ -0,0 +1,1088 @@
+import asyncio
+import gzip
+import io
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+import zlib
+from http import HTTPStatus
+from unittest import skipUnless
+from urllib.parse import quote
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.contrib.auth.middleware import AuthenticationMiddleware
+from django.contrib.sessions.middleware import SessionMiddleware
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.core.handlers.wsgi import WSGIHandler
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import (
+    RequestFactory, SimpleTestCase, TestCase, TransactionTestCase,
+    override_settings,
+)
+from django.urls import reverse
+
+from posts.models import Group, Post
+from . import admission, checks, compression, prerender, ratelimit, routers
+from .media import IMMUTABLE_CACHE_CONTROL
+from .proxy import get_client_ip
+from .asgi import PathRouter, ThreadPoolWSGIAdapter, build_environ
+from .events import EventBus, EventStreamApplication
+from .middleware import (
+    PRIMARY_PIN_COOKIE, CompressionMiddleware, ReplicaPinningMiddleware
+)
+from .sqlite import apply_sqlite_pragmas
+from .storage import InMemoryStorage
+from .views import server_error
+
+PROD_TEMPLATES = [{
+    'BACKEND': 'django.template.backends.django.DjangoTemplates',
+    'OPTIONS': {
+        'loaders': [
+            ('django.template.loaders.cached.Loader', [
+                'django.template.loaders.app_directories.Loader',
+            ]),
+        ],
+        'context_processors': [],
+    },
+}]
+
+
+class PerformanceChecksTests(SimpleTestCase):
+    def check_ids(self, check):
+        return [error.id for error in check(None)]
+
+    @override_settings(DATABASES={'default': {'CONN_MAX_AGE': 0}})
+    def test_persistent_connections_required(self):
+        """Без CONN_MAX_AGE выдаётся предупреждение."""
+        self.assertEqual(
+            self.check_ids(checks.check_persistent_connections),
+            ['core.W001']
+        )
+
+    @override_settings(DATABASES={'default': {'CONN_MAX_AGE': 60}})
+    def test_persistent_connections_ok(self):
+        self.assertEqual(
+            self.check_ids(checks.check_persistent_connections), []
+        )
+
+    @override_settings(DEBUG=True)
+    def test_dev_templates_are_reported(self):
+        """Профиль dev без кэша шаблонов и с debug-процессором."""
+        self.assertEqual(
+            self.check_ids(checks.check_template_caching),
+            ['core.W002', 'core.W003']
+        )
+
+    @override_settings(TEMPLATES=PROD_TEMPLATES)
+    def test_cached_templates_ok(self):
+        self.assertEqual(self.check_ids(checks.check_template_caching), [])
+
+    def test_local_cache_is_reported(self):
+        self.assertEqual(
+            self.check_ids(checks.check_shared_cache), ['core.W004']
+        )
+
+    @override_settings(
+        STATICFILES_STORAGE='django.contrib.staticfiles.storage.'
+                            'ManifestStaticFilesStorage',
+        MIDDLEWARE=[
+            'core.middleware.CompressionMiddleware',
+            checks.CONDITIONAL_GET_MIDDLEWARE,
+        ],
+        DEBUG=False,
+    )
+    def test_prod_static_and_middleware_ok(self):
+        self.assertEqual(self.check_ids(checks.check_static_files), [])
+        self.assertEqual(self.check_ids(checks.check_middleware), [])
+        self.assertEqual(self.check_ids(checks.check_debug), [])
+
+    @override_settings(MIDDLEWARE=[])
+    def test_missing_middleware_is_reported(self):
+        self.assertEqual(
+            self.check_ids(checks.check_middleware),
+            ['core.W006', 'core.W007']
+        )
+
+
+class SQLitePragmasTests(SimpleTestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.temp_dir.name, 'db.sqlite3')
+        connection = self.connect()
+        connection.execute('CREATE TABLE item (value INTEGER)')
+        connection.close()
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def connect(self, pragmas=True, timeout=5):
+        connection = sqlite3.connect(
+            self.db_path, timeout=timeout, isolation_level=None,
+            check_same_thread=False,
+        )
+        if pragmas:
+            apply_sqlite_pragmas(connection.cursor())
+        return connection
+
+    def pragma(self, connection, name):
+        return connection.execute(f'PRAGMA {name}').fetchone()[0]
+
+    def test_pragmas_applied(self):
+        """Соединение получает WAL, synchronous=NORMAL и busy_timeout."""
+        connection = self.connect()
+        self.assertEqual(self.pragma(connection, 'journal_mode'), 'wal')
+        self.assertEqual(self.pragma(connection, 'synchronous'), 1)
+        self.assertEqual(
+            self.pragma(connection, 'busy_timeout'),
+            settings.SQLITE_BUSY_TIMEOUT
+        )
+        self.assertEqual(
+            self.pragma(connection, 'cache_size'), settings.SQLITE_CACHE_SIZE
+        )
+        connection.close()
+
+    def test_rollback_journal_blocks_readers(self):
+        """Без WAL открытая пишущая транзакция блокирует чтение."""
+        writer = self.connect(pragmas=False)
+        writer.execute('PRAGMA journal_mode = DELETE')
+        writer.execute('BEGIN EXCLUSIVE')
+        writer.execute('INSERT INTO item VALUES (1)')
+        reader = self.connect(pragmas=False, timeout=0)
+        with self.assertRaisesMessage(
+                sqlite3.OperationalError, 'database is locked'):
+            reader.execute('SELECT COUNT(*) FROM item').fetchone()
+        writer.execute('COMMIT')
+        reader.close()
+        writer.close()
+
+    def test_wal_readers_not_blocked_by_writer(self):
+        """В WAL читатель видит последнюю зафиксированную версию."""
+        writer = self.connect()
+        writer.execute('BEGIN EXCLUSIVE')
+        writer.execute('INSERT INTO item VALUES (1)')
+        reader = self.connect(timeout=0)
+        self.assertEqual(
+            reader.execute('SELECT COUNT(*) FROM item').fetchone()[0], 0
+        )
+        writer.execute('COMMIT')
+        self.assertEqual(
+            reader.execute('SELECT COUNT(*) FROM item').fetchone()[0], 1
+        )
+        reader.close()
+        writer.close()
+
+    def write_items(self, count, errors):
+        connection = self.connect()
+        try:
+            for value in range(count):
+                connection.execute('BEGIN IMMEDIATE')
+                connection.execute('INSERT INTO item VALUES (?)', (value,))
+                connection.execute('COMMIT')
+        except sqlite3.OperationalError as error:
+            errors.append(error)
+        finally:
+            connection.close()
+
+    def read_items(self, done, errors):
+        connection = self.connect()
+        try:
+            while not done.is_set():
+                connection.execute('SELECT COUNT(*) FROM item').fetchone()
+        except sqlite3.OperationalError as error:
+            errors.append(error)
+        finally:
+            connection.close()
+
+    def test_concurrent_readers_and_writers(self):
+        """Нагрузочный тест: ни одной ошибки database is locked."""
+        writes_per_writer = 100
+        writers_count = 2
+        errors = []
+        done = threading.Event()
+        readers = [
+            threading.Thread(target=self.read_items, args=(done, errors))
+            for _ in range(4)
+        ]
+        writers = [
+            threading.Thread(
+                target=self.write_items, args=(writes_per_writer, errors)
+            )
+            for _ in range(writers_count)
+        ]
+        for thread in readers + writers:
+            thread.start()
+        for thread in writers:
+            thread.join()
+        done.set()
+        for thread in readers:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        connection = self.connect()
+        self.assertEqual(
+            connection.execute('SELECT COUNT(*) FROM item').fetchone()[0],
+            writes_per_writer * writers_count
+        )
+        connection.close()
+
+
+@override_settings(DATABASE_REPLICAS=['replica'])
+class PrimaryReplicaRouterTests(SimpleTestCase):
+    def setUp(self):
+        routers.reset()
+        self.router = routers.PrimaryReplicaRouter()
+        self.factory = RequestFactory()
+
+    def tearDown(self):
+        routers.reset()
+
+    def test_reads_go_to_replica(self):
+        self.assertEqual(self.router.db_for_read(Post), 'replica')
+
+    def test_writes_go_to_primary_and_pin_reads(self):
+        """После записи чтение в том же потоке идёт в основную БД."""
+        self.assertEqual(self.router.db_for_write(Post), 'default')
+        self.assertEqual(self.router.db_for_read(Post), 'default')
+
+    def test_other_apps_are_not_routed(self):
+        user_model = get_user_model()
+        self.assertIsNone(self.router.db_for_read(user_model))
+        self.assertIsNone(self.router.db_for_write(user_model))
+        self.assertFalse(routers.has_written())
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_no_replicas_reads_primary(self):
+        self.assertEqual(self.router.db_for_read(Post), 'default')
+
+    def test_middleware_sets_pin_cookie_after_write(self):
+        def write_view(request):
+            self.router.db_for_write(Post)
+            return HttpResponse()
+
+        response = ReplicaPinningMiddleware(write_view)(
+            self.factory.post('/create/')
+        )
+        self.assertIn(PRIMARY_PIN_COOKIE, response.cookies)
+        self.assertFalse(routers.has_written())
+
+    def test_middleware_pins_reads_while_cookie_is_valid(self):
+        def read_view(request):
+            return HttpResponse(self.router.db_for_read(Post))
+
+        request = self.factory.get('/')
+        request.COOKIES[PRIMARY_PIN_COOKIE] = '9999999999'
+        response = ReplicaPinningMiddleware(read_view)(request)
+        self.assertEqual(response.content, b'default')
+        self.assertNotIn(PRIMARY_PIN_COOKIE, response.cookies)
+
+        request.COOKIES[PRIMARY_PIN_COOKIE] = '1'
+        response = ReplicaPinningMiddleware(read_view)(request)
+        self.assertEqual(response.content, b'replica')
+
+
+@override_settings(DATABASE_REPLICAS=['replica'])
+class ReplicaRoutingIntegrationTests(TransactionTestCase):
+    """Реплика - отдельный файл SQLite, при тестах зеркало default."""
+    databases = {'default', 'replica'}
+
+    def setUp(self):
+        routers.reset()
+        self.user = get_user_model().objects.create_user(username='Noname')
+        self.group = Group.objects.create(
+            title='Тестовая группа', slug='test-slug', description='-'
+        )
+        routers.reset()
+
+    def test_feed_reads_from_replica(self):
+        post = Post.objects.create(author=self.user, text='Пост')
+        routers.reset()
+        fetched = Post.objects.get(pk=post.pk)
+        self.assertEqual(fetched._state.db, 'replica')
+
+    def test_comment_write_accepts_post_read_from_replica(self):
+        """Связь объекта с реплики и новой записи разрешена."""
+        post = Post.objects.create(author=self.user, text='Пост')
+        routers.reset()
+        post = Post.objects.get(pk=post.pk)
+        comment = post.comments.create(author=self.user, text='Комментарий')
+        self.assertEqual(comment._state.db, 'default')
+
+    def test_client_reads_primary_after_write(self):
+        self.client.force_login(self.user)
+        response = self.client.post(
+            '/create/', {'text': 'Новый пост', 'group': self.group.pk}
+        )
+        self.assertIn(PRIMARY_PIN_COOKIE, response.cookies)
+        self.assertIn(PRIMARY_PIN_COOKIE, self.client.cookies)
+
+
+def call_asgi(application, scope, body=b''):
+    """Выполнить ASGI-запрос; возвращает отправленные сообщения."""
+    messages = [{'type': 'http.request', 'body': body}]
+    sent = []
+
+    async def receive():
+        return messages.pop(0)
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(application(scope, receive, send))
+    return sent
+
+
+class ThreadPoolWSGIAdapterTests(SimpleTestCase):
+    def scope(self, path, method='GET', query=b'', headers=()):
+        return {
+            'type': 'http',
+            'method': method,
+            'path': path,
+            'query_string': query,
+            'headers': [(b'host', b'testserver'), *headers],
+            'server': ('testserver', 80),
+            'client': ('127.0.0.1', 5000),
+        }
+
+    def test_build_environ(self):
+        environ = build_environ(
+            self.scope('/profile/Иван/', query=b'page=2', headers=[
+                (b'content-type', b'text/plain'),
+                (b'accept', b'text/html'),
+                (b'accept', b'*/*'),
+            ]),
+            body=None,
+        )
+        self.assertEqual(
+            environ['PATH_INFO'], '/profile/Иван/'.encode().decode('latin1')
+        )
+        self.assertEqual(environ['QUERY_STRING'], 'page=2')
+        self.assertEqual(environ['CONTENT_TYPE'], 'text/plain')
+        self.assertEqual(environ['HTTP_ACCEPT'], 'text/html,*/*')
+        self.assertEqual(environ['REMOTE_ADDR'], '127.0.0.1')
+
+    def test_django_page_through_asgi(self):
+        """Страница Django отдаётся через пул потоков ASGI."""
+        application = ThreadPoolWSGIAdapter(WSGIHandler(), max_workers=2)
+        sent = call_asgi(application, self.scope('/about/author/'))
+        self.assertEqual(sent[0]['type'], 'http.response.start')
+        self.assertEqual(sent[0]['status'], 200)
+        self.assertIn(
+            (b'content-type', b'text/html; charset=utf-8'), sent[0]['headers']
+        )
+        body = b''.join(message.get('body', b'') for message in sent[1:])
+        self.assertIn(b'<html', body)
+        self.assertFalse(sent[-1].get('more_body', False))
+        application.executor.shutdown()
+
+    def test_request_body_and_streaming_response(self):
+        def echo(environ, start_response):
+            response = StreamingHttpResponse(
+                iter([environ['wsgi.input'].read(), b'-end'])
+            )
+            start_response('200 OK', list(response.items()))
+            return response
+
+        application = ThreadPoolWSGIAdapter(echo, max_workers=1)
+        sent = call_asgi(
+            application, self.scope('/', method='POST'), body=b'text'
+        )
+        self.assertEqual(
+            b''.join(message.get('body', b'') for message in sent[1:]),
+            b'text-end'
+        )
+        application.executor.shutdown()
+
+    @override_settings(UPLOAD_MAX_SIZE=10, DATA_UPLOAD_MAX_MEMORY_SIZE=0)
+    def test_too_large_body_rejected_before_view(self):
+        def view(environ, start_response):
+            raise AssertionError('Представление не должно вызываться')
+
+        application = ThreadPoolWSGIAdapter(view, max_workers=1)
+        for headers in ([(b'content-length', b'11')], []):
+            with self.subTest(headers=headers):
+                sent = call_asgi(
+                    application,
+                    self.scope('/create/', method='POST', headers=headers),
+                    body=b'x' * 11,
+                )
+                self.assertEqual(sent[0]['status'], 413)
+        application.executor.shutdown()
+
+
+class EventStreamApplicationTests(SimpleTestCase):
+    def scope(self, query=b'', path='/events/stream/'):
+        return {
+            'type': 'http',
+            'method': 'GET',
+            'path': path,
+            'query_string': query,
+            'headers': [],
+        }
+
+    async def stream(self, bus, query, events, last_body):
+        """Подключиться, опубликовать ``events``, дождаться ``last_body``."""
+        disconnect = asyncio.Event()
+        sent = []
+
+        async def receive():
+            await disconnect.wait()
+            return {'type': 'http.disconnect'}
+
+        async def send(message):
+            sent.append(message)
+            if len(sent) == 2:
+                # Клиент подписан: публикуем из потока, как представление.
+                for topic, event in events:
+                    await asyncio.get_running_loop().run_in_executor(
+                        None, bus.publish, topic, event
+                    )
+            if message.get('body', b'').startswith(last_body):
+                disconnect.set()
+
+        application = EventStreamApplication(bus, heartbeat=0.05)
+        await asyncio.wait_for(
+            application(self.scope(query), receive, send), timeout=5
+        )
+        return sent
+
+    def test_events_are_pushed_to_subscribers(self):
+        bus = EventBus()
+        sent = asyncio.run(self.stream(bus, b'topic=feed&topic=post:1', [
+            ('feed', {'type': 'post', 'id': 7}),
+            ('group:other', {'type': 'post', 'id': 8}),
+            ('post:1', {'type': 'comment', 'id': 9}),
+        ], last_body=b'id: 9'))
+        self.assertEqual(sent[0]['status'], 200)
+        self.assertIn(
+            (b'content-type', b'text/event-stream; charset=utf-8'),
+            sent[0]['headers'],
+        )
+        body = b''.join(message['body'] for message in sent[1:]).decode()
+        self.assertIn('id: 7\nevent: post\n', body)
+        self.assertIn('id: 9\nevent: comment\n', body)
+        self.assertNotIn('id: 8', body)
+        self.assertEqual(bus.subscribers, {})
+
+    def test_idle_connection_gets_heartbeat(self):
+        sent = asyncio.run(
+            self.stream(EventBus(), b'topic=feed', [], last_body=b': ping')
+        )
+        self.assertEqual(sent[-1]['body'], b': ping\n\n')
+
+    def test_invalid_topics_rejected(self):
+        sent = call_asgi(
+            EventStreamApplication(EventBus()), self.scope(b'topic=x:1')
+        )
+        self.assertEqual(sent[0]['status'], 400)
+
+    def test_publish_without_subscribers_is_noop(self):
+        EventBus().publish('feed', {'type': 'post', 'id': 1})
+
+    def test_path_router(self):
+        def application(name):
+            async def respond(scope, receive, send):
+                await send({'type': name})
+            return respond
+
+        router = PathRouter(
+            {'/events/stream/': application('stream')},
+            application('default'),
+        )
+        for path, expected in (
+            ('/events/stream/', 'stream'), ('/', 'default')
+        ):
+            with self.subTest(path=path):
+                sent = call_asgi(
+                    router, self.scope(path=path)
+                )
+                self.assertEqual(sent, [{'type': expected}])
+
+
+class ClientIPTests(SimpleTestCase):
+    def client_ip(self, forwarded=None):
+        headers = {'REMOTE_ADDR': '10.0.0.1'}
+        if forwarded is not None:
+            headers['HTTP_X_FORWARDED_FOR'] = forwarded
+        return get_client_ip(RequestFactory().get('/', **headers))
+
+    def test_remote_addr_without_proxy_header(self):
+        self.assertEqual(self.client_ip('1.2.3.4'), '10.0.0.1')
+
+    @override_settings(CLIENT_IP_HEADER='HTTP_X_FORWARDED_FOR')
+    def test_address_added_by_trusted_proxy(self):
+        cases = (
+            ('5.6.7.8', '5.6.7.8'),
+            # Начало списка присылает клиент: ему не верим.
+            ('1.2.3.4, 5.6.7.8', '5.6.7.8'),
+            (None, '10.0.0.1'),
+        )
+        for forwarded, address in cases:
+            with self.subTest(forwarded=forwarded):
+                self.assertEqual(self.client_ip(forwarded), address)
+        with self.settings(TRUSTED_PROXY_COUNT=2):
+            self.assertEqual(
+                self.client_ip('1.2.3.4, 5.6.7.8, 172.16.0.1'), '5.6.7.8'
+            )
+            self.assertEqual(self.client_ip('5.6.7.8'), '10.0.0.1')
+
+
+class MediaServingTests(SimpleTestCase):
+    content = bytes(range(256)) * 4
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.media_root = tempfile.mkdtemp()
+        os.makedirs(os.path.join(cls.media_root, 'cache', 'ab'))
+        os.makedirs(os.path.join(cls.media_root, 'posts'))
+        os.makedirs(os.path.join(cls.media_root, '.uploads'))
+        for path in ('posts/photo.jpg', 'cache/ab/thumb.jpg',
+                     '.uploads/tmp.upload', 'posts/фото 1.jpg'):
+            with open(os.path.join(cls.media_root, path), 'wb') as file:
+                file.write(cls.content)
+        cls.settings = override_settings(
+            MEDIA_ROOT=cls.media_root, MEDIA_SENDFILE=''
+        )
+        cls.settings.enable()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.settings.disable()
+        shutil.rmtree(cls.media_root)
+        super().tearDownClass()
+
+    def get(self, path, **headers):
+        return self.client.get(f'/media/{path}', **headers)
+
+    def body(self, response):
+        if response.streaming:
+            return b''.join(response.streaming_content)
+        return response.content
+
+    def test_full_file_with_validators(self):
+        response = self.get('posts/photo.jpg')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.body(response), self.content)
+        self.assertEqual(response['Content-Type'], 'image/jpeg')
+        self.assertEqual(response['Content-Length'], str(len(self.content)))
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertTrue(response['ETag'].startswith('"'))
+        self.assertIn('Last-Modified', response)
+        self.assertNotIn('immutable', response['Cache-Control'])
+
+    def test_thumbnails_are_immutable(self):
+        response = self.get('cache/ab/thumb.jpg')
+        self.assertEqual(response['Cache-Control'], IMMUTABLE_CACHE_CONTROL)
+
+    def test_conditional_get(self):
+        etag = self.get('posts/photo.jpg')['ETag']
+        response = self.get('posts/photo.jpg', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+
+    def test_byte_ranges(self):
+        cases = (
+            ('bytes=0-9', 206, self.content[:10], 'bytes 0-9/1024'),
+            ('bytes=1000-', 206, self.content[1000:], 'bytes 1000-1023/1024'),
+            ('bytes=-4', 206, self.content[-4:], 'bytes 1020-1023/1024'),
+            ('bytes=2000-', 416, b'', 'bytes */1024'),
+        )
+        for header, status, body, content_range in cases:
+            with self.subTest(header=header):
+                response = self.get('posts/photo.jpg', HTTP_RANGE=header)
+                self.assertEqual(response.status_code, status)
+                self.assertEqual(response['Content-Range'], content_range)
+                self.assertEqual(self.body(response), body)
+
+    def test_if_range_mismatch_returns_full_file(self):
+        response = self.get(
+            'posts/photo.jpg', HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE='"old"'
+        )
+        self.assertEqual(response.status_code, 200)
+
+    def test_sendfile_offload(self):
+        with override_settings(MEDIA_SENDFILE='x-accel-redirect'):
+            response = self.get('posts/photo.jpg')
+        self.assertEqual(
+            response['X-Accel-Redirect'], '/protected-media/posts/photo.jpg'
+        )
+        self.assertEqual(response.content, b'')
+        with override_settings(MEDIA_SENDFILE='x-sendfile'):
+            response = self.get('posts/photo.jpg')
+        self.assertEqual(
+            response['X-Sendfile'],
+            os.path.join(self.media_root, 'posts', 'photo.jpg'),
+        )
+
+    def test_sendfile_offload_non_ascii_name(self):
+        encoded = '%D1%84%D0%BE%D1%82%D0%BE%201.jpg'
+        with override_settings(MEDIA_SENDFILE='x-accel-redirect'):
+            response = self.get('posts/фото 1.jpg')
+        self.assertEqual(
+            response['X-Accel-Redirect'], f'/protected-media/posts/{encoded}'
+        )
+        with override_settings(MEDIA_SENDFILE='x-sendfile'):
+            response = self.get('posts/фото 1.jpg')
+        self.assertEqual(
+            response['X-Sendfile'],
+            quote(os.path.join(self.media_root, 'posts')) + f'/{encoded}',
+        )
+
+    def test_hidden_and_missing_files_not_served(self):
+        for path in ('.uploads/tmp.upload', 'posts/missing.jpg',
+                     'posts/../../etc/passwd', 'posts'):
+            with self.subTest(path=path):
+                self.assertEqual(self.get(path).status_code, 404)
+
+
+@override_settings(COMPRESSION_MIN_LENGTH=200, HTML_MINIFY=False)
+class CompressionMiddlewareTests(SimpleTestCase):
+    html = '<html>\n  <body>\n' + '    <p>Текст   записи</p>\n' * 50 + (
+        '<pre>  код\n    отступ</pre>\n</body>\n</html>'
+    )
+
+    def setUp(self):
+        self.factory = RequestFactory()
+
+    def process(self, response, encoding='gzip, deflate'):
+        middleware = CompressionMiddleware(lambda request: response)
+        return middleware(self.factory.get('/', HTTP_ACCEPT_ENCODING=encoding))
+
+    def test_gzip(self):
+        response = HttpResponse(self.html)
+        response['ETag'] = '"abc"'
+        response = self.process(response)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['Vary'], 'Accept-Encoding')
+        self.assertEqual(response['ETag'], 'W/"abc"')
+        self.assertEqual(
+            response['Content-Length'], str(len(response.content))
+        )
+        self.assertEqual(
+            gzip.decompress(response.content).decode(), self.html
+        )
+
+    @skipUnless(compression.brotli, 'brotli не установлен')
+    def test_brotli_preferred(self):
+        response = self.process(HttpResponse(self.html), 'gzip, br')
+        self.assertEqual(response['Content-Encoding'], 'br')
+        self.assertEqual(
+            compression.brotli.decompress(response.content).decode(),
+            self.html,
+        )
+
+    def test_not_compressed(self):
+        ranged = HttpResponse(self.html, content_type='image/svg+xml')
+        ranged['Content-Range'] = f'bytes 0-99/{len(self.html)}'
+        cases = (
+            ('short', HttpResponse('<p>коротко</p>'), 'gzip'),
+            ('no accept', HttpResponse(self.html), 'identity'),
+            ('q=0', HttpResponse(self.html), 'gzip;q=0'),
+            ('image', HttpResponse(
+                self.html, content_type='image/jpeg'), 'gzip'),
+            ('events', StreamingHttpResponse(
+                iter([b'data: 1\n\n']), content_type='text/event-stream'
+            ), 'gzip'),
+            ('partial', HttpResponse(
+                self.html, status=HTTPStatus.PARTIAL_CONTENT
+            ), 'gzip'),
+            ('range', ranged, 'gzip'),
+        )
+        for name, response, encoding in cases:
+            with self.subTest(name):
+                response = self.process(response, encoding)
+                self.assertFalse(response.has_header('Content-Encoding'))
+
+    def test_streaming_chunks_flushed(self):
+        chunks = [self.html.encode()[:500], self.html.encode()[500:]]
+        response = StreamingHttpResponse(iter(chunks))
+        response = self.process(response)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertFalse(response.has_header('Content-Length'))
+        parts = list(response.streaming_content)
+        # Первый кусок распаковывается, не дожидаясь конца потока.
+        first = zlib.decompressobj(wbits=31).decompress(parts[0])
+        self.assertEqual(first, chunks[0])
+        self.assertEqual(
+            gzip.decompress(b''.join(parts)).decode(), self.html
+        )
+
+    def test_minify_keeps_preformatted(self):
+        minified = compression.minify_html(self.html)
+        self.assertIn('<pre>  код\n    отступ</pre>', minified)
+        self.assertIn('\n<p>Текст записи</p>\n', minified)
+        self.assertLess(len(minified), len(self.html))
+
+    @override_settings(HTML_MINIFY=True)
+    def test_minify_html_response(self):
+        response = self.process(HttpResponse(self.html), 'identity')
+        self.assertEqual(
+            response.content.decode(), compression.minify_html(self.html)
+        )
+
+
+@override_settings(MIDDLEWARE=[
+    'core.middleware.CompressionMiddleware',
+    *settings.MIDDLEWARE,
+])
+class CompressedPageSizeTests(TestCase):
+    """Байты на проводе для главной страницы с 10 записями."""
+
+    @classmethod
+    def setUpTestData(cls):
+        author = get_user_model().objects.create_user(username='author')
+        group = Group.objects.create(title='Группа', slug='group')
+        Post.objects.bulk_create(
+            Post(author=author, group=group, text=f'Запись номер {number}')
+            for number in range(10)
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def wire_size(self, **headers):
+        cache.clear()
+        response = self.client.get('/', **headers)
+        self.assertEqual(response.status_code, 200)
+        return len(response.content), response
+
+    def test_bytes_on_the_wire(self):
+        raw, _ = self.wire_size()
+        with override_settings(HTML_MINIFY=True):
+            minified, _ = self.wire_size()
+        gzipped, response = self.wire_size(HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertLess(minified, raw)
+        self.assertLess(gzipped, raw / 3)
+        if compression.brotli:
+            brotli_size, response = self.wire_size(HTTP_ACCEPT_ENCODING='br')
+            self.assertEqual(response['Content-Encoding'], 'br')
+            self.assertLess(brotli_size, gzipped)
+
+
+class InMemoryStorageTests(SimpleTestCase):
+    def setUp(self):
+        InMemoryStorage.clear()
+        self.addCleanup(InMemoryStorage.clear)
+
+    def test_save_open_and_list(self):
+        storage = InMemoryStorage()
+        name = storage.save('posts/a.txt', ContentFile(b'content'))
+        self.assertEqual(name, 'posts/a.txt')
+        # Другой экземпляр видит те же файлы.
+        other = InMemoryStorage()
+        self.assertTrue(other.exists(name))
+        with other.open(name) as file:
+            self.assertEqual(file.read(), b'content')
+        self.assertEqual(other.size(name), 7)
+        self.assertEqual(other.url(name), '/media/posts/a.txt')
+        self.assertEqual(other.listdir(''), (['posts'], []))
+        self.assertEqual(other.listdir('posts'), ([], ['a.txt']))
+        self.assertNotEqual(
+            storage.save('posts/a.txt', ContentFile(b'x')), name
+        )
+        storage.delete(name)
+        self.assertFalse(storage.exists(name))
+        with self.assertRaises(FileNotFoundError):
+            storage.open(name)
+
+
+class TokenBucketTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+
+    def consume(self, now, rate='3/m'):
+        return ratelimit.consume('test', 'client', rate, now=now)
+
+    def test_burst_then_refill(self):
+        self.assertEqual([self.consume(100) for _ in range(3)], [0, 0, 0])
+        # Маркер возвращается за 60 / 3 = 20 секунд.
+        self.assertAlmostEqual(self.consume(100), 20)
+        self.assertAlmostEqual(self.consume(110), 10)
+        self.assertEqual(self.consume(120), 0)
+        self.assertGreater(self.consume(120), 0)
+
+    def test_idle_bucket_capped(self):
+        self.consume(100)
+        # Через час корзина полна, но не больше своей ёмкости.
+        self.assertEqual(
+            [self.consume(3700) for _ in range(3)], [0, 0, 0]
+        )
+        self.assertGreater(self.consume(3700), 0)
+
+    def test_rejected_request_not_counted(self):
+        for _ in range(10):
+            self.consume(100, rate='1/m')
+        self.assertEqual(self.consume(160, rate='1/m'), 0)
+
+    def test_decorator_returns_429(self):
+        view = ratelimit.ratelimit('test', rate='1/m', methods=('POST',))(
+            lambda request: HttpResponse('ok')
+        )
+        factory = RequestFactory()
+        for method in ('post', 'get', 'get'):
+            request = getattr(factory, method)('/')
+            request.user = AnonymousUser()
+            self.assertEqual(view(request).status_code, 200)
+        request = factory.post('/')
+        request.user = AnonymousUser()
+        response = view(request)
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response['Retry-After'], '60')
+        # Другой клиент считается отдельно.
+        request = factory.post('/', REMOTE_ADDR='10.0.0.2')
+        request.user = AnonymousUser()
+        self.assertEqual(view(request).status_code, 200)
+
+    @override_settings(RATELIMIT_ENABLED=False)
+    def test_disabled(self):
+        view = ratelimit.ratelimit('test', rate='1/d')(
+            lambda request: HttpResponse('ok')
+        )
+        request = RequestFactory().get('/')
+        for _ in range(3):
+            self.assertEqual(view(request).status_code, 200)
+
+
+@override_settings(RATELIMITS={
+    'write': '5/m', 'post_create': '2/m', 'follow': '2/m',
+})
+class WriteRateLimitTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        User = get_user_model()
+        cls.user = User.objects.create_user(username='writer')
+        cls.author = User.objects.create_user(username='author')
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.user)
+
+    def test_post_create_limited_per_user(self):
+        url = reverse('posts:post_create')
+        for number in range(2):
+            self.client.post(url, {'text': f'Пост {number}'})
+        self.assertEqual(self.client.get(url).status_code, 200)
+        response = self.client.post(url, {'text': 'Ещё пост'})
+        self.assertEqual(response.status_code, 429)
+        self.assertTrue(response.has_header('Retry-After'))
+        self.assertEqual(Post.objects.count(), 2)
+        other = self.client_class()
+        other.force_login(self.author)
+        other.post(url, {'text': 'Пост автора'})
+        self.assertEqual(Post.objects.count(), 3)
+
+    def test_follow_and_unfollow_share_bucket(self):
+        self.client.get(reverse('posts:profile_follow', args=['author']))
+        self.client.get(reverse('posts:profile_unfollow', args=['author']))
+        response = self.client.get(
+            reverse('posts:profile_follow', args=['author'])
+        )
+        self.assertEqual(response.status_code, 429)
+
+    def test_middleware_limits_all_writes(self):
+        url = reverse('posts:follow_bulk')
+        data = {'action': 'follow', 'username': 'author'}
+        for _ in range(5):
+            self.assertEqual(self.client.post(url, data).status_code, 302)
+        self.assertEqual(self.client.post(url, data).status_code, 429)
+        self.assertEqual(self.client.get('/').status_code, 200)
+
+    @override_settings(CLIENT_IP_HEADER='HTTP_X_FORWARDED_FOR')
+    def test_anonymous_clients_behind_proxy_limited_separately(self):
+        self.client.logout()
+        url = reverse('users:signup')
+        for _ in range(5):
+            self.client.post(url, HTTP_X_FORWARDED_FOR='5.6.7.8')
+        response = self.client.post(url, HTTP_X_FORWARDED_FOR='5.6.7.8')
+        self.assertEqual(response.status_code, 429)
+        response = self.client.post(url, HTTP_X_FORWARDED_FOR='5.6.7.9')
+        self.assertEqual(response.status_code, 200)
+
+    def test_forged_posts_keep_tokens(self):
+        """POST без CSRF-токена отклоняется до расхода маркера."""
+        client = self.client_class(enforce_csrf_checks=True)
+        client.force_login(self.user)
+        url = reverse('posts:follow_bulk')
+        data = {'action': 'follow', 'username': 'author'}
+        for _ in range(6):
+            self.assertEqual(client.post(url, data).status_code, 403)
+        self.assertEqual(self.client.post(url, data).status_code, 302)
+
+
+@override_settings(
+    ADMISSION_MAX_IN_FLIGHT=100, ADMISSION_MAX_QUEUE_WAIT_MS=500,
+    ADMISSION_EXPENSIVE_LATENCY_MS=100, ADMISSION_DEEP_PAGE=5,
+    ADMISSION_RETRY_AFTER=7,
+)
+class AdmissionControlTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(username='reader')
+        Post.objects.create(author=cls.user, text='Запись')
+
+    def setUp(self):
+        cache.clear()
+        admission.stats.reset()
+        self.addCleanup(admission.stats.reset)
+
+    def overload(self):
+        return self.settings(ADMISSION_MAX_IN_FLIGHT=1)
+
+    def test_latency_averaged_per_view(self):
+        self.client.get(reverse('about:author'))
+        self.client.get(reverse('about:author'))
+        self.assertIn('about:author', admission.stats.latency)
+        self.assertEqual(admission.stats.in_flight, 0)
+
+    def test_expensive_view_shed_under_overload(self):
+        admission.stats.latency['posts:follow_index'] = 0.5
+        self.client.force_login(self.user)
+        url = reverse('posts:follow_index')
+        self.assertEqual(self.client.get(url).status_code, 200)
+        with self.overload():
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response['Retry-After'], '7')
+
+    def test_cheap_view_and_writes_admitted(self):
+        admission.stats.latency['about:author'] = 0.001
+        admission.stats.latency['posts:post_create'] = 0.5
+        self.client.force_login(self.user)
+        with self.overload():
+            response = self.client.get(reverse('about:author'))
+            self.assertEqual(response.status_code, 200)
+            response = self.client.post(
+                reverse('posts:post_create'), {'text': 'Новая запись'}
+            )
+        self.assertEqual(response.status_code, 302)
+
+    def test_anonymous_gets_stale_index(self):
+        url = reverse('posts:index')
+        fresh = self.client.get(url)
+        admission.stats.latency['posts:index'] = 0.5
+        with self.overload():
+            response = self.client.get(url)
+            deep = self.client.get(url, {'page': 6})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response[admission.DEGRADED_HEADER], 'stale')
+        self.assertEqual(response.content, fresh.content)
+        self.assertEqual(deep.status_code, 503)
+
+    def test_stale_copy_per_group(self):
+        cats = Group.objects.create(title='Кошки', slug='cats')
+        dogs = Group.objects.create(title='Собаки', slug='dogs')
+        cats_url = reverse('posts:group_list', args=(cats.slug,))
+        dogs_url = reverse('posts:group_list', args=(dogs.slug,))
+        fresh = self.client.get(cats_url)
+        admission.stats.latency['posts:group_list'] = 0.5
+        with self.overload():
+            cats_response = self.client.get(cats_url)
+            dogs_response = self.client.get(dogs_url)
+        self.assertEqual(cats_response.content, fresh.content)
+        self.assertEqual(dogs_response.status_code, 503)
+
+    def test_deep_page_of_cheap_view_shed(self):
+        admission.stats.latency['posts:index'] = 0.001
+        url = reverse('posts:index')
+        with self.overload():
+            self.assertEqual(self.client.get(url).status_code, 200)
+            response = self.client.get(url, {'page': 6})
+        self.assertEqual(response.status_code, 503)
+
+    def test_queue_wait_overloads(self):
+        admission.stats.latency['posts:follow_index'] = 0.5
+        self.client.force_login(self.user)
+        response = self.client.get(
+            reverse('posts:follow_index'),
+            **{admission.QUEUED_AT_KEY: time.monotonic() - 1},
+        )
+        self.assertEqual(response.status_code, 503)
+
+
+class PrerenderedPagesTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(username='reader')
+
+    def setUp(self):
+        cache.clear()
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root)
+        settings_override = override_settings(PRERENDER_ROOT=root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def prerender(self):
+        call_command('prerender_pages', stdout=io.StringIO())
+
+    def session_request(self):
+        """Запрос вошедшего пользователя с ленивыми сессией и user."""
+        self.client.force_login(self.user)
+        request = RequestFactory().get('/')
+        request.COOKIES[settings.SESSION_COOKIE_NAME] = (
+            self.client.cookies[settings.SESSION_COOKIE_NAME].value
+        )
+        SessionMiddleware().process_request(request)
+        AuthenticationMiddleware().process_request(request)
+        cache.clear()
+        return request
+
+    def test_about_page_served_from_file(self):
+        self.prerender()
+        url = reverse('about:author')
+        response = self.client.get(url)
+        self.assertTemplateNotUsed(response, 'about/author.html')
+        self.assertContains(response, 'Привет, я автор')
+        self.assertContains(response, reverse('users:login'))
+        self.assertNotContains(response, prerender.AUTH_MARKER)
+        self.assertEqual(response['Cache-Control'], 'max-age=86400')
+        self.assertEqual(response['Vary'], 'Cookie')
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_auth_links_rendered_per_user(self):
+        self.prerender()
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('about:tech'))
+        self.assertContains(response, 'Пользователь: reader')
+        self.assertNotContains(response, reverse('users:login'))
+        self.assertEqual(
+            response['Cache-Control'], 'private, max-age=86400'
+        )
+
+    def test_without_files_pages_rendered(self):
+        response = self.client.get(reverse('about:author'))
+        self.assertTemplateUsed(response, 'about/author.html')
+        self.assertFalse(response.has_header('Cache-Control'))
+
+    def test_not_found_path_escaped(self):
+        self.prerender()
+        response = self.client.get('/missing/<b>/')
+        self.assertContains(
+            response, '/missing/&lt;b&gt;/', status_code=404
+        )
+        self.assertTemplateNotUsed(response, 'core/404.html')
+
+    def test_server_error_never_queries_database(self):
+        for prerendered in (False, True):
+            if prerendered:
+                self.prerender()
+            with self.subTest(prerendered=prerendered):
+                request = self.session_request()
+                with self.assertNumQueries(0):
+                    response = server_error(request)
+                self.assertEqual(response.status_code, 500)
+                self.assertContains(
+                    response, 'Сервер растерялся', status_code=500
+                )
+                self.assertNotContains(
+                    response, prerender.AUTH_MARKER, status_code=500
+                )
@@ -0,0 +1,122 @@
+"""Потоковая загрузка картинок.
+
+Обработчик пишет тело файла сразу во временный файл рядом с
+``MEDIA_ROOT``: при сохранении модели хранилище переносит его
+переименованием, без второго копирования. По ходу чтения считается
+SHA-256, по первым байтам проверяется формат картинки, а размер
+ограничивается ``UPLOAD_MAX_SIZE`` до того, как прочитано всё тело.
+
+Ошибка загрузки сохраняется в ``request.upload_error``, форма
+показывает её у поля картинки.
+"""
+import hashlib
+import os
+import tempfile
+
+from django.conf import settings
+from django.core.files.uploadedfile import TemporaryUploadedFile
+from django.core.files.uploadhandler import (
+    FileUploadHandler, SkipFile, StopUpload
+)
+from django.template.defaultfilters import filesizeformat
+
+# Первые байты поддерживаемых форматов картинок.
+IMAGE_SIGNATURES = (
+    b'\xff\xd8\xff',
+    b'\x89PNG\r\n\x1a\n',
+    b'GIF87a',
+    b'GIF89a',
+)
+WEBP_SIGNATURE = (b'RIFF', b'WEBP')
+# Сколько первых байт нужно для проверки формата.
+HEADER_SIZE = 12
+FORMAT_ERROR = 'Загрузите картинку в формате JPEG, PNG, GIF или WebP.'
+
+
+def is_image_header(header):
+    if header.startswith(IMAGE_SIGNATURES):
+        return True
+    return (
+        header[:4] == WEBP_SIGNATURE[0] and header[8:12] == WEBP_SIGNATURE[1]
+    )
+
+
+def get_upload_temp_dir():
+    """Каталог временных файлов на той же файловой системе, что медиа."""
+    path = settings.UPLOAD_TEMP_DIR or os.path.join(
+        settings.MEDIA_ROOT, '.uploads'
+    )
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+class StreamedUploadedFile(TemporaryUploadedFile):
+    """Загруженный файл во временном каталоге рядом с медиа."""
+
+    def __init__(self, name, content_type, size, charset,
+                 content_type_extra=None):
+        _, ext = os.path.splitext(name)
+        file = tempfile.NamedTemporaryFile(
+            suffix='.upload' + ext, dir=get_upload_temp_dir()
+        )
+        super(TemporaryUploadedFile, self).__init__(
+            file, name, content_type, size, charset, content_type_extra
+        )
+        self.sha256 = None
+
+
+class StreamingUploadHandler(FileUploadHandler):
+    def handle_raw_input(self, input_data, META, content_length, boundary,
+                         encoding=None):
+        # Запас на текстовые поля формы.
+        limit = (
+            settings.UPLOAD_MAX_SIZE
+            + (settings.DATA_UPLOAD_MAX_MEMORY_SIZE or 0)
+        )
+        self.too_large = content_length > limit
+
+    def reject(self, message):
+        self.request.upload_error = message
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        if self.too_large:
+            # Тело заведомо больше лимита: дальше его не читаем.
+            self.reject(self.size_error())
+            raise StopUpload(connection_reset=True)
+        self.file = StreamedUploadedFile(
+            self.file_name, self.content_type, 0, self.charset,
+            self.content_type_extra,
+        )
+        self.hash = hashlib.sha256()
+        self.header = b''
+        self.size = 0
+
+    def size_error(self):
+        return f'Файл больше {filesizeformat(settings.UPLOAD_MAX_SIZE)}.'
+
+    def receive_data_chunk(self, raw_data, start):
+        self.size += len(raw_data)
+        if self.size > settings.UPLOAD_MAX_SIZE:
+            self.file.close()
+            self.reject(self.size_error())
+            raise StopUpload(connection_reset=True)
+        if len(self.header) < HEADER_SIZE:
+            self.header += raw_data[:HEADER_SIZE]
+            if (len(self.header) >= HEADER_SIZE
+                    and not is_image_header(self.header)):
+                self.file.close()
+                self.reject(FORMAT_ERROR)
+                raise SkipFile()
+        self.hash.update(raw_data)
+        self.file.write(raw_data)
+
+    def file_complete(self, file_size):
+        if not is_image_header(self.header):
+            self.file.close()
+            self.reject(FORMAT_ERROR)
+            return None
+        self.file.seek(0)
+        self.file.size = file_size
+        self.file.sha256 = self.hash.hexdigest()
+        return self.file
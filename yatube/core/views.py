@@ -1,13 +1,54 @@
+from django.http import HttpResponse
 from django.shortcuts import render
+from django.template.loader import render_to_string
+
+from . import prerender
+from .context_processors.year import year
 
 
 def page_not_found(request, exception):
+    response = prerender.serve(
+        '404.html', request.user, path=request.path, status=404
+    )
+    if response is not None:
+        return response
     return render(request, 'core/404.html', {'path': request.path}, status=404)
 
 
 def csrf_failure(request, reason=''):
-    return render(request, 'core/403csrf.html')
+    response = prerender.serve('403csrf.html', request.user, status=403)
+    if response is not None:
+        return response
+    return render(request, 'core/403csrf.html', status=403)
 
 
 def server_error(request):
-    return render(request, "core/500.html", status=500)
+    """Страница 500 не обращается к БД: ни к сессии, ни к пользователю.
+
+    Она должна открываться и тогда, когда ошибка - недоступная БД.
+    """
+    response = prerender.serve('500.html', status=500)
+    if response is not None:
+        return response
+    return HttpResponse(
+        render_to_string('core/500.html', year(None)), status=500
+    )
+
+
+def too_many_requests(request, retry_after):
+    # Без контекст-процессоров: отказ должен стоить дешевле запроса.
+    response = HttpResponse(
+        render_to_string('core/429.html', {'retry_after': retry_after}),
+        status=429,
+    )
+    response['Retry-After'] = retry_after
+    return response
+
+
+def service_unavailable(request, retry_after):
+    response = HttpResponse(
+        render_to_string('core/503.html', {'retry_after': retry_after}),
+        status=503,
+    )
+    response['Retry-After'] = retry_after
+    return response
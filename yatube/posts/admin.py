@@ -1,18 +1,233 @@
-from django.contrib import admin
+from django import forms
+from django.contrib import admin, messages
+from django.contrib.admin.helpers import ActionForm
+from django.contrib.admin.options import IncorrectLookupParameters
+from django.contrib.admin.views.main import ORDER_VAR, PAGE_VAR, ChangeList
+from django.core.exceptions import ValidationError
+from django.db.models import Q
 
+from . import constants, moderation
 from .models import Post, Group, Comment, Follow
+from .utils import CachedCountPaginator, decode_cursor, encode_cursor
+
+CURSOR_VAR = 'cursor'
+
+
+class CursorFilter(admin.SimpleListFilter):
+    """Посты старше курсора: переход к следующим без OFFSET.
+
+    Вариантов у фильтра нет, в боковой панели он ничего не выводит.
+    """
+    title = 'Курсор'
+    parameter_name = CURSOR_VAR
+    template = 'admin/posts/cursor_filter.html'
+
+    def lookups(self, request, model_admin):
+        return ()
+
+    def has_output(self):
+        # Фильтр без вывода админка не применяет.
+        return True
+
+    def queryset(self, request, queryset):
+        if not self.value():
+            return queryset
+        try:
+            created, pk = decode_cursor(self.value())
+        except ValueError as error:
+            raise IncorrectLookupParameters(error)
+        return queryset.filter(
+            Q(created__lt=created) | Q(created=created, pk__lt=pk)
+        )
+
+
+class KeysetChangeList(ChangeList):
+    """Список постов с переходом «Следующие» по курсору.
+
+    Страница по курсору выбирается по индексу (created, id) без OFFSET
+    и без подсчёта строк, поэтому глубокие страницы открываются так же
+    быстро, как первая.
+    """
+
+    def get_results(self, request):
+        if CURSOR_VAR in self.params:
+            self.get_cursor_results(request)
+        else:
+            super().get_results(request)
+        self.next_url = None
+        # Курсор задаёт порядок (created, id): при другой сортировке
+        # переход по нему пропустил бы строки.
+        if ORDER_VAR in self.params or self.show_all:
+            return
+        result_list = self.result_list
+        if len(result_list) == self.list_per_page:
+            last = result_list[len(result_list) - 1]
+            self.next_url = self.get_query_string(
+                {CURSOR_VAR: encode_cursor(last)}, [PAGE_VAR]
+            )
+
+    def get_cursor_results(self, request):
+        self.result_list = self.queryset[:self.list_per_page]
+        self.result_count = len(self.result_list)
+        self.full_result_count = None
+        self.show_full_result_count = False
+        self.show_admin_actions = True
+        self.can_show_all = False
+        self.multi_page = False
+        self.paginator = self.model_admin.get_paginator(
+            request, self.result_list, self.list_per_page
+        )
+
+
+class PostActionForm(ActionForm):
+    group = forms.ModelChoiceField(
+        Group.objects.all(), required=False, label='Группа'
+    )
+
+
+class BulkActionsMixin:
+    """Массовые действия пачками (posts.moderation) вместо удаления
+    по одному объекту со страницей подтверждения."""
+
+    def get_actions(self, request):
+        actions = super().get_actions(request)
+        actions.pop('delete_selected', None)
+        return actions
+
+    def get_authors(self, queryset):
+        """id авторов выбранных строк: список, а не подзапрос, который
+        опустел бы после удаления первой пачки."""
+        return list(
+            queryset.order_by().values_list('author', flat=True).distinct()
+        )
+
+    def run_bulk(self, request, operation, queryset, message, **kwargs):
+        batches = []
+        done = operation(queryset, progress=batches.append, **kwargs)
+        progress = ', '.join(str(count) for count in batches)
+        self.message_user(
+            request, f'{message}: {done} (по пачкам: {progress or 0}).'
+        )
 
 
 @admin.register(Post)
-class PostAdmin(admin.ModelAdmin):
+class PostAdmin(BulkActionsMixin, admin.ModelAdmin):
     """Настроить интерфейс администратора"""
     list_display = ('pk', 'text', 'created', 'author', 'group', )
+    list_select_related = ('author', 'group')
     search_fields = ('text',)
-    list_filter = ('created',)
+    list_filter = ('created', CursorFilter)
+    date_hierarchy = 'created'
+    autocomplete_fields = ('author', 'group')
     empty_value_display = '-пусто-'
-    list_editable = ('group',)
+    # Число постов без фильтров оценивается, а не считается COUNT(*).
+    show_full_result_count = False
+    action_form = PostActionForm
+    actions = (
+        'move_to_group', 'remove_from_group', 'delete_posts',
+        'delete_author_posts',
+    )
+
+    def get_changelist(self, request, **kwargs):
+        return KeysetChangeList
+
+    def get_paginator(self, request, queryset, per_page, orphans=0,
+                      allow_empty_first_page=True):
+        return CachedCountPaginator(
+            queryset,
+            per_page,
+            orphans=orphans,
+            allow_empty_first_page=allow_empty_first_page,
+            count_timeout=constants.PAGE_COUNT_CACHE_TIMEOUT,
+            approximate_threshold=constants.APPROXIMATE_COUNT_THRESHOLD,
+        )
+
+    def move_to_group(self, request, queryset):
+        try:
+            group = self.action_form.base_fields['group'].clean(
+                request.POST.get('group')
+            )
+        except ValidationError:
+            group = None
+        if group is None:
+            self.message_user(
+                request, 'Выберите группу.', level=messages.WARNING
+            )
+            return
+        self.run_bulk(
+            request, moderation.move_posts, queryset,
+            f'Перенесено в группу «{group}»', group=group,
+        )
+    move_to_group.short_description = 'Перенести в выбранную группу'
+
+    def remove_from_group(self, request, queryset):
+        self.run_bulk(
+            request, moderation.move_posts, queryset,
+            'Убрано из групп', group=None,
+        )
+    remove_from_group.short_description = 'Убрать из группы'
+
+    def delete_posts(self, request, queryset):
+        self.run_bulk(
+            request, moderation.delete_posts, queryset, 'Удалено постов'
+        )
+    delete_posts.short_description = 'Удалить выбранные посты'
+
+    def delete_author_posts(self, request, queryset):
+        self.run_bulk(
+            request, moderation.delete_posts,
+            Post.objects.filter(author__in=self.get_authors(queryset)),
+            'Удалено постов авторов',
+        )
+    delete_author_posts.short_description = 'Удалить все посты их авторов'
+
+
+@admin.register(Group)
+class GroupAdmin(admin.ModelAdmin):
+    list_display = ('pk', 'title', 'slug')
+    search_fields = ('title', 'slug')
+    ordering = ('title',)
+
+
+@admin.register(Comment)
+class CommentAdmin(BulkActionsMixin, admin.ModelAdmin):
+    list_display = ('pk', 'text', 'created', 'author', 'post')
+    list_select_related = ('author', 'post')
+    search_fields = ('text',)
+    autocomplete_fields = ('author', 'post')
+    show_full_result_count = False
+    actions = ('delete_comments', 'delete_author_comments')
+
+    def delete_comments(self, request, queryset):
+        self.run_bulk(
+            request, moderation.delete_comments, queryset,
+            'Удалено комментариев',
+        )
+    delete_comments.short_description = 'Удалить выбранные комментарии'
+
+    def delete_author_comments(self, request, queryset):
+        self.run_bulk(
+            request, moderation.delete_comments,
+            Comment.objects.filter(author__in=self.get_authors(queryset)),
+            'Удалено комментариев авторов',
+        )
+    delete_author_comments.short_description = (
+        'Удалить все комментарии их авторов'
+    )
+
 
+@admin.register(Follow)
+class FollowAdmin(BulkActionsMixin, admin.ModelAdmin):
+    list_display = ('pk', 'user', 'author')
+    list_select_related = ('user', 'author')
+    search_fields = ('user__username', 'author__username')
+    autocomplete_fields = ('user', 'author')
+    show_full_result_count = False
+    actions = ('delete_follows',)
 
-admin.site.register(Group)
-admin.site.register(Comment)
-admin.site.register(Follow)
+    def delete_follows(self, request, queryset):
+        self.run_bulk(
+            request, moderation.delete_follows, queryset,
+            'Удалено подписок',
+        )
+    delete_follows.short_description = 'Удалить выбранные подписки'
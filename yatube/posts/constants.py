@@ -1,5 +1,46 @@
 """This module defines project-level constants."""
 PAGE_POSTS_NUMBER = 10
+# сколько секунд хранится в кэше число постов для пагинатора
+PAGE_COUNT_CACHE_TIMEOUT = 30
+# с какого размера таблицы число постов оценивается, а не считается
+APPROXIMATE_COUNT_THRESHOLD = 100_000
+
+# сколько авторов можно подписать или отписать одним запросом
+FOLLOW_BULK_LIMIT = 100
+# сколько рекомендаций подписок хранится для пользователя
+FOLLOW_SUGGESTIONS_NUMBER = 5
+# сколько пользователей обрабатывается за один проход расчёта рекомендаций
+FOLLOW_SUGGESTIONS_BATCH_SIZE = 1000
+# сколько секунд рекомендации хранятся в кэше
+FOLLOW_SUGGESTIONS_CACHE_TIMEOUT = 60 * 60
+# до скольких авторов лента подписок фильтруется списком id из графа
+# подписок, а не соединением с таблицей подписок
+FOLLOWED_AUTHORS_IN_LIMIT = 1000
+# сколько секунд подписки пользователя и число подписчиков автора хранятся
+# в кэше; после подписки или отписки они сбрасываются сразу
+FOLLOW_GRAPH_CACHE_TIMEOUT = 24 * 60 * 60
+# сколько самых активных авторов показывать в каталоге групп
+GROUP_TOP_AUTHORS_NUMBER = 3
+# рейтинг популярных постов: за сколько дней учитываются посты и комментарии
+RANKING_WINDOW_DAYS = 7
+# вес комментария и логарифма числа подписчиков автора в рейтинге
+RANKING_COMMENT_WEIGHT = 1.0
+RANKING_FOLLOWER_WEIGHT = 0.5
+# скорость затухания рейтинга со временем (степень возраста в часах)
+RANKING_GRAVITY = 1.8
+# сколько постов оценивается за один проход
+RANKING_BATCH_SIZE = 1000
+# сколько строк обновляется или удаляется одним запросом массовой модерации
+MODERATION_BATCH_SIZE = 1000
+# сколько постов в лентах RSS и Atom и длина заголовка записи в ленте
+FEED_ITEMS_NUMBER = 20
+FEED_TITLE_LENGTH = 60
+# сколько секунд хранятся готовые ленты и части карты сайта; они и так
+# перестраиваются после изменения постов
+FEED_CACHE_TIMEOUT = 24 * 60 * 60
+SITEMAP_CACHE_TIMEOUT = 24 * 60 * 60
+# сколько адресов в одной странице карты сайта: предел протокола sitemaps
+SITEMAP_MAX_URLS = 50_000
 
 # константы для тестирования
 NUMBER_OF_TEST_POSTS = 13
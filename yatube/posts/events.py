@@ -0,0 +1,124 @@
+"""События о новых постах и комментариях для живого обновления лент.
+
+Темы: ``feed`` - все посты, ``group:<slug>``, ``author:<username>``,
+``post:<id>`` - комментарии к посту. Те же события отдаёт опрос
+``posts:events`` для клиентов без Server-Sent Events.
+"""
+import operator
+from functools import reduce
+
+from django.db import transaction
+from django.db.models import Max, Q
+from django.urls import reverse
+from django.utils.text import Truncator
+
+from core.events import MAX_TOPICS, TOPIC_RE, bus
+from .models import Comment, Post
+
+EVENT_KINDS = ('post', 'comment')
+EVENT_TEXT_LENGTH = 200
+POLL_LIMIT = 20
+
+
+def post_event(post):
+    return {
+        'type': 'post',
+        'id': post.pk,
+        'author': post.author.username,
+        'group': post.group.slug if post.group else None,
+        'text': Truncator(post.text).chars(EVENT_TEXT_LENGTH),
+        'url': reverse('posts:post_detail', args=(post.pk,)),
+    }
+
+
+def comment_event(comment):
+    return {
+        'type': 'comment',
+        'id': comment.pk,
+        'post': comment.post_id,
+        'author': comment.author.username,
+        'text': Truncator(comment.text).chars(EVENT_TEXT_LENGTH),
+        'url': reverse('posts:post_detail', args=(comment.post_id,)),
+    }
+
+
+def post_topics(post):
+    topics = ['feed', f'author:{post.author.username}']
+    if post.group:
+        topics.append(f'group:{post.group.slug}')
+    return topics
+
+
+def publish(topics, event):
+    """Разослать событие после фиксации транзакции."""
+    def send():
+        for topic in topics:
+            bus.publish(topic, event)
+
+    transaction.on_commit(send)
+
+
+def publish_post(post):
+    publish(post_topics(post), post_event(post))
+
+
+def publish_comment(comment):
+    publish([f'post:{comment.post_id}'], comment_event(comment))
+
+
+def parse_topics(topics):
+    """Фильтр постов (None - посты не нужны) и id постов для комментариев."""
+    topics = set(topics)
+    if (not topics or len(topics) > MAX_TOPICS
+            or not all(TOPIC_RE.match(topic) for topic in topics)):
+        raise ValueError('Неверный список тем')
+    post_filters = []
+    comment_posts = []
+    for topic in topics:
+        kind, _, value = topic.partition(':')
+        if kind == 'feed':
+            continue
+        elif kind == 'group':
+            post_filters.append(Q(group__slug=value))
+        elif kind == 'author':
+            post_filters.append(Q(author__username=value))
+        elif value.isdigit():
+            comment_posts.append(int(value))
+    if 'feed' in topics:
+        return Q(), comment_posts
+    if not post_filters:
+        return None, comment_posts
+    return reduce(operator.or_, post_filters), comment_posts
+
+
+def poll_events(topics, after=None):
+    """События новее курсора и новый курсор.
+
+    Курсор - словарь ``{'post': id, 'comment': id}``: у постов и
+    комментариев свои последовательности id, и общий курсор пропускал
+    бы события того типа, у которого id меньше. Без ``after`` клиент
+    только получает курсор: последние id по темам.
+    """
+    post_filter, comment_posts = parse_topics(topics)
+    posts = Post.objects.none()
+    if post_filter is not None:
+        posts = Post.objects.filter(post_filter)
+    comments = Comment.objects.filter(post_id__in=comment_posts)
+    if after is None:
+        return [], {
+            'post': posts.aggregate(last=Max('pk'))['last'] or 0,
+            'comment': comments.aggregate(last=Max('pk'))['last'] or 0,
+        }
+    events = [
+        post_event(post) for post in posts.filter(pk__gt=after['post'])
+        .select_related('author', 'group').order_by('pk')[:POLL_LIMIT]
+    ]
+    events += [
+        comment_event(comment)
+        for comment in comments.filter(pk__gt=after['comment'])
+        .select_related('author').order_by('pk')[:POLL_LIMIT]
+    ]
+    last = dict(after)
+    for event in events:
+        last[event['type']] = max(last[event['type']], event['id'])
+    return events, last
@@ -0,0 +1,139 @@
+"""Ленты RSS и Atom: весь сайт, группа и автор.
+
+В ленте последние ``FEED_ITEMS_NUMBER`` постов - одна выборка по
+индексу ``post_created_idx``. Готовый XML кэшируется до следующего
+изменения постов (поколение счётчиков из ``posts.utils``), а запрос с
+совпадающим ``If-None-Match`` получает 304 без обращения к БД.
+"""
+import hashlib
+
+from django.contrib.syndication.views import Feed
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.utils.cache import get_conditional_response
+from django.utils.feedgenerator import Atom1Feed
+from django.utils.text import Truncator
+
+from . import constants
+from .models import Group, Post, User
+from .utils import get_counts_version
+
+
+class LatestPostsFeed(Feed):
+    def title(self, obj):
+        return 'Yatube: последние записи'
+
+    def link(self, obj):
+        return reverse('posts:index')
+
+    def description(self, obj):
+        return 'Новые записи всех авторов'
+
+    def posts(self, obj):
+        return Post.objects.all()
+
+    def items(self, obj):
+        return self.posts(obj).select_related(
+            'author', 'group'
+        ).order_by('-created', '-pk')[:constants.FEED_ITEMS_NUMBER]
+
+    def item_title(self, post):
+        return Truncator(post.text).chars(constants.FEED_TITLE_LENGTH)
+
+    def item_description(self, post):
+        return post.text
+
+    def item_link(self, post):
+        return reverse('posts:post_detail', args=(post.pk,))
+
+    def item_pubdate(self, post):
+        return post.created
+
+    def item_author_name(self, post):
+        return post.author.get_full_name() or post.author.username
+
+    def item_categories(self, post):
+        return [post.group.title] if post.group else []
+
+
+class GroupPostsFeed(LatestPostsFeed):
+    def get_object(self, request, slug):
+        return get_object_or_404(Group, slug=slug)
+
+    def title(self, group):
+        return f'Yatube: {group.title}'
+
+    def link(self, group):
+        return reverse('posts:group_list', args=(group.slug,))
+
+    def description(self, group):
+        return group.description
+
+    def posts(self, group):
+        return group.posts.all()
+
+
+class AuthorPostsFeed(LatestPostsFeed):
+    def get_object(self, request, username):
+        return get_object_or_404(User, username=username)
+
+    def title(self, author):
+        return f'Yatube: записи {author.get_full_name() or author.username}'
+
+    def link(self, author):
+        return reverse('posts:profile', args=(author.username,))
+
+    def description(self, author):
+        return f'Новые записи пользователя {author.username}'
+
+    def posts(self, author):
+        return author.posts.all()
+
+
+class AtomFeedMixin:
+    feed_type = Atom1Feed
+
+    def subtitle(self, obj):
+        return self.description(obj)
+
+
+class LatestPostsAtomFeed(AtomFeedMixin, LatestPostsFeed):
+    pass
+
+
+class GroupPostsAtomFeed(AtomFeedMixin, GroupPostsFeed):
+    pass
+
+
+class AuthorPostsAtomFeed(AtomFeedMixin, AuthorPostsFeed):
+    pass
+
+
+def cached_feed(feed_class):
+    """Представление ленты с кэшем до изменения постов и ETag."""
+    feed = feed_class()
+
+    def view(request, *args, **kwargs):
+        source = (
+            f'{feed_class.__name__}:{request.get_host()}:'
+            f'{args}:{sorted(kwargs.items())}'
+        )
+        key = 'posts:feed:{}:{}'.format(
+            hashlib.md5(source.encode()).hexdigest(), get_counts_version()
+        )
+        cached = cache.get(key)
+        if cached is None:
+            response = feed(request, *args, **kwargs)
+            etag = '"{}"'.format(hashlib.md5(response.content).hexdigest())
+            cached = (response.content, response['Content-Type'], etag)
+            cache.set(key, cached, constants.FEED_CACHE_TIMEOUT)
+        content, content_type, etag = cached
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = HttpResponse(content, content_type=content_type)
+        response['ETag'] = etag
+        return response
+
+    return view
@@ -0,0 +1,182 @@
+"""Граф подписок по пользователям в общем кэше.
+
+Для каждого пользователя хранится отсортированный массив id авторов
+(``array('i')``, 4 байта на подписку), для каждого автора - число
+подписчиков. Они загружаются из БД при первом обращении к этому
+пользователю, по одному запросу на пользователя, и хранятся каждый под
+своим ключом. Подписка или отписка сбрасывает ключи только двух своих
+пользователей: сигналы ``Follow`` и массовые операции из
+``posts.follows`` и ``posts.moderation`` вызывают ``invalidate``.
+
+Внутри транзакции в БД могут быть незафиксированные подписки, поэтому
+там строки пользователя читаются запросом и в кэш не попадают.
+"""
+import sys
+from array import array
+from bisect import bisect_left
+from collections import Counter
+
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.models import Count
+
+from . import constants
+from .models import Follow
+
+
+class FollowGraph:
+    """Граф целиком: для оценки памяти командой ``follow_graph_stats``."""
+
+    def __init__(self, edges=()):
+        """``edges`` - пары (user_id, author_id), упорядоченные по парам."""
+        self.following = {}
+        self.followers = Counter()
+        user_id = None
+        authors = None
+        for follower_id, author_id in edges:
+            if follower_id != user_id:
+                user_id = follower_id
+                authors = self.following[user_id] = array('i')
+            elif authors[-1] == author_id:
+                # Подписка без ограничения уникальности могла задвоиться.
+                continue
+            authors.append(author_id)
+            self.followers[author_id] += 1
+
+    def is_following(self, user_id, author_id):
+        return contains(self.following.get(user_id, ()), author_id)
+
+    def followed_authors(self, user_id):
+        return self.following.get(user_id, array('i'))
+
+    def following_count(self, user_id):
+        return len(self.following.get(user_id, ()))
+
+    def follower_count(self, author_id):
+        return self.followers.get(author_id, 0)
+
+    def edges_count(self):
+        return sum(len(authors) for authors in self.following.values())
+
+    def memory_usage(self):
+        """Примерный объём графа в байтах."""
+        following = sys.getsizeof(self.following) + sum(
+            sys.getsizeof(user_id) + sys.getsizeof(authors)
+            for user_id, authors in self.following.items()
+        )
+        followers = sys.getsizeof(self.followers) + sum(
+            sys.getsizeof(author_id) + sys.getsizeof(count)
+            for author_id, count in self.followers.items()
+        )
+        return following + followers
+
+
+def contains(authors, author_id):
+    index = bisect_left(authors, author_id)
+    return index < len(authors) and authors[index] == author_id
+
+
+def follows():
+    """Подписки из основной БД: на реплике может не быть свежих.
+
+    Не ``router.db_for_write``: тот считает чтение записью и закрепляет
+    клиента за основной БД.
+    """
+    return Follow.objects.using(DEFAULT_DB_ALIAS)
+
+
+def load_graph():
+    """Весь граф одной выборкой."""
+    return FollowGraph(
+        follows().order_by('user_id', 'author_id')
+        .values_list('user_id', 'author_id')
+        .iterator()
+    )
+
+
+def following_key(user_id):
+    return f'follow_graph:following:{user_id}'
+
+
+def followers_key(author_id):
+    return f'follow_graph:followers:{author_id}'
+
+
+def in_transaction():
+    return transaction.get_connection(DEFAULT_DB_ALIAS).in_atomic_block
+
+
+def load_following(user_id):
+    return array('i', follows().filter(user_id=user_id).order_by(
+        'author_id'
+    ).values_list('author_id', flat=True))
+
+
+def load_follower_counts(author_ids):
+    counts = dict.fromkeys(author_ids, 0)
+    counts.update(
+        follows().filter(author_id__in=author_ids).order_by()
+        .values_list('author_id').annotate(count=Count('pk'))
+    )
+    return counts
+
+
+def followed_authors(user_id):
+    """Отсортированный массив id авторов, на которых подписан user_id."""
+    if in_transaction():
+        return load_following(user_id)
+    key = following_key(user_id)
+    authors = cache.get(key)
+    if authors is None:
+        authors = load_following(user_id)
+        cache.set(key, authors, constants.FOLLOW_GRAPH_CACHE_TIMEOUT)
+    return authors
+
+
+def follower_counts(author_ids):
+    """Число подписчиков каждого автора; недостающие - одним запросом."""
+    author_ids = set(author_ids)
+    if in_transaction():
+        return load_follower_counts(author_ids)
+    keys = {followers_key(author_id): author_id for author_id in author_ids}
+    counts = {
+        keys[key]: count for key, count in cache.get_many(list(keys)).items()
+    }
+    missing = author_ids - counts.keys()
+    if missing:
+        loaded = load_follower_counts(missing)
+        cache.set_many(
+            {followers_key(author_id): count
+             for author_id, count in loaded.items()},
+            constants.FOLLOW_GRAPH_CACHE_TIMEOUT,
+        )
+        counts.update(loaded)
+    return counts
+
+
+def invalidate(user_ids=(), author_ids=()):
+    """Перечитать подписки пользователей и подписчиков авторов."""
+    keys = [following_key(user_id) for user_id in set(user_ids)] + [
+        followers_key(author_id) for author_id in set(author_ids)
+    ]
+    if not keys:
+        return
+
+    def delete():
+        cache.delete_many(keys)
+
+    delete()
+    # Процесс, прочитавший подписки до фиксации, прочитает их ещё раз.
+    transaction.on_commit(delete)
+
+
+def is_following(user_id, author_id):
+    return contains(followed_authors(user_id), author_id)
+
+
+def following_count(user_id):
+    return len(followed_authors(user_id))
+
+
+def follower_count(author_id):
+    return follower_counts([author_id])[author_id]
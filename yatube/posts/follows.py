@@ -0,0 +1,143 @@
+"""Массовые подписки и рекомендации «на кого подписаться».
+
+Рекомендации - друзья друзей: авторы, на которых подписаны авторы
+пользователя, по числу таких общих подписок. Они рассчитываются
+командой ``compute_follow_suggestions`` пачками пользователей: одна
+агрегирующая выборка на пачку вместо запросов на каждого.
+"""
+from collections import defaultdict
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count
+
+from . import constants, follow_graph
+from .models import Follow, FollowSuggestion, User
+from .utils import invalidate_counts
+
+SUGGESTIONS_VERSION_KEY = 'follow_suggestions_version'
+
+
+def get_authors(user, usernames):
+    """id авторов по именам, кроме самого пользователя."""
+    return list(
+        User.objects.filter(username__in=usernames)
+        .exclude(pk=user.pk).values_list('pk', flat=True)
+    )
+
+
+@transaction.atomic
+def follow_authors(user, usernames):
+    """Подписать пользователя на авторов; возвращает число новых подписок."""
+    author_ids = get_authors(user, usernames)
+    existing = set(Follow.objects.filter(
+        user=user, author_id__in=author_ids
+    ).values_list('author_id', flat=True))
+    created = Follow.objects.bulk_create(
+        Follow(user=user, author_id=author_id)
+        for author_id in author_ids if author_id not in existing
+    )
+    discard_suggestions(user, author_ids)
+    # bulk_create не посылает post_save.
+    invalidate_counts()
+    follow_graph.invalidate([user.pk], author_ids)
+    return len(created)
+
+
+@transaction.atomic
+def unfollow_authors(user, usernames):
+    """Отписать пользователя от авторов; возвращает число удалённых."""
+    deleted, _ = Follow.objects.filter(
+        user=user, author__username__in=usernames
+    ).delete()
+    invalidate_counts()
+    return deleted
+
+
+def get_suggestions_version():
+    return cache.get_or_set(SUGGESTIONS_VERSION_KEY, 1, None)
+
+
+def suggestions_key(user_id):
+    return f'follow_suggestions:{get_suggestions_version()}:{user_id}'
+
+
+def get_follow_suggestions(user):
+    """Рекомендации пользователю: список пар (имя автора, общих подписок)."""
+    key = suggestions_key(user.pk)
+    suggestions = cache.get(key)
+    if suggestions is None:
+        suggestions = list(
+            FollowSuggestion.objects.filter(user=user)
+            .values_list('author__username', 'score')
+            [:constants.FOLLOW_SUGGESTIONS_NUMBER]
+        )
+        cache.set(
+            key, suggestions, constants.FOLLOW_SUGGESTIONS_CACHE_TIMEOUT
+        )
+    return suggestions
+
+
+def discard_suggestions(user, author_ids):
+    """Убрать рекомендации авторов, на которых пользователь подписался."""
+    FollowSuggestion.objects.filter(
+        user=user, author_id__in=author_ids
+    ).delete()
+    cache.delete(suggestions_key(user.pk))
+
+
+def score_candidates(user_ids):
+    """Число общих подписок с кандидатами для пачки пользователей.
+
+    Одна выборка группирует пути «пользователь -> автор -> кандидат».
+    """
+    scores = defaultdict(dict)
+    rows = Follow.objects.filter(
+        user__following__user_id__in=user_ids
+    ).values_list('user__following__user_id', 'author_id').annotate(
+        score=Count('user_id', distinct=True)
+    ).order_by()
+    for user_id, candidate_id, score in rows:
+        scores[user_id][candidate_id] = score
+    followed = Follow.objects.filter(
+        user_id__in=user_ids
+    ).values_list('user_id', 'author_id')
+    for user_id, author_id in followed:
+        scores[user_id].pop(author_id, None)
+    for user_id in user_ids:
+        scores[user_id].pop(user_id, None)
+    return scores
+
+
+def top_suggestions(user_ids, number):
+    suggestions = []
+    for user_id, candidates in score_candidates(user_ids).items():
+        best = sorted(
+            candidates.items(), key=lambda item: (-item[1], item[0])
+        )[:number]
+        suggestions.extend(
+            FollowSuggestion(user_id=user_id, author_id=author_id, score=score)
+            for author_id, score in best
+        )
+    return suggestions
+
+
+def compute_follow_suggestions(batch_size=None, number=None):
+    """Пересчитать таблицу рекомендаций; возвращает число строк."""
+    batch_size = batch_size or constants.FOLLOW_SUGGESTIONS_BATCH_SIZE
+    number = number or constants.FOLLOW_SUGGESTIONS_NUMBER
+    users = User.objects.order_by('pk').values_list('pk', flat=True)
+    last_pk = 0
+    total = 0
+    while True:
+        batch = list(users.filter(pk__gt=last_pk)[:batch_size])
+        if not batch:
+            break
+        last_pk = batch[-1]
+        suggestions = top_suggestions(batch, number)
+        with transaction.atomic():
+            FollowSuggestion.objects.filter(user_id__in=batch).delete()
+            FollowSuggestion.objects.bulk_create(suggestions)
+        total += len(suggestions)
+    cache.set(SUGGESTIONS_VERSION_KEY, get_suggestions_version() + 1, None)
+    return total
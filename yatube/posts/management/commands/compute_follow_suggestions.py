@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from posts import constants
+from posts.follows import compute_follow_suggestions
+
+
+class Command(BaseCommand):
+    help = 'Пересчитать рекомендации подписок (друзья друзей).'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int,
+            default=constants.FOLLOW_SUGGESTIONS_BATCH_SIZE,
+            help='Сколько пользователей обрабатывать за один проход.'
+        )
+
+    def handle(self, *args, **options):
+        total = compute_follow_suggestions(batch_size=options['batch_size'])
+        self.stdout.write(f'Рекомендаций: {total}')
@@ -0,0 +1,52 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+
+from posts.follow_graph import FollowGraph, load_graph
+
+
+def synthetic_edges(edges, users):
+    """Случайные подписки ``users`` пользователей, упорядоченные по парам."""
+    pairs = {
+        (random.randrange(users), random.randrange(users))
+        for _ in range(edges)
+    }
+    return sorted(pairs)
+
+
+class Command(BaseCommand):
+    help = 'Размер графа подписок в памяти и время его загрузки.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--synthetic-edges', type=int, default=0,
+            help='Построить случайный граф из N подписок вместо БД.'
+        )
+        parser.add_argument(
+            '--users', type=int, default=100_000,
+            help='Число пользователей случайного графа.'
+        )
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        if options['synthetic_edges']:
+            graph = FollowGraph(synthetic_edges(
+                options['synthetic_edges'], options['users']
+            ))
+        else:
+            graph = load_graph()
+        elapsed = time.perf_counter() - started
+        edges = graph.edges_count()
+        memory = graph.memory_usage()
+        self.stdout.write(
+            f'Подписок: {edges}, подписчиков: {len(graph.following)}, '
+            f'авторов: {len(graph.followers)}'
+        )
+        self.stdout.write(f'Построение: {elapsed:.2f} с')
+        self.stdout.write(f'Память: {memory / 2 ** 20:.1f} МБ')
+        if edges:
+            self.stdout.write(
+                f'На 1 млн подписок: '
+                f'{memory / edges * 1_000_000 / 2 ** 20:.1f} МБ'
+            )
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from posts import constants
+from posts.ranking import rank_posts
+
+
+class Command(BaseCommand):
+    help = 'Пересчитать рейтинг постов для популярной ленты.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=constants.RANKING_BATCH_SIZE,
+            help='Сколько постов оценивать за один проход.'
+        )
+
+    def handle(self, *args, **options):
+        total = rank_posts(batch_size=options['batch_size'])
+        self.stdout.write(f'Оценено постов: {total}')
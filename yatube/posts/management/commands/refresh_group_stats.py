@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from posts.stats import refresh_group_stats
+
+
+class Command(BaseCommand):
+    help = 'Пересчитать статистику групп для каталога групп.'
+
+    def handle(self, *args, **options):
+        total = refresh_group_stats()
+        self.stdout.write(f'Групп: {total}')
@@ -37,11 +37,47 @@ class Post(CreatedModel):
         ordering = ['-created']
         verbose_name = "Пост группы"
         verbose_name_plural = "Посты группы"
+        indexes = [
+            models.Index(
+                fields=['-created', '-id'], name='post_created_idx'
+            ),
+        ]
 
     def __str__(self):
         return self.text
 
 
+class PostRank(models.Model):
+    """Рейтинг поста для популярной ленты.
+
+    Таблицу заполняет команда rank_posts.
+    """
+    post = models.OneToOneField(
+        Post,
+        primary_key=True,
+        on_delete=models.CASCADE,
+        related_name='rank',
+        verbose_name="Пост",
+    )
+    score = models.FloatField(
+        verbose_name="Рейтинг",
+    )
+    updated = models.DateTimeField(
+        auto_now=True,
+        verbose_name="Обновлено",
+    )
+
+    class Meta:
+        verbose_name = "Рейтинг поста"
+        verbose_name_plural = "Рейтинги постов"
+        indexes = [
+            models.Index(fields=['-score'], name='post_rank_score_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.post_id}: {self.score:.3f}'
+
+
 class Group(models.Model):
     """Класс группа."""
     title = models.CharField(max_length=200, verbose_name="Название группы")
@@ -56,6 +92,50 @@ class Group(models.Model):
         return self.title
 
 
+class GroupStats(models.Model):
+    """Сводка по группе для каталога групп.
+
+    Таблицу заполняет команда refresh_group_stats.
+    """
+    group = models.OneToOneField(
+        Group,
+        primary_key=True,
+        on_delete=models.CASCADE,
+        related_name='stats',
+        verbose_name="Группа",
+    )
+    post_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name="Всего постов",
+    )
+    last_post_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name="Последний пост",
+    )
+    top_authors = models.CharField(
+        max_length=500,
+        blank=True,
+        verbose_name="Самые активные авторы",
+        help_text='Имена через запятую',
+    )
+    updated = models.DateTimeField(
+        auto_now=True,
+        verbose_name="Обновлено",
+    )
+
+    class Meta:
+        verbose_name = "Статистика группы"
+        verbose_name_plural = "Статистика групп"
+
+    def __str__(self):
+        return f'{self.group_id}: {self.post_count}'
+
+    @property
+    def top_authors_list(self):
+        return self.top_authors.split(',') if self.top_authors else []
+
+
 class Comment(CreatedModel):
     """Класс комментарий."""
     post = models.ForeignKey(
@@ -106,3 +186,42 @@ class Follow(models.Model):
             fields=['user', 'author'],
             name='unique_follow'
         )
+
+
+class FollowSuggestion(models.Model):
+    """Предрассчитанная рекомендация: на кого подписаться пользователю.
+
+    Таблицу заполняет команда compute_follow_suggestions.
+    """
+    user = models.ForeignKey(
+        User,
+        related_name='follow_suggestions',
+        verbose_name="Пользователь",
+        on_delete=models.CASCADE,
+    )
+    author = models.ForeignKey(
+        User,
+        related_name='+',
+        verbose_name="Автор",
+        on_delete=models.CASCADE,
+    )
+    score = models.PositiveIntegerField(
+        verbose_name="Общих подписок",
+    )
+
+    class Meta:
+        ordering = ['-score']
+        verbose_name = "Рекомендация подписки"
+        verbose_name_plural = "Рекомендации подписок"
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'author'],
+                name='unique_follow_suggestion'
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=['user', '-score'],
+                name='suggestion_user_score_idx'
+            ),
+        ]
@@ -0,0 +1,103 @@
+"""Массовая модерация: перенос и удаление пачками.
+
+Каждая пачка - один ``UPDATE`` или ``DELETE`` по списку id в своей
+транзакции. Удаление идёт мимо сборщика связанных объектов и сигналов
+``post_delete``: зависимые строки удаляются так же пачкой, а кэши и
+счётчики сбрасываются один раз на пачку, а не на каждую строку.
+
+``progress`` - необязательная функция, которая после каждой пачки
+получает число обработанных строк.
+"""
+from django.db import router, transaction
+
+from . import constants, follow_graph, sitemaps
+from .models import Comment, Follow, Post, PostRank
+from .utils import invalidate_counts
+
+
+def batches(queryset, batch_size=None):
+    """id строк выборки пачками по возрастанию, без OFFSET."""
+    batch_size = batch_size or constants.MODERATION_BATCH_SIZE
+    pks = queryset.order_by('pk').values_list('pk', flat=True)
+    last_pk = None
+    while True:
+        page = pks if last_pk is None else pks.filter(pk__gt=last_pk)
+        batch = list(page[:batch_size])
+        if not batch:
+            return
+        last_pk = batch[-1]
+        yield batch
+
+
+def primary(model):
+    """Строки модели в основной БД: на реплике может не быть свежих."""
+    return model.objects.using(router.db_for_write(model))
+
+
+def run_batches(queryset, operation, batch_size=None, progress=None):
+    """Выполнить ``operation`` над каждой пачкой id; вернуть число строк."""
+    using = router.db_for_write(queryset.model)
+    done = 0
+    for batch in batches(queryset.using(using), batch_size):
+        with transaction.atomic(using=using):
+            done += operation(batch)
+        if progress is not None:
+            progress(done)
+    return done
+
+
+def raw_delete(model, batch):
+    """DELETE по id без выборки объектов и сигналов."""
+    queryset = primary(model).filter(pk__in=batch)
+    return queryset._raw_delete(queryset.db)
+
+
+def move_posts(queryset, group, **kwargs):
+    """Перенести посты в группу (None - убрать из группы)."""
+    def operation(batch):
+        updated = Post.objects.filter(pk__in=batch).update(group=group)
+        invalidate_counts()
+        return updated
+
+    return run_batches(queryset, operation, **kwargs)
+
+
+def delete_posts(queryset, **kwargs):
+    """Удалить посты вместе с их комментариями и рейтингом."""
+    def operation(batch):
+        months = primary(Post).filter(pk__in=batch).datetimes(
+            'created', 'month'
+        )
+        for month in months:
+            sitemaps.invalidate_chunk(month)
+        Comment.objects.filter(post_id__in=batch).delete()
+        PostRank.objects.filter(post_id__in=batch).delete()
+        deleted = raw_delete(Post, batch)
+        invalidate_counts()
+        return deleted
+
+    return run_batches(queryset, operation, **kwargs)
+
+
+def delete_comments(queryset, **kwargs):
+    def operation(batch):
+        deleted = raw_delete(Comment, batch)
+        invalidate_counts()
+        return deleted
+
+    return run_batches(queryset, operation, **kwargs)
+
+
+def delete_follows(queryset, **kwargs):
+    def operation(batch):
+        pairs = list(primary(Follow).filter(pk__in=batch).values_list(
+            'user_id', 'author_id'
+        ))
+        user_ids = {user_id for user_id, _ in pairs}
+        author_ids = {author_id for _, author_id in pairs}
+        deleted = raw_delete(Follow, batch)
+        invalidate_counts()
+        follow_graph.invalidate(user_ids, author_ids)
+        return deleted
+
+    return run_batches(queryset, operation, **kwargs)
@@ -0,0 +1,73 @@
+"""Рейтинг популярных постов.
+
+Оценка поста растёт с числом недавних комментариев и подписчиков
+автора и затухает с возрастом поста::
+
+    score = (1 + комментарии * w_c + ln(1 + подписчики) * w_f)
+            / (часы + 2) ** gravity
+
+Оцениваются только посты за последние ``RANKING_WINDOW_DAYS`` дней:
+одна агрегирующая выборка на пачку постов. Число подписчиков авторов
+пачки берётся из кэша ``posts.follow_graph``, а недостающие считаются
+одним запросом к основной БД. Популярная лента читает готовую таблицу
+``PostRank``.
+"""
+import math
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from . import constants, follow_graph
+from .models import Post, PostRank
+
+
+def score(comments, followers, age_hours):
+    return (
+        1
+        + comments * constants.RANKING_COMMENT_WEIGHT
+        + math.log1p(followers) * constants.RANKING_FOLLOWER_WEIGHT
+    ) / (age_hours + 2) ** constants.RANKING_GRAVITY
+
+
+def score_batch(rows, now):
+    """Рейтинги пачки: строки (pk, author_id, created, комментарии)."""
+    followers = follow_graph.follower_counts(row[1] for row in rows)
+    return [
+        PostRank(post_id=pk, score=score(
+            comments,
+            followers[author_id],
+            (now - created).total_seconds() / 3600,
+        ))
+        for pk, author_id, created, comments in rows
+    ]
+
+
+def rank_posts(batch_size=None, now=None):
+    """Пересчитать рейтинги свежих постов; возвращает их число."""
+    batch_size = batch_size or constants.RANKING_BATCH_SIZE
+    now = now or timezone.now()
+    since = now - timedelta(days=constants.RANKING_WINDOW_DAYS)
+    posts = Post.objects.filter(created__gte=since).order_by('pk').annotate(
+        recent_comments=Count(
+            'comments', filter=Q(comments__created__gte=since)
+        )
+    ).values_list('pk', 'author_id', 'created', 'recent_comments')
+    last_pk = 0
+    total = 0
+    while True:
+        rows = list(posts.filter(pk__gt=last_pk)[:batch_size])
+        if not rows:
+            break
+        last_pk = rows[-1][0]
+        ranks = score_batch(rows, now)
+        with transaction.atomic():
+            PostRank.objects.filter(
+                post_id__in=[rank.post_id for rank in ranks]
+            ).delete()
+            PostRank.objects.bulk_create(ranks)
+        total += len(ranks)
+    # Посты старше окна уходят из популярной ленты.
+    PostRank.objects.filter(post__created__lt=since).delete()
+    return total
@@ -0,0 +1,27 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import follow_graph, sitemaps
+from .models import Follow, Post
+from .utils import invalidate_counts
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def invalidate_post_counts(sender, **kwargs):
+    """Пост мог сменить группу, подписка - ленту подписчика."""
+    invalidate_counts()
+
+
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def invalidate_follow_graph(sender, instance, **kwargs):
+    follow_graph.invalidate([instance.user_id], [instance.author_id])
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def invalidate_sitemap_chunk(sender, instance, **kwargs):
+    sitemaps.invalidate_chunk(instance.created)
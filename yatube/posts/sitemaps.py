@@ -0,0 +1,121 @@
+"""Карта сайта постов, разбитая на части по месяцам публикации.
+
+Часть - посты с ``created`` в пределах календарного месяца (UTC), она
+выбирается диапазоном по индексу ``post_created_idx``. У каждой части
+своё поколение в кэше - время последнего изменения её постов:
+сигналы ``Post`` и массовое удаление сбрасывают только часть месяца
+изменённого поста. Отрендеренная часть хранится под своим поколением,
+поэтому после нового поста заново строится лишь последняя часть, а
+ETag остальных не меняется.
+
+Месяц больше ``SITEMAP_MAX_URLS`` постов делится на страницы ``?p=2``,
+``?p=3`` и т. д., как в ``django.contrib.sitemaps``; число страниц
+хранится под поколением месяца.
+
+Список месяцев для индекса строится переходами по индексу: от начала
+месяца к первому посту не раньше него, без полного просмотра таблицы.
+"""
+import math
+import time
+from datetime import datetime
+
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from . import constants
+from .models import Post
+from .utils import get_counts_version
+
+
+def month_start(moment):
+    moment = moment.astimezone(timezone.utc)
+    return datetime(moment.year, moment.month, 1, tzinfo=timezone.utc)
+
+
+def next_month(start):
+    if start.month == 12:
+        return start.replace(year=start.year + 1, month=1)
+    return start.replace(month=start.month + 1)
+
+
+def chunk_name(start):
+    return f'{start.year}-{start.month:02}'
+
+
+def chunk_version_key(start):
+    return f'posts:sitemap:version:{chunk_name(start)}'
+
+
+def get_chunk_versions(starts):
+    """Поколения частей: время изменения или первого обращения."""
+    now = time.time()
+    keys = {chunk_version_key(start): start for start in starts}
+    versions = cache.get_many(list(keys))
+    for key in keys.keys() - versions.keys():
+        cache.add(key, now, None)
+        versions[key] = cache.get(key, now)
+    return {keys[key]: version for key, version in versions.items()}
+
+
+def invalidate_chunk(created):
+    """Часть с постом, созданным в ``created``, построится заново."""
+    key = chunk_version_key(month_start(created))
+
+    def bump():
+        cache.set(key, time.time(), None)
+
+    bump()
+    transaction.on_commit(bump)
+
+
+def chunk_posts(start):
+    return Post.objects.filter(
+        created__gte=start, created__lt=next_month(start)
+    ).order_by('created', 'pk')
+
+
+def get_chunk_pages(versions):
+    """Число страниц частей; ``versions`` - поколения по началу месяца."""
+    keys = {
+        f'posts:sitemap:pages:{chunk_name(start)}:{version}': start
+        for start, version in versions.items()
+    }
+    cached = cache.get_many(list(keys))
+    missing = {
+        key: max(1, math.ceil(
+            chunk_posts(start).count() / constants.SITEMAP_MAX_URLS
+        ))
+        for key, start in keys.items() if key not in cached
+    }
+    if missing:
+        cache.set_many(missing, constants.SITEMAP_CACHE_TIMEOUT)
+    return {keys[key]: pages for key, pages in {**cached, **missing}.items()}
+
+
+def page_posts(start, page):
+    """Посты страницы ``page`` (с единицы) части месяца ``start``."""
+    offset = (page - 1) * constants.SITEMAP_MAX_URLS
+    return chunk_posts(start)[offset:offset + constants.SITEMAP_MAX_URLS]
+
+
+def chunk_starts():
+    """Месяцы, в которых есть посты, по возрастанию.
+
+    Кэшируется до изменения постов; на каждый месяц - один запрос.
+    """
+    key = f'posts:sitemap:chunks:{get_counts_version()}'
+    starts = cache.get(key)
+    if starts is not None:
+        return starts
+    starts = []
+    created = Post.objects.order_by('created').values_list(
+        'created', flat=True
+    )
+    first = created.first()
+    while first is not None:
+        start = month_start(first)
+        starts.append(start)
+        first = created.filter(created__gte=next_month(start)).first()
+    cache.set(key, starts, constants.SITEMAP_CACHE_TIMEOUT)
+    return starts
@@ -0,0 +1,52 @@
+"""Сводные таблицы, которые пересчитываются периодически.
+
+Страницы читают готовые строки одной выборкой, а тяжёлые агрегаты по
+всем постам считаются командой ``refresh_group_stats``.
+"""
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Count, Max
+
+from . import constants
+from .models import Group, GroupStats, Post
+
+
+def group_top_authors(number):
+    """Самые активные авторы каждой группы: {group_id: [username, ...]}."""
+    top_authors = defaultdict(list)
+    rows = Post.objects.filter(group__isnull=False).values_list(
+        'group_id', 'author__username'
+    ).annotate(total=Count('pk')).order_by(
+        'group_id', '-total', 'author__username'
+    )
+    for group_id, username, _ in rows:
+        if len(top_authors[group_id]) < number:
+            top_authors[group_id].append(username)
+    return top_authors
+
+
+def refresh_group_stats(top_authors_number=None):
+    """Пересчитать статистику всех групп; возвращает число групп."""
+    top_authors = group_top_authors(
+        top_authors_number or constants.GROUP_TOP_AUTHORS_NUMBER
+    )
+    totals = {
+        row['group_id']: row for row in
+        Post.objects.filter(group__isnull=False).values('group_id').annotate(
+            post_count=Count('pk'), last_post_at=Max('created')
+        ).order_by()
+    }
+    stats = []
+    for group_id in Group.objects.values_list('pk', flat=True):
+        row = totals.get(group_id, {})
+        stats.append(GroupStats(
+            group_id=group_id,
+            post_count=row.get('post_count', 0),
+            last_post_at=row.get('last_post_at'),
+            top_authors=','.join(top_authors[group_id]),
+        ))
+    with transaction.atomic():
+        GroupStats.objects.all().delete()
+        GroupStats.objects.bulk_create(stats)
+    return len(stats)
@@ -0,0 +1,33 @@
+from sorl.thumbnail import get_thumbnail
+
+from tasks.queue import task
+from . import ranking, stats
+from .follows import compute_follow_suggestions
+from .models import Post
+
+
+@task
+def generate_thumbnails(post_id):
+    """Заранее подготовить миниатюру картинки поста для лент."""
+    post = Post.objects.filter(pk=post_id).only('image').first()
+    if post is None or not post.image:
+        return
+    get_thumbnail(post.image, '960x339', crop='center', upscale=True)
+
+
+@task
+def refresh_follow_suggestions():
+    """Пересчитать рекомендации подписок в обработчике очереди."""
+    compute_follow_suggestions()
+
+
+@task
+def refresh_group_stats():
+    """Пересчитать статистику групп в обработчике очереди."""
+    stats.refresh_group_stats()
+
+
+@task
+def rank_posts():
+    """Пересчитать рейтинг постов в обработчике очереди."""
+    ranking.rank_posts()
@@ -0,0 +1,85 @@
+from django.core.cache import cache
+from django.test import TestCase, tag
+from django.urls import reverse
+
+from posts.models import Group, Post, User
+from ..utils import encode_cursor
+
+POSTS_NUMBER = 100_000
+
+
+@tag('slow')
+class PostAdminChangelistTest(TestCase):
+    """Список постов в админке на 100 тысячах строк.
+
+    Подготовка данных занимает секунды: в быстром прогоне тест
+    пропускается через ``--exclude-tag slow``.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='pass'
+        )
+        cls.group = Group.objects.create(title='Группа', slug='group')
+        Post.objects.bulk_create(
+            Post(author=cls.admin, group=cls.group, text=f'Пост {number}')
+            for number in range(POSTS_NUMBER)
+        )
+        cls.url = reverse('admin:posts_post_changelist')
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.admin)
+        # Сессия и пользователь загружаются в первом запросе.
+        self.client.get(self.url)
+        cache.clear()
+
+    def test_changelist_queries(self):
+        """Число запросов не зависит от числа постов, COUNT(*) нет."""
+        # Сессия и пользователь (кэш очищен), оценка числа, страница,
+        # две выборки для date_hierarchy и группы для действия «Перенести».
+        with self.assertNumQueries(7) as context:
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['cl'].result_count, POSTS_NUMBER)
+        for query in context.captured_queries:
+            self.assertNotIn('COUNT(', query['sql'])
+        self.assertNotContains(response, '<select name="form-0-group"')
+
+    def test_cursor_navigation(self):
+        """«Следующие посты» продолжают список без OFFSET и подсчёта."""
+        response = self.client.get(self.url)
+        first_page = list(response.context['cl'].result_list)
+        next_url = response.context['cl'].next_url
+        self.assertEqual(
+            next_url, f'?cursor={encode_cursor(first_page[-1])}'
+        )
+        # Сессия и пользователь уже в кэше, оценки числа нет.
+        with self.assertNumQueries(4) as context:
+            response = self.client.get(self.url + next_url)
+        for query in context.captured_queries:
+            self.assertNotIn('COUNT(', query['sql'])
+            self.assertNotIn('OFFSET', query['sql'])
+        second_page = list(response.context['cl'].result_list)
+        self.assertEqual(len(second_page), len(first_page))
+        self.assertEqual(
+            list(Post.objects.order_by('-created', '-pk').values_list(
+                'pk', flat=True)[:len(first_page) * 2]),
+            [post.pk for post in first_page + second_page],
+        )
+
+    def test_invalid_cursor(self):
+        response = self.client.get(self.url, {'cursor': 'bad'})
+        self.assertRedirects(
+            response, self.url + '?e=1', fetch_redirect_response=False
+        )
+
+    def test_autocomplete(self):
+        response = self.client.get(
+            reverse('admin:posts_group_autocomplete'), {'term': 'Груп'}
+        )
+        self.assertEqual(
+            response.json()['results'],
+            [{'id': str(self.group.pk), 'text': 'Группа'}],
+        )
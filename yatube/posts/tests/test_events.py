@@ -0,0 +1,164 @@
+from http import HTTPStatus
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Group, Post, User
+
+
+class LiveEventsTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='Noname')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.post = Post.objects.create(
+            text='Тестовый пост', author=cls.user, group=cls.group
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = self.client_class()
+        self.authorized_client.force_login(self.user)
+
+    def capture_publish(self):
+        """Перехватить рассылку; on_commit внутри TestCase не срабатывает."""
+        on_commit = mock.patch(
+            'posts.events.transaction.on_commit',
+            side_effect=lambda function: function(),
+        )
+        on_commit.start()
+        self.addCleanup(on_commit.stop)
+        return mock.patch('posts.events.bus.publish')
+
+    def poll(self, *topics, post_after=None, comment_after=0):
+        params = {'topic': topics}
+        if post_after is not None:
+            params['post_after'] = post_after
+            params['comment_after'] = comment_after
+        return self.client.get(reverse('posts:events'), params)
+
+    def test_new_post_published_to_topics(self):
+        with self.capture_publish() as publish:
+            self.authorized_client.post(
+                reverse('posts:post_create'),
+                {'text': 'Новый пост', 'group': self.group.pk},
+            )
+        post = Post.objects.latest('pk')
+        self.assertEqual(
+            {call.args[0] for call in publish.call_args_list},
+            {'feed', 'author:Noname', 'group:test-slug'},
+        )
+        event = publish.call_args.args[1]
+        self.assertEqual(event['type'], 'post')
+        self.assertEqual(event['id'], post.pk)
+        self.assertEqual(
+            event['url'], reverse('posts:post_detail', args=(post.pk,))
+        )
+
+    def test_new_comment_published_to_post_topic(self):
+        with self.capture_publish() as publish:
+            self.authorized_client.post(
+                reverse('posts:add_comment', args=(self.post.pk,)),
+                {'text': 'Комментарий'},
+            )
+        publish.assert_called_once()
+        topic, event = publish.call_args.args
+        self.assertEqual(topic, f'post:{self.post.pk}')
+        self.assertEqual(event['type'], 'comment')
+        self.assertEqual(event['post'], self.post.pk)
+
+    def test_poll_returns_cursor_then_new_events(self):
+        response = self.poll('feed')
+        self.assertEqual(response.json(), {
+            'events': [], 'last': {'post': self.post.pk, 'comment': 0}
+        })
+        other = Post.objects.create(text='Без группы', author=self.user)
+        in_group = Post.objects.create(
+            text='В группе', author=self.user, group=self.group
+        )
+        data = self.poll('group:test-slug', post_after=self.post.pk).json()
+        self.assertEqual(
+            [event['id'] for event in data['events']], [in_group.pk]
+        )
+        self.assertEqual(data['last'], {'post': in_group.pk, 'comment': 0})
+        data = self.poll('feed', post_after=self.post.pk).json()
+        self.assertEqual(
+            [event['id'] for event in data['events']], [other.pk, in_group.pk]
+        )
+
+    def test_poll_comments(self):
+        comment = Comment.objects.create(
+            post=self.post, author=self.user, text='Комментарий'
+        )
+        data = self.poll(f'post:{self.post.pk}', post_after=0).json()
+        self.assertEqual(
+            [(event['type'], event['id']) for event in data['events']],
+            [('comment', comment.pk)],
+        )
+
+    def test_poll_mixed_topics_keeps_cursor_per_kind(self):
+        """id комментариев впереди id постов: посты не теряются."""
+        Comment.objects.bulk_create(
+            Comment(post=self.post, author=self.user, text=f'Старый {n}')
+            for n in range(5)
+        )
+        topics = ('feed', f'post:{self.post.pk}')
+        last = self.poll(*topics).json()['last']
+        self.assertGreater(last['comment'], last['post'])
+        post = Post.objects.create(text='Новый пост', author=self.user)
+        comment = Comment.objects.create(
+            post=self.post, author=self.user, text='Новый комментарий'
+        )
+        self.assertLess(post.pk, last['comment'])
+        data = self.poll(
+            *topics, post_after=last['post'], comment_after=last['comment']
+        ).json()
+        self.assertEqual(
+            [(event['type'], event['id']) for event in data['events']],
+            [('post', post.pk), ('comment', comment.pk)],
+        )
+        self.assertEqual(
+            data['last'], {'post': post.pk, 'comment': comment.pk}
+        )
+
+    def test_poll_rejects_invalid_request(self):
+        for params in (('unknown',), ('feed', 'x'), ()):
+            with self.subTest(params=params):
+                self.assertEqual(
+                    self.poll(*params).status_code, HTTPStatus.BAD_REQUEST
+                )
+        self.assertEqual(
+            self.poll('feed', post_after='abc').status_code,
+            HTTPStatus.BAD_REQUEST,
+        )
+        response = self.client.get(
+            reverse('posts:events'), {'topic': 'feed', 'post_after': 1}
+        )
+        self.assertEqual(response.status_code, HTTPStatus.BAD_REQUEST)
+
+    def test_feed_pages_subscribe_to_topics(self):
+        follower = User.objects.create_user(username='Follower')
+        Follow.objects.create(user=follower, author=self.user)
+        follower_client = self.client_class()
+        follower_client.force_login(follower)
+        pages = (
+            (self.client, reverse('posts:index'), 'feed'),
+            (self.client, reverse('posts:group_list', args=('test-slug',)),
+             'group:test-slug'),
+            (self.client, reverse('posts:profile', args=('Noname',)),
+             'author:Noname'),
+            (self.client, reverse('posts:post_detail', args=(self.post.pk,)),
+             f'post:{self.post.pk}'),
+            (follower_client, reverse('posts:follow_index'), 'author:Noname'),
+        )
+        for client, url, topic in pages:
+            with self.subTest(url=url):
+                response = client.get(url)
+                self.assertEqual(response.context['live_topics'], [topic])
+                self.assertContains(response, 'data-live-updates')
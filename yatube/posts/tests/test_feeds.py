@@ -0,0 +1,207 @@
+import re
+from datetime import datetime
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from posts import moderation, sitemaps
+from posts.models import Group, Post, User
+
+
+def utc(year, month, day):
+    return datetime(year, month, day, tzinfo=timezone.utc)
+
+
+def create_post(created, **kwargs):
+    post = Post.objects.create(**kwargs)
+    Post.objects.filter(pk=post.pk).update(created=created)
+    post.created = created
+    return post
+
+
+@mock.patch('posts.events.transaction.on_commit', lambda callback: None)
+class FeedTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание группы'
+        )
+        Post.objects.create(author=cls.author, text='Пост без группы')
+        Post.objects.create(
+            author=cls.author, group=cls.group, text='Пост в группе'
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_feeds(self):
+        cases = (
+            ('posts:feed_rss', (), 'application/rss+xml', 2),
+            ('posts:feed_atom', (), 'application/atom+xml', 2),
+            ('posts:group_feed_rss', ('group',), 'application/rss+xml', 1),
+            ('posts:group_feed_atom', ('group',),
+             'application/atom+xml', 1),
+            ('posts:profile_feed_rss', ('author',),
+             'application/rss+xml', 2),
+            ('posts:profile_feed_atom', ('author',),
+             'application/atom+xml', 2),
+        )
+        for name, args, content_type, items in cases:
+            with self.subTest(name=name):
+                response = self.client.get(reverse(name, args=args))
+                self.assertTrue(response['Content-Type'].startswith(
+                    content_type
+                ))
+                content = response.content.decode()
+                self.assertEqual(
+                    content.count('<item>') + content.count('<entry>'),
+                    items,
+                )
+                self.assertIn('Пост в группе', content)
+
+    def test_unknown_group_not_found(self):
+        response = self.client.get(
+            reverse('posts:group_feed_rss', args=('missing',))
+        )
+        self.assertEqual(response.status_code, 404)
+
+    def test_feed_cached_until_posts_change(self):
+        url = reverse('posts:feed_atom')
+        etag = self.client.get(url)['ETag']
+        with self.assertNumQueries(0):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        Post.objects.create(author=self.author, text='Новый пост')
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Новый пост')
+
+
+@mock.patch('posts.events.transaction.on_commit', lambda callback: None)
+class SitemapTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.old = create_post(
+            utc(2024, 1, 15), author=cls.author, text='Январь'
+        )
+        create_post(utc(2024, 1, 31), author=cls.author, text='Январь 2')
+        cls.new = create_post(
+            utc(2024, 3, 1), author=cls.author, text='Март'
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def chunk_urls(self):
+        response = self.client.get(reverse('posts:sitemap_index'))
+        return re.findall(
+            r'<loc>http://testserver(.*?)</loc>', response.content.decode()
+        )
+
+    def test_index_lists_months_with_posts(self):
+        self.assertEqual(self.chunk_urls(), [
+            reverse('posts:sitemap_chunk', args=(2024, 1)),
+            reverse('posts:sitemap_chunk', args=(2024, 3)),
+        ])
+
+    def test_chunk_lists_month_posts(self):
+        response = self.client.get(
+            reverse('posts:sitemap_chunk', args=(2024, 1))
+        )
+        self.assertEqual(response['Content-Type'], 'application/xml')
+        self.assertEqual(response.content.decode().count('<url>'), 2)
+        self.assertContains(
+            response, reverse('posts:post_detail', args=(self.old.pk,))
+        )
+        for args in ((2024, 2), (2024, 13), (99999999999999999999, 1)):
+            with self.subTest(args=args):
+                response = self.client.get(
+                    reverse('posts:sitemap_chunk', args=args)
+                )
+                self.assertEqual(response.status_code, 404)
+        # Пустой месяц не оставляет поколения в кэше.
+        self.assertIsNone(
+            cache.get(sitemaps.chunk_version_key(utc(2024, 2, 1)))
+        )
+
+    @override_settings(ALLOWED_HOSTS=['testserver', 'mirror.example.com'])
+    def test_chunk_etag_depends_on_host(self):
+        url = reverse('posts:sitemap_chunk', args=(2024, 1))
+        etag = self.client.get(url)['ETag']
+        response = self.client.get(
+            url, HTTP_HOST='mirror.example.com', HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertContains(
+            response, 'http://mirror.example.com' + reverse(
+                'posts:post_detail', args=(self.old.pk,)
+            )
+        )
+
+    def test_only_changed_chunk_rebuilt(self):
+        january = reverse('posts:sitemap_chunk', args=(2024, 1))
+        march = reverse('posts:sitemap_chunk', args=(2024, 3))
+        etags = {
+            url: self.client.get(url)['ETag'] for url in (january, march)
+        }
+        with self.assertNumQueries(0):
+            response = self.client.get(january)
+        self.assertEqual(response['ETag'], etags[january])
+        self.new.text = 'Март, исправлено'
+        self.new.save()
+        response = self.client.get(
+            january, HTTP_IF_NONE_MATCH=etags[january]
+        )
+        self.assertEqual(response.status_code, 304)
+        response = self.client.get(march, HTTP_IF_NONE_MATCH=etags[march])
+        self.assertEqual(response.status_code, 200)
+
+    def test_moderation_delete_invalidates_chunk(self):
+        january = reverse('posts:sitemap_chunk', args=(2024, 1))
+        etag = self.client.get(january)['ETag']
+        moderation.delete_posts(Post.objects.filter(pk=self.old.pk))
+        response = self.client.get(january, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content.decode().count('<url>'), 1)
+        self.assertEqual(len(self.chunk_urls()), 2)
+
+    def test_month_starts_found_by_index_seeks(self):
+        # Один запрос на каждый месяц с постами и последний пустой.
+        with self.assertNumQueries(3):
+            starts = sitemaps.chunk_starts()
+        self.assertEqual(starts, [utc(2024, 1, 1), utc(2024, 3, 1)])
+
+    @mock.patch('posts.constants.SITEMAP_MAX_URLS', 2)
+    def test_month_split_into_pages_past_limit(self):
+        january = reverse('posts:sitemap_chunk', args=(2024, 1))
+        self.assertEqual(self.client.get(january).content.decode().count(
+            '<url>'
+        ), 2)
+        response = self.client.get(january, {'p': 2})
+        self.assertEqual(response.status_code, 404)
+
+        cache.clear()
+        extra = create_post(utc(2024, 1, 31), author=self.author, text='Ещё')
+        self.assertEqual(self.chunk_urls(), [
+            january,
+            f'{january}?p=2',
+            reverse('posts:sitemap_chunk', args=(2024, 3)),
+        ])
+        first = self.client.get(january)
+        self.assertEqual(first.content.decode().count('<url>'), 2)
+        second = self.client.get(january, {'p': 2})
+        self.assertEqual(second.content.decode().count('<url>'), 1)
+        self.assertContains(
+            second, reverse('posts:post_detail', args=(extra.pk,))
+        )
+        self.assertNotEqual(first['ETag'], second['ETag'])
+        for page in ('0', '3', 'x'):
+            with self.subTest(page=page):
+                response = self.client.get(january, {'p': page})
+                self.assertEqual(response.status_code, 404)
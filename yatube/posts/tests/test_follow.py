@@ -0,0 +1,132 @@
+from http import HTTPStatus
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+
+from posts.follows import compute_follow_suggestions, get_follow_suggestions
+from posts.models import Follow, FollowSuggestion, User
+
+
+class FollowBulkTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='Reader')
+        cls.authors = [
+            User.objects.create_user(username=f'Author{number}')
+            for number in range(3)
+        ]
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = self.client_class()
+        self.authorized_client.force_login(self.user)
+
+    def bulk(self, action, usernames):
+        return self.authorized_client.post(
+            reverse('posts:follow_bulk'),
+            {'action': action, 'username': usernames},
+        )
+
+    def followed(self):
+        return set(Follow.objects.filter(user=self.user).values_list(
+            'author__username', flat=True
+        ))
+
+    def test_bulk_follow_and_unfollow(self):
+        Follow.objects.create(user=self.user, author=self.authors[0])
+        # Сессия сохранена в кэш при входе, пользователь читается из БД.
+        with self.assertNumQueries(7):
+            response = self.bulk('follow', [
+                'Author0', 'Author1', 'Author2', 'Reader', 'Unknown'
+            ])
+        self.assertRedirects(response, reverse('posts:follow_index'))
+        self.assertEqual(self.followed(), {'Author0', 'Author1', 'Author2'})
+        self.bulk('unfollow', ['Author0', 'Author2'])
+        self.assertEqual(self.followed(), {'Author1'})
+
+    def test_bulk_rejects_invalid_requests(self):
+        for action, usernames in (
+            ('block', ['Author0']),
+            ('follow', []),
+            ('follow', [f'user{number}' for number in range(101)]),
+        ):
+            with self.subTest(action=action, usernames=len(usernames)):
+                self.assertEqual(
+                    self.bulk(action, usernames).status_code,
+                    HTTPStatus.BAD_REQUEST,
+                )
+        self.assertEqual(
+            self.authorized_client.get(
+                reverse('posts:follow_bulk')).status_code,
+            HTTPStatus.METHOD_NOT_ALLOWED,
+        )
+        self.assertEqual(self.followed(), set())
+
+
+class FollowSuggestionsTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        users = {
+            name: User.objects.create_user(username=name)
+            for name in ('reader', 'friend1', 'friend2', 'star', 'niche')
+        }
+        for user, author in (
+            ('reader', 'friend1'),
+            ('reader', 'friend2'),
+            ('friend1', 'star'),
+            ('friend2', 'star'),
+            ('friend2', 'niche'),
+            ('friend1', 'reader'),
+            ('friend2', 'friend1'),
+        ):
+            Follow.objects.create(user=users[user], author=users[author])
+        cls.users = users
+
+    def setUp(self):
+        cache.clear()
+
+    def suggestions(self, name):
+        return list(
+            FollowSuggestion.objects.filter(user=self.users[name])
+            .values_list('author__username', 'score')
+        )
+
+    def test_friends_of_friends(self):
+        compute_follow_suggestions(batch_size=2)
+        # Уже отслеживаемые авторы и сам пользователь не предлагаются.
+        self.assertEqual(
+            self.suggestions('reader'), [('star', 2), ('niche', 1)]
+        )
+        self.assertEqual(self.suggestions('friend2'), [('reader', 1)])
+        self.assertEqual(self.suggestions('star'), [])
+
+    def test_recompute_replaces_stale_rows(self):
+        call_command('compute_follow_suggestions', stdout=StringIO())
+        Follow.objects.filter(author=self.users['niche']).delete()
+        compute_follow_suggestions()
+        self.assertEqual(self.suggestions('reader'), [('star', 2)])
+
+    def test_profile_shows_cached_suggestions(self):
+        compute_follow_suggestions()
+        client = self.client_class()
+        client.force_login(self.users['reader'])
+        url = reverse('posts:profile', args=('reader',))
+        response = client.get(url)
+        self.assertEqual(
+            response.context['suggestions'], [('star', 2), ('niche', 1)]
+        )
+        with self.assertNumQueries(0):
+            get_follow_suggestions(self.users['reader'])
+        client.post(
+            reverse('posts:follow_bulk'),
+            {'action': 'follow', 'username': ['star']},
+        )
+        response = client.get(url)
+        self.assertEqual(response.context['suggestions'], [('niche', 1)])
+        self.assertNotIn(
+            'suggestions',
+            client.get(reverse('posts:profile', args=('star',))).context,
+        )
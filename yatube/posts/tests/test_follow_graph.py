@@ -0,0 +1,151 @@
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.test import (
+    SimpleTestCase, TestCase, TransactionTestCase, override_settings
+)
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core import routers
+from core.middleware import PRIMARY_PIN_COOKIE
+from posts import follow_graph
+from posts.follows import follow_authors
+from posts.models import Follow, User
+
+
+class FollowGraphTest(SimpleTestCase):
+    def setUp(self):
+        self.graph = follow_graph.FollowGraph(
+            [(1, 2), (1, 3), (1, 3), (1, 7), (2, 3), (5, 1)]
+        )
+
+    def test_lookups(self):
+        self.assertTrue(self.graph.is_following(1, 3))
+        self.assertFalse(self.graph.is_following(1, 4))
+        self.assertFalse(self.graph.is_following(4, 1))
+        self.assertEqual(list(self.graph.followed_authors(1)), [2, 3, 7])
+        self.assertEqual(list(self.graph.followed_authors(9)), [])
+
+    def test_counts_skip_duplicates(self):
+        self.assertEqual(self.graph.edges_count(), 5)
+        self.assertEqual(self.graph.following_count(1), 3)
+        self.assertEqual(self.graph.follower_count(3), 2)
+        self.assertEqual(self.graph.follower_count(5), 0)
+        self.assertGreater(self.graph.memory_usage(), 0)
+
+
+class FollowGraphCacheTest(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        self.reader = User.objects.create_user(username='reader')
+        self.author = User.objects.create_user(username='author')
+        self.other = User.objects.create_user(username='other')
+
+    def test_loaded_once_and_reloaded_after_follow(self):
+        follow_graph.followed_authors(self.reader.pk)
+        with self.assertNumQueries(0):
+            self.assertFalse(
+                follow_graph.is_following(self.reader.pk, self.author.pk)
+            )
+        Follow.objects.create(user=self.reader, author=self.author)
+        self.assertTrue(
+            follow_graph.is_following(self.reader.pk, self.author.pk)
+        )
+        Follow.objects.all().delete()
+        self.assertEqual(follow_graph.follower_count(self.author.pk), 0)
+        follow_authors(self.reader, ['author'])
+        self.assertEqual(follow_graph.following_count(self.reader.pk), 1)
+
+    def test_follow_invalidates_only_its_users(self):
+        """Подписка не сбрасывает подписки остальных пользователей."""
+        Follow.objects.create(user=self.other, author=self.author)
+        follow_graph.followed_authors(self.other.pk)
+        follow_graph.follower_counts([self.other.pk, self.reader.pk])
+        Follow.objects.create(user=self.reader, author=self.author)
+        with self.assertNumQueries(0):
+            self.assertEqual(
+                list(follow_graph.followed_authors(self.other.pk)),
+                [self.author.pk]
+            )
+            self.assertEqual(
+                follow_graph.follower_counts(
+                    [self.other.pk, self.reader.pk]
+                ),
+                {self.other.pk: 0, self.reader.pk: 0}
+            )
+        with self.assertNumQueries(1):
+            self.assertEqual(follow_graph.follower_count(self.author.pk), 2)
+
+    def test_transaction_reads_only_user_rows(self):
+        Follow.objects.create(user=self.other, author=self.author)
+        with transaction.atomic():
+            Follow.objects.create(user=self.reader, author=self.author)
+            with CaptureQueriesContext(connection) as queries:
+                self.assertTrue(
+                    follow_graph.is_following(self.reader.pk, self.author.pk)
+                )
+            self.assertEqual(len(queries), 1)
+            self.assertIn('"user_id" = %s' % self.reader.pk,
+                          queries[0]['sql'])
+        self.assertIsNone(cache.get(follow_graph.following_key(
+            self.reader.pk
+        )))
+
+    def test_profile_and_follow_index_skip_follow_table(self):
+        Follow.objects.create(user=self.reader, author=self.author)
+        for user in (self.reader, self.author):
+            follow_graph.followed_authors(user.pk)
+        follow_graph.follower_count(self.author.pk)
+        client = self.client_class()
+        client.force_login(self.reader)
+        for url in (
+            reverse('posts:profile', args=('author',)),
+            reverse('posts:follow_index'),
+        ):
+            with self.subTest(url=url):
+                with CaptureQueriesContext(connection) as queries:
+                    response = client.get(url)
+                self.assertFalse([
+                    query for query in queries.captured_queries
+                    if 'posts_follow' in query['sql']
+                ])
+        response = client.get(reverse('posts:profile', args=('author',)))
+        self.assertTrue(response.context['following'])
+        self.assertEqual(response.context['follower_count'], 1)
+
+
+@override_settings(DATABASE_REPLICAS=['replica'])
+class FollowGraphReplicaTest(TransactionTestCase):
+    """Чтение подписок из основной БД не закрепляет за ней клиента."""
+    databases = {'default', 'replica'}
+
+    def test_feed_pages_not_pinned_to_primary(self):
+        reader = User.objects.create_user(username='reader')
+        author = User.objects.create_user(username='author')
+        Follow.objects.create(user=reader, author=author)
+        cache.clear()
+        self.client.force_login(reader)
+        routers.reset()
+        for url in (
+            reverse('posts:profile', args=('author',)),
+            reverse('posts:follow_index'),
+        ):
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, 200)
+                self.assertNotIn(PRIMARY_PIN_COOKIE, response.cookies)
+        self.assertTrue(
+            follow_graph.is_following(reader.pk, author.pk)
+        )
+
+
+class FollowGraphStatsCommandTest(TestCase):
+    def test_synthetic_graph_report(self):
+        out = StringIO()
+        call_command(
+            'follow_graph_stats', synthetic_edges=1000, users=100, stdout=out
+        )
+        self.assertIn('На 1 млн подписок', out.getvalue())
@@ -0,0 +1,122 @@
+from datetime import timedelta
+from http import HTTPStatus
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from posts.models import Follow, Group, Post, User
+from .. import constants
+from ..utils import decode_cursor, encode_cursor
+
+
+class FeedFragmentsTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='Noname')
+        cls.follower = User.objects.create_user(username='Follower')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        Follow.objects.create(user=cls.follower, author=cls.user)
+        now = timezone.now()
+        posts = []
+        # Явные даты, чтобы порядок ленты не зависел от скорости вставки.
+        for number in range(constants.NUMBER_OF_TEST_POSTS):
+            post = Post.objects.create(
+                text=f'Пост {number}', author=cls.user, group=cls.group
+            )
+            post.created = now - timedelta(minutes=number)
+            Post.objects.filter(pk=post.pk).update(created=post.created)
+            posts.append(post)
+        cls.posts = posts
+
+    def setUp(self):
+        cache.clear()
+        self.follower_client = self.client_class()
+        self.follower_client.force_login(self.follower)
+
+    def fragment_urls(self):
+        return {
+            reverse('posts:index_fragment'): self.client,
+            reverse('posts:group_list_fragment',
+                    args=(self.group.slug,)): self.client,
+            reverse('posts:profile_fragment',
+                    args=(self.user.username,)): self.client,
+            reverse('posts:follow_index_fragment'): self.follower_client,
+        }
+
+    def test_cursor_round_trip(self):
+        post = self.posts[0]
+        self.assertEqual(
+            decode_cursor(encode_cursor(post)), (post.created, post.pk)
+        )
+
+    def test_fragment_continues_after_cursor(self):
+        """Фрагмент отдаёт посты после курсора и адрес следующей порции."""
+        cursor = encode_cursor(self.posts[constants.PAGE_POSTS_NUMBER - 1])
+        for url, client in self.fragment_urls().items():
+            with self.subTest(url=url):
+                response = client.get(url, {'cursor': cursor})
+                self.assertEqual(response.status_code, HTTPStatus.OK)
+                self.assertContains(
+                    response, '<article>',
+                    count=(constants.NUMBER_OF_TEST_POSTS
+                           - constants.PAGE_POSTS_NUMBER)
+                )
+                self.assertContains(
+                    response, f'Пост {constants.PAGE_POSTS_NUMBER}'
+                )
+                self.assertNotIn('X-Next-Page', response)
+                self.assertNotContains(response, '<html')
+
+    def test_fragment_first_portion_links_next(self):
+        response = self.client.get(reverse('posts:index_fragment'))
+        self.assertContains(
+            response, '<article>', count=constants.PAGE_POSTS_NUMBER
+        )
+        cursor = encode_cursor(self.posts[constants.PAGE_POSTS_NUMBER - 1])
+        self.assertEqual(
+            response['X-Next-Page'],
+            reverse('posts:index_fragment') + f'?cursor={cursor}'
+        )
+
+    def test_fragment_is_single_query(self):
+        """Следующая порция ленты стоит одного запроса к БД."""
+        cursor = encode_cursor(self.posts[0])
+        with self.assertNumQueries(1):
+            self.client.get(
+                reverse('posts:profile_fragment', args=(self.user.username,)),
+                {'cursor': cursor}
+            )
+
+    def test_invalid_cursor(self):
+        for cursor in (
+            'bad', '99999999999999999999_1', '1_99999999999999999999'
+        ):
+            with self.subTest(cursor=cursor):
+                response = self.client.get(
+                    reverse('posts:index_fragment'), {'cursor': cursor}
+                )
+                self.assertEqual(
+                    response.status_code, HTTPStatus.BAD_REQUEST
+                )
+
+    def test_follow_fragment_requires_login(self):
+        response = self.client.get(reverse('posts:follow_index_fragment'))
+        self.assertEqual(response.status_code, HTTPStatus.FOUND)
+
+    def test_feed_page_links_fragment(self):
+        response = self.client.get(
+            reverse('posts:group_list', args=(self.group.slug,))
+        )
+        cursor = encode_cursor(self.posts[constants.PAGE_POSTS_NUMBER - 1])
+        self.assertEqual(
+            response.context['fragment_url'],
+            reverse('posts:group_list_fragment', args=(self.group.slug,))
+            + f'?cursor={cursor}'
+        )
+        self.assertContains(response, 'data-feed-more')
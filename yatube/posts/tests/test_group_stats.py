@@ -0,0 +1,67 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+
+from posts.models import Group, GroupStats, Post, User
+from posts.stats import refresh_group_stats
+
+
+class GroupStatsTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.busy = Group.objects.create(
+            title='Большая группа', slug='busy', description='Описание'
+        )
+        cls.empty = Group.objects.create(
+            title='Пустая группа', slug='empty', description='Описание'
+        )
+        authors = [
+            User.objects.create_user(username=name)
+            for name in ('anna', 'boris', 'vera', 'gleb')
+        ]
+        for author, count in zip(authors, (3, 1, 2, 1)):
+            for number in range(count):
+                Post.objects.create(
+                    text=f'Пост {number}', author=author, group=cls.busy
+                )
+        Post.objects.create(text='Без группы', author=authors[0])
+
+    def test_refresh(self):
+        self.assertEqual(refresh_group_stats(top_authors_number=3), 2)
+        busy = GroupStats.objects.get(group=self.busy)
+        self.assertEqual(busy.post_count, 7)
+        self.assertEqual(
+            busy.last_post_at,
+            Post.objects.filter(group=self.busy).latest('created').created,
+        )
+        self.assertEqual(busy.top_authors_list, ['anna', 'vera', 'boris'])
+        empty = GroupStats.objects.get(group=self.empty)
+        self.assertEqual(
+            (empty.post_count, empty.last_post_at, empty.top_authors_list),
+            (0, None, []),
+        )
+
+    def test_command_replaces_rows(self):
+        refresh_group_stats()
+        Post.objects.filter(group=self.busy).delete()
+        call_command('refresh_group_stats', stdout=StringIO())
+        self.assertEqual(GroupStats.objects.count(), 2)
+        self.assertEqual(
+            GroupStats.objects.get(group=self.busy).post_count, 0
+        )
+
+    def test_group_index_is_single_query(self):
+        refresh_group_stats()
+        Group.objects.create(title='Новая', slug='new', description='')
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('posts:group_index'))
+        self.assertEqual(
+            [group.slug for group in response.context['groups']],
+            ['busy', 'empty', 'new'],
+        )
+        self.assertContains(response, 'Постов: 7')
+        self.assertContains(
+            response, reverse('posts:profile', args=('anna',))
+        )
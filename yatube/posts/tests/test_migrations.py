@@ -0,0 +1,109 @@
+from django.db import connections
+from django.db.backends.sqlite3.base import DatabaseWrapper
+from django.db.migrations.loader import MigrationLoader
+from django.db.migrations.state import ProjectState
+from django.test import SimpleTestCase, override_settings
+
+SQUASHED = '0001_squashed_0025_post_created_index'
+SCHEMA_ALIAS = 'schema_check'
+
+
+# Тестовый профиль отключает миграции, здесь нужны файлы с диска.
+@override_settings(MIGRATION_MODULES={})
+class SquashedMigrationTest(SimpleTestCase):
+    """Сжатая миграция posts даёт ту же схему, что и вся цепочка."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        loader = MigrationLoader(None, load=False)
+        loader.load_disk()
+        cls.squashed = loader.disk_migrations[('posts', SQUASHED)]
+        cls.chain = [
+            loader.disk_migrations[key]
+            for key in sorted(cls.squashed.replaces)
+        ]
+
+    def test_squashed_migration_replaces_whole_chain(self):
+        loader = MigrationLoader(None, load=False)
+        loader.load_disk()
+        originals = {
+            key for key in loader.disk_migrations
+            if key[0] == 'posts' and key[1] != SQUASHED
+        }
+        self.assertEqual(set(self.squashed.replaces), originals)
+
+    def project_state(self, migrations):
+        state = ProjectState()
+        for migration in migrations:
+            state = migration.mutate_state(state, preserve=False)
+        return {
+            key: model for key, model in state.models.items()
+            if key[0] == 'posts'
+        }
+
+    def test_same_model_states(self):
+        chain = self.project_state(self.chain)
+        squashed = self.project_state([self.squashed])
+        self.assertEqual(sorted(chain), sorted(squashed))
+        for key, model in chain.items():
+            with self.subTest(model=key[1]):
+                self.assertEqual(squashed[key], model)
+
+    def migrated_schema(self, migrations):
+        """Таблицы, столбцы, индексы и внешние ключи новой БД SQLite."""
+        settings_dict = dict(connections['default'].settings_dict)
+        settings_dict['NAME'] = ':memory:'
+        connection = DatabaseWrapper(settings_dict, alias=SCHEMA_ALIAS)
+        # Редактор схемы открывает транзакцию по имени соединения.
+        connections[SCHEMA_ALIAS] = connection
+        # Модели auth берутся готовыми: на них ссылаются внешние ключи.
+        state = ProjectState(real_apps=['auth', 'contenttypes'])
+        try:
+            for migration in migrations:
+                with connection.schema_editor() as editor:
+                    state = migration.apply(state, editor)
+            return self.read_schema(connection)
+        finally:
+            connection.close()
+            del connections[SCHEMA_ALIAS]
+
+    def read_schema(self, connection):
+        schema = {}
+        with connection.cursor() as cursor:
+            tables = connection.introspection.table_names(cursor)
+            for table in tables:
+                cursor.execute(f'PRAGMA table_info("{table}")')
+                columns = sorted(
+                    (name, column_type, notnull, primary_key)
+                    for _, name, column_type, notnull, _, primary_key
+                    in cursor.fetchall()
+                )
+                cursor.execute(f'PRAGMA foreign_key_list("{table}")')
+                foreign_keys = sorted(
+                    (row[2], row[3], row[4]) for row in cursor.fetchall()
+                )
+                cursor.execute(f'PRAGMA index_list("{table}")')
+                indexes = []
+                for _, name, unique, origin, _ in cursor.fetchall():
+                    cursor.execute(f'PRAGMA index_xinfo("{name}")')
+                    index_columns = [
+                        (row[2], row[3]) for row in cursor.fetchall()
+                        if row[5]
+                    ]
+                    # Имена автоматических индексов зависят от порядка
+                    # ограничений в CREATE TABLE.
+                    if origin != 'c':
+                        name = None
+                    indexes.append((name, unique, origin, index_columns))
+                indexes.sort(key=repr)
+                schema[table] = (columns, foreign_keys, indexes)
+        return schema
+
+    def test_same_database_schema(self):
+        chain = self.migrated_schema(self.chain)
+        squashed = self.migrated_schema([self.squashed])
+        self.assertEqual(sorted(chain), sorted(squashed))
+        for table, definition in chain.items():
+            with self.subTest(table=table):
+                self.assertEqual(squashed[table], definition)
@@ -0,0 +1,194 @@
+from unittest import mock
+
+from django.contrib.admin import ACTION_CHECKBOX_NAME
+from django.db import connection, connections
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core import routers
+from posts import follow_graph, moderation
+from posts.models import Comment, Follow, Group, Post, PostRank, User
+
+
+class ModerationTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.spammer = User.objects.create_user(username='spammer')
+        cls.author = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(title='Группа', slug='group')
+        Post.objects.bulk_create(
+            Post(author=cls.spammer, text=f'Спам {number}')
+            for number in range(5)
+        )
+        cls.post = Post.objects.create(author=cls.author, text='Пост')
+        Comment.objects.bulk_create(
+            Comment(post=post, author=cls.spammer, text='Спам')
+            for post in Post.objects.all()
+        )
+        PostRank.objects.create(post=cls.post, score=1)
+
+    def test_move_posts_in_batches(self):
+        progress = []
+        with mock.patch('posts.moderation.invalidate_counts') as invalidate:
+            moved = moderation.move_posts(
+                self.spammer.posts.all(), self.group,
+                batch_size=2, progress=progress.append,
+            )
+        self.assertEqual(moved, 5)
+        self.assertEqual(progress, [2, 4, 5])
+        self.assertEqual(invalidate.call_count, 3)
+        self.assertEqual(self.group.posts.count(), 5)
+
+    def test_batch_is_one_update(self):
+        with CaptureQueriesContext(connection) as context:
+            moderation.move_posts(
+                self.spammer.posts.all(), None, batch_size=10
+            )
+        statements = [
+            query['sql'].split()[0] for query in context.captured_queries
+            if not query['sql'].startswith(('SAVEPOINT', 'RELEASE'))
+        ]
+        # Пачка id, один UPDATE на неё и пустая следующая пачка.
+        self.assertEqual(statements, ['SELECT', 'UPDATE', 'SELECT'])
+
+    def test_delete_posts_with_dependents(self):
+        with mock.patch('posts.moderation.invalidate_counts') as invalidate:
+            deleted = moderation.delete_posts(
+                Post.objects.all(), batch_size=4
+            )
+        self.assertEqual(deleted, 6)
+        self.assertEqual(invalidate.call_count, 2)
+        self.assertFalse(Post.objects.exists())
+        self.assertFalse(Comment.objects.exists())
+        self.assertFalse(PostRank.objects.exists())
+
+    def test_delete_comments_invalidates_counts(self):
+        with mock.patch('posts.moderation.invalidate_counts') as invalidate:
+            deleted = moderation.delete_comments(
+                Comment.objects.all(), batch_size=4
+            )
+        self.assertEqual(deleted, 6)
+        self.assertEqual(invalidate.call_count, 2)
+        self.assertFalse(Comment.objects.exists())
+
+    def test_delete_follows_invalidates_graph(self):
+        Follow.objects.create(user=self.spammer, author=self.author)
+        self.assertTrue(
+            follow_graph.is_following(self.spammer.pk, self.author.pk)
+        )
+        with mock.patch(
+                'posts.moderation.follow_graph.invalidate',
+                wraps=follow_graph.invalidate) as invalidate:
+            moderation.delete_follows(Follow.objects.all())
+        invalidate.assert_called_once_with(
+            {self.spammer.pk}, {self.author.pk}
+        )
+        self.assertFalse(
+            follow_graph.is_following(self.spammer.pk, self.author.pk)
+        )
+
+
+@override_settings(DATABASE_REPLICAS=['replica'])
+class ModerationReplicaTest(TransactionTestCase):
+    """С репликой пачки читаются и меняются только в основной БД."""
+    databases = {'default', 'replica'}
+
+    def setUp(self):
+        self.spammer = User.objects.create_user(username='spammer')
+        self.author = User.objects.create_user(username='author')
+        self.post = Post.objects.create(author=self.author, text='Пост')
+        Comment.objects.create(
+            post=self.post, author=self.spammer, text='Спам'
+        )
+        Follow.objects.create(user=self.spammer, author=self.author)
+        routers.reset()
+
+    def test_actions_use_primary(self):
+        group = Group.objects.create(title='Группа', slug='group')
+        routers.reset()
+        actions = (
+            (moderation.move_posts, Post.objects.all(), {'group': group}),
+            (moderation.delete_comments, Comment.objects.all(), {}),
+            (moderation.delete_follows, Follow.objects.all(), {}),
+            (moderation.delete_posts, Post.objects.all(), {}),
+        )
+        for action, queryset, kwargs in actions:
+            with self.subTest(action=action.__name__):
+                with CaptureQueriesContext(connections['replica']) as replica:
+                    with CaptureQueriesContext(connection) as primary:
+                        self.assertEqual(action(queryset, **kwargs), 1)
+                routers.reset()
+                self.assertEqual(replica.captured_queries, [])
+                self.assertTrue(any(
+                    query['sql'].startswith(('UPDATE', 'DELETE'))
+                    for query in primary.captured_queries
+                ))
+
+
+class ModerationAdminTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='pass'
+        )
+        cls.spammer = User.objects.create_user(username='spammer')
+        cls.group = Group.objects.create(title='Группа', slug='group')
+        Post.objects.bulk_create(
+            Post(author=cls.spammer, text=f'Спам {number}')
+            for number in range(3)
+        )
+        cls.post = Post.objects.create(author=cls.admin, text='Пост')
+        Comment.objects.create(
+            post=cls.post, author=cls.spammer, text='Спам'
+        )
+        Comment.objects.create(post=cls.post, author=cls.admin, text='Ответ')
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def action(self, model, action, objects, **data):
+        return self.client.post(
+            reverse(f'admin:posts_{model}_changelist'),
+            {
+                'action': action,
+                ACTION_CHECKBOX_NAME: [obj.pk for obj in objects],
+                **data,
+            },
+            follow=True,
+        )
+
+    def test_move_to_group(self):
+        posts = self.spammer.posts.all()
+        response = self.action(
+            'post', 'move_to_group', posts, group=self.group.pk
+        )
+        self.assertContains(response, 'Перенесено в группу «Группа»: 3')
+        self.assertEqual(self.group.posts.count(), 3)
+
+    def test_move_without_group(self):
+        response = self.action('post', 'move_to_group', [self.post])
+        self.assertContains(response, 'Выберите группу.')
+
+    def test_delete_author_posts(self):
+        self.action(
+            'post', 'delete_author_posts', [self.spammer.posts.first()]
+        )
+        self.assertEqual(list(Post.objects.all()), [self.post])
+
+    def test_delete_author_comments(self):
+        spam = Comment.objects.get(author=self.spammer)
+        response = self.action('comment', 'delete_author_comments', [spam])
+        self.assertContains(response, 'Удалено комментариев авторов: 1')
+        self.assertEqual(
+            list(Comment.objects.values_list('text', flat=True)), ['Ответ']
+        )
+
+    def test_delete_follows(self):
+        follow = Follow.objects.create(user=self.spammer, author=self.admin)
+        self.action('follow', 'delete_follows', [follow])
+        self.assertFalse(Follow.objects.exists())
+
+    def test_default_delete_action_removed(self):
+        response = self.client.get(reverse('admin:posts_post_changelist'))
+        self.assertNotContains(response, 'value="delete_selected"')
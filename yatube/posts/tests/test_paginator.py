@@ -0,0 +1,87 @@
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from posts.models import Post, User
+from ..utils import CachedCountPaginator
+
+
+class CachedCountPaginatorTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='Noname')
+        Post.objects.bulk_create(
+            Post(author=cls.user, text=f'Пост {number}')
+            for number in range(25)
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def paginator(self, queryset=None, **kwargs):
+        kwargs.setdefault('count_timeout', 30)
+        return CachedCountPaginator(
+            queryset if queryset is not None else Post.objects.all(),
+            10, **kwargs
+        )
+
+    def test_count_is_cached(self):
+        """Повторный подсчёт берётся из кэша без запроса к БД."""
+        self.assertEqual(self.paginator().count, 25)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.paginator().count, 25)
+
+    def test_count_invalidated_on_new_post(self):
+        self.assertEqual(self.paginator().count, 25)
+        post = Post.objects.create(author=self.user, text='Новый пост')
+        self.assertEqual(self.paginator().count, 26)
+        post.delete()
+        self.assertEqual(self.paginator().count, 25)
+
+    def test_querysets_have_separate_counts(self):
+        self.assertEqual(self.paginator().count, 25)
+        self.assertEqual(
+            self.paginator(Post.objects.filter(text='Пост 1')).count, 1
+        )
+
+    def test_approximate_count_for_huge_table(self):
+        """Для большой таблицы без фильтров COUNT(*) не выполняется."""
+        max_pk = max(Post.objects.values_list('pk', flat=True))
+        Post.objects.filter(text='Пост 0').delete()
+        paginator = self.paginator(approximate_threshold=10)
+        with self.assertNumQueries(1) as context:
+            self.assertEqual(paginator.count, max_pk)
+        self.assertNotIn('COUNT', context.captured_queries[0]['sql'])
+
+    def test_filtered_queryset_count_is_exact(self):
+        paginator = self.paginator(
+            self.user.posts.all(), approximate_threshold=10
+        )
+        self.assertEqual(paginator.count, 25)
+
+    def test_elided_page_range(self):
+        paginator = CachedCountPaginator(range(1000), 10)
+        ellipsis = paginator.ELLIPSIS
+        self.assertEqual(
+            list(paginator.get_elided_page_range(50)),
+            [1, ellipsis, 48, 49, 50, 51, 52, ellipsis, 100]
+        )
+        self.assertEqual(
+            list(paginator.get_elided_page_range(1)),
+            [1, 2, 3, ellipsis, 100]
+        )
+        self.assertEqual(
+            list(CachedCountPaginator(range(30), 10).get_elided_page_range()),
+            [1, 2, 3]
+        )
+
+    def test_index_renders_page_window(self):
+        """Главная выводит окно ссылок, а не все страницы."""
+        Post.objects.bulk_create(
+            Post(author=self.user, text='Пост') for _ in range(200)
+        )
+        response = self.client.get(reverse('posts:index') + '?page=12')
+        self.assertContains(response, '?page=13')
+        self.assertNotContains(response, '?page=5"')
+        self.assertContains(response, CachedCountPaginator.ELLIPSIS)
@@ -0,0 +1,70 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from posts.models import Comment, Follow, Post, PostRank, User
+from posts.ranking import rank_posts
+
+
+class PostRankingTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.star = User.objects.create_user(username='star')
+        cls.newbie = User.objects.create_user(username='newbie')
+        for number in range(5):
+            Follow.objects.create(
+                user=User.objects.create_user(username=f'fan{number}'),
+                author=cls.star,
+            )
+        cls.now = timezone.now()
+        cls.quiet = cls.create_post('Тихий', cls.newbie, hours=1)
+        cls.discussed = cls.create_post('Обсуждаемый', cls.newbie, hours=1)
+        cls.famous = cls.create_post('От звезды', cls.star, hours=1)
+        cls.old = cls.create_post('Старый', cls.star, hours=24 * 30)
+        for number in range(3):
+            Comment.objects.create(
+                post=cls.discussed, author=cls.star, text=f'Ответ {number}'
+            )
+
+    @classmethod
+    def create_post(cls, text, author, hours):
+        post = Post.objects.create(text=text, author=author)
+        Post.objects.filter(pk=post.pk).update(
+            created=cls.now - timedelta(hours=hours)
+        )
+        return post
+
+    def setUp(self):
+        cache.clear()
+
+    def ranked(self):
+        return list(
+            PostRank.objects.order_by('-score')
+            .values_list('post__text', flat=True)
+        )
+
+    def test_comments_and_followers_raise_score(self):
+        self.assertEqual(rank_posts(batch_size=2, now=self.now), 3)
+        self.assertEqual(self.ranked(), ['Обсуждаемый', 'От звезды', 'Тихий'])
+
+    def test_scores_decay_and_old_posts_drop_out(self):
+        rank_posts(now=self.now)
+        fresh = PostRank.objects.get(post=self.quiet).score
+        rank_posts(now=self.now + timedelta(hours=5))
+        self.assertLess(PostRank.objects.get(post=self.quiet).score, fresh)
+        call_command('rank_posts', stdout=StringIO())
+        rank_posts(now=self.now + timedelta(days=10))
+        self.assertEqual(PostRank.objects.count(), 0)
+
+    def test_popular_feed_reads_ranks(self):
+        rank_posts(now=self.now)
+        response = self.client.get(reverse('posts:popular'))
+        self.assertEqual(
+            [post.text for post in response.context['page_obj']],
+            ['Обсуждаемый', 'От звезды', 'Тихий'],
+        )
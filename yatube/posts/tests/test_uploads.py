@@ -0,0 +1,103 @@
+import hashlib
+import os
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+
+from core.uploads import StreamingUploadHandler
+from posts.models import Post, User
+from .utils import get_temporary_image
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+# Перенос временного файла проверяется на настоящем хранилище на диске.
+@override_settings(
+    MEDIA_ROOT=TEMP_MEDIA_ROOT,
+    DEFAULT_FILE_STORAGE='django.core.files.storage.FileSystemStorage',
+)
+class StreamingUploadTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='Noname')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.authorized_client = self.client_class()
+        self.authorized_client.force_login(self.user)
+
+    def create(self, image):
+        return self.authorized_client.post(
+            reverse('posts:post_create'),
+            {'text': 'Пост с картинкой', 'image': image},
+        )
+
+    def test_image_is_moved_into_storage(self):
+        image = get_temporary_image()
+        content = image.read()
+        image.seek(0)
+        response = self.create(image)
+        self.assertEqual(response.status_code, 302)
+        post = Post.objects.get()
+        self.assertEqual(post.image.name, 'posts/small.gif')
+        with post.image.open('rb') as stored:
+            self.assertEqual(stored.read(), content)
+        # Файл читается веб-сервером, хотя временный был 0600.
+        self.assertEqual(os.stat(post.image.path).st_mode & 0o777, 0o644)
+        # Временный файл перенесён в хранилище, а не скопирован.
+        self.assertEqual(
+            os.listdir(os.path.join(TEMP_MEDIA_ROOT, '.uploads')), []
+        )
+
+    def test_handler_hashes_chunks(self):
+        content = get_temporary_image().read()
+        handler = StreamingUploadHandler(RequestFactory().post('/'))
+        handler.handle_raw_input(None, {}, len(content), 'boundary')
+        handler.new_file('image', 'small.gif', 'image/gif', len(content))
+        for start in range(0, len(content), 10):
+            handler.receive_data_chunk(content[start:start + 10], start)
+        uploaded = handler.file_complete(len(content))
+        self.assertEqual(uploaded.sha256, hashlib.sha256(content).hexdigest())
+        self.assertEqual(uploaded.read(), content)
+        self.assertEqual(
+            os.path.dirname(uploaded.temporary_file_path()),
+            os.path.join(TEMP_MEDIA_ROOT, '.uploads'),
+        )
+        uploaded.close()
+
+    def test_not_an_image_rejected(self):
+        response = self.create(
+            SimpleUploadedFile('fake.gif', b'<?php echo 1; ?>' * 10)
+        )
+        self.assertFormError(
+            response, 'form', 'image',
+            'Загрузите картинку в формате JPEG, PNG, GIF или WebP.'
+        )
+        self.assertFalse(Post.objects.exists())
+
+    @override_settings(UPLOAD_MAX_SIZE=20)
+    def test_too_large_file_rejected(self):
+        response = self.create(get_temporary_image())
+        self.assertFormError(
+            response, 'form', 'image', 'Файл больше 20\xa0байт.'
+        )
+        self.assertFalse(Post.objects.exists())
+
+    @override_settings(UPLOAD_MAX_SIZE=20, DATA_UPLOAD_MAX_MEMORY_SIZE=100)
+    def test_too_large_body_stops_before_reading(self):
+        response = self.create(
+            SimpleUploadedFile('big.gif', b'GIF89a' + b'\0' * 1000)
+        )
+        self.assertFormError(
+            response, 'form', 'image', 'Файл больше 20\xa0байт.'
+        )
+        self.assertFalse(Post.objects.exists())
@@ -280,6 +280,10 @@ class PostsPagesTest(TestCase):
 
     def test_cache_index_page(self):
         """При вызове index.html данные сохраняются в кэш."""
+        # Страница кэшируется до появления поста независимо от того,
+        # какие тесты выполнялись раньше в этом процессе.
+        cache.clear()
+        self.client.get(reverse('posts:index'))
         new_post = Post.objects.create(
             author=self.user,
             text='Проверяем кэш',
@@ -1,11 +1,13 @@
 from django.urls import path
 
-from . import views
+from . import feeds, views
 
 app_name = 'posts'
 
 urlpatterns = [
     path('', views.index, name='index'),
+    path('popular/', views.popular, name='popular'),
+    path('group/', views.group_index, name='group_index'),
     path('group/<slug:slug>/', views.group_posts, name='group_list'),
     path('profile/<str:username>/', views.profile, name='profile'),
     path('posts/<int:post_id>/edit/', views.post_edit, name='post_edit'),
@@ -14,8 +16,35 @@ urlpatterns = [
     path('posts/<int:post_id>/', views.post_detail, name='post_detail'),
     path('create/', views.post_create, name='post_create'),
     path('follow/', views.follow_index, name='follow_index'),
+    path('follow/bulk/', views.follow_bulk, name='follow_bulk'),
     path('profile/<str:username>/follow/',
          views.profile_follow, name='profile_follow'),
     path('profile/<str:username>/unfollow/',
          views.profile_unfollow, name='profile_unfollow'),
+    path('fragments/', views.index_fragment, name='index_fragment'),
+    path('fragments/group/<slug:slug>/',
+         views.group_posts_fragment, name='group_list_fragment'),
+    path('fragments/profile/<str:username>/',
+         views.profile_fragment, name='profile_fragment'),
+    path('fragments/follow/',
+         views.follow_index_fragment, name='follow_index_fragment'),
+    path('events/', views.events, name='events'),
+    path('feed/rss/',
+         feeds.cached_feed(feeds.LatestPostsFeed), name='feed_rss'),
+    path('feed/atom/',
+         feeds.cached_feed(feeds.LatestPostsAtomFeed), name='feed_atom'),
+    path('group/<slug:slug>/rss/',
+         feeds.cached_feed(feeds.GroupPostsFeed), name='group_feed_rss'),
+    path('group/<slug:slug>/atom/',
+         feeds.cached_feed(feeds.GroupPostsAtomFeed),
+         name='group_feed_atom'),
+    path('profile/<str:username>/rss/',
+         feeds.cached_feed(feeds.AuthorPostsFeed),
+         name='profile_feed_rss'),
+    path('profile/<str:username>/atom/',
+         feeds.cached_feed(feeds.AuthorPostsAtomFeed),
+         name='profile_feed_atom'),
+    path('sitemap.xml', views.sitemap_index, name='sitemap_index'),
+    path('sitemap-posts-<int:year>-<int:month>.xml',
+         views.sitemap_chunk, name='sitemap_chunk'),
 ]
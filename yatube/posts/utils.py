@@ -1,11 +1,185 @@
+import hashlib
+from datetime import datetime, timedelta
+
+from django.core.cache import cache
+from django.core.exceptions import EmptyResultSet
 from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.functional import cached_property
+from django.utils.http import urlencode
 
 from . import constants
 
+COUNTS_VERSION_KEY = 'posts:counts_version'
+CURSOR_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+MAX_PK = 2 ** 63 - 1
+
+
+def get_counts_version():
+    """Текущее поколение закэшированных счётчиков."""
+    cache.add(COUNTS_VERSION_KEY, 1, None)
+    return cache.get(COUNTS_VERSION_KEY, 1)
+
+
+def invalidate_counts():
+    """Сбросить все закэшированные счётчики постов и подписок."""
+    try:
+        cache.incr(COUNTS_VERSION_KEY)
+    except ValueError:
+        cache.set(COUNTS_VERSION_KEY, 1, None)
+
+
+def estimate_count(queryset):
+    """Оценка числа строк таблицы без полного COUNT(*).
+
+    Возвращает None, если запрос отфильтрован или СУБД не умеет
+    быстро оценивать размер таблицы.
+    """
+    if queryset.query.where:
+        return None
+    connection = connections[queryset.db]
+    table = queryset.model._meta.db_table
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute(
+                'SELECT reltuples::bigint FROM pg_class WHERE relname = %s',
+                [table]
+            )
+        elif connection.vendor == 'sqlite':
+            # MAX(rowid) читается из B-дерева за O(log n).
+            cursor.execute(
+                f'SELECT MAX(rowid) FROM {connection.ops.quote_name(table)}'
+            )
+        else:
+            return None
+        row = cursor.fetchone()
+    if row is None or row[0] is None:
+        return None
+    return int(row[0])
+
+
+class CachedCountPaginator(Paginator):
+    """Пагинатор с кэшируемым и, для огромных таблиц, приблизительным
+    числом объектов.
+
+    Счётчик хранится в кэше по ключу из SQL-запроса и сбрасывается
+    через ``invalidate_counts`` при создании и удалении постов.
+    """
+    ELLIPSIS = '…'
+
+    def __init__(self, object_list, per_page, count_timeout=None,
+                 approximate_threshold=None, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.count_timeout = count_timeout
+        self.approximate_threshold = approximate_threshold
+
+    def _count_cache_key(self):
+        query = f'{self.object_list.db}:{self.object_list.query}'
+        digest = hashlib.md5(query.encode()).hexdigest()
+        return f'posts:count:{get_counts_version()}:{digest}'
+
+    @cached_property
+    def count(self):
+        if self.count_timeout is None:
+            return super().count
+        try:
+            key = self._count_cache_key()
+        except EmptyResultSet:
+            # Например, фильтр по пустому списку id: запрос не нужен.
+            return 0
+        count = cache.get(key)
+        if count is None:
+            if self.approximate_threshold is not None:
+                count = estimate_count(self.object_list)
+                if count is not None and count < self.approximate_threshold:
+                    count = None
+            if count is None:
+                count = self.object_list.count()
+            cache.set(key, count, self.count_timeout)
+        return count
+
+    def get_elided_page_range(self, number=1, on_each_side=2, on_ends=1):
+        """Номера страниц вокруг текущей и по краям, остальное - ELLIPSIS.
+
+        Например: 1 … 48 49 50 51 52 … 100.
+        """
+        number = self.validate_number(number)
+        if self.num_pages <= (on_each_side + on_ends) * 2:
+            yield from self.page_range
+            return
+        if number > 1 + on_each_side + on_ends + 1:
+            yield from range(1, on_ends + 1)
+            yield self.ELLIPSIS
+            yield from range(number - on_each_side, number + 1)
+        else:
+            yield from range(1, number + 1)
+        if number < self.num_pages - on_each_side - on_ends - 1:
+            yield from range(number + 1, number + on_each_side + 1)
+            yield self.ELLIPSIS
+            yield from range(self.num_pages - on_ends + 1, self.num_pages + 1)
+        else:
+            yield from range(number + 1, self.num_pages + 1)
+
 
 def post_paginator(request, post_list):
-    paginator = Paginator(post_list, constants.PAGE_POSTS_NUMBER)
+    paginator = CachedCountPaginator(
+        post_list,
+        constants.PAGE_POSTS_NUMBER,
+        count_timeout=constants.PAGE_COUNT_CACHE_TIMEOUT,
+        approximate_threshold=constants.APPROXIMATE_COUNT_THRESHOLD,
+    )
     page_number = request.GET.get('page')
     page_obj = paginator.get_page(page_number)
+    page_obj.elided_page_range = list(
+        paginator.get_elided_page_range(page_obj.number)
+    )
 
     return page_obj
+
+
+def encode_cursor(post):
+    """Курсор ленты: время создания в микросекундах и id поста."""
+    microseconds = (post.created - CURSOR_EPOCH) // timedelta(microseconds=1)
+    return f'{microseconds}_{post.pk}'
+
+
+def decode_cursor(cursor):
+    """Разобрать курсор; при неверном формате - ValueError."""
+    microseconds, pk = cursor.split('_')
+    try:
+        created = CURSOR_EPOCH + timedelta(microseconds=int(microseconds))
+    except OverflowError as error:
+        raise ValueError(f'Неверный курсор: {cursor}') from error
+    pk = int(pk)
+    # Больший id не поместится в целое SQLite и упадёт в запросе.
+    if not 0 < pk <= MAX_PK:
+        raise ValueError(f'Неверный курсор: {cursor}')
+    return created, pk
+
+
+def cursor_page(post_list, cursor=None, size=constants.PAGE_POSTS_NUMBER):
+    """Посты ленты после курсора (keyset-пагинация без OFFSET и COUNT).
+
+    Возвращает список постов и курсор следующей порции или None.
+    """
+    post_list = post_list.select_related('author', 'group').order_by(
+        '-created', '-pk'
+    )
+    if cursor:
+        created, pk = decode_cursor(cursor)
+        post_list = post_list.filter(
+            Q(created__lt=created) | Q(created=created, pk__lt=pk)
+        )
+    posts = list(post_list[:size + 1])
+    next_cursor = encode_cursor(posts[size - 1]) if len(posts) > size else None
+
+    return posts[:size], next_cursor
+
+
+def fragment_url(url, page_obj):
+    """Адрес фрагмента с постами, следующими за текущей страницей."""
+    if not page_obj.has_next():
+        return None
+    return f'{url}?{urlencode({"cursor": encode_cursor(page_obj[-1])})}'
@@ -1,30 +1,85 @@
+import hashlib
+from datetime import datetime
+
 from django.contrib.auth.decorators import login_required
+from django.core.cache import cache
+from django.db.models import F
+from django.http import (
+    Http404, HttpResponse, HttpResponseBadRequest, JsonResponse
+)
 from django.shortcuts import get_object_or_404, redirect, render
+from django.template.loader import render_to_string
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
 from django.views.decorators.cache import cache_page
-
-from posts.utils import post_paginator
+from django.views.decorators.http import require_POST
+
+from core.events import MAX_TOPICS
+from core.ratelimit import ratelimit
+from posts.utils import cursor_page, fragment_url, post_paginator
+from . import follow_graph, sitemaps
+from .constants import (
+    FOLLOW_BULK_LIMIT, FOLLOWED_AUTHORS_IN_LIMIT, SITEMAP_CACHE_TIMEOUT
+)
+from .events import (
+    EVENT_KINDS, poll_events, publish_comment, publish_post
+)
+from .follows import (
+    discard_suggestions, follow_authors, get_follow_suggestions,
+    unfollow_authors
+)
 from .forms import CommentForm, PostForm
 from .models import Group, Post, User, Follow
+from .tasks import generate_thumbnails
 
 
 @cache_page(20, key_prefix='index_page')
 def index(request):
     """Последние посты на сайте"""
     post_list = Post.objects.all()
+    page_obj = post_paginator(request, post_list)
     context = {
-        'page_obj': post_paginator(request, post_list),
+        'page_obj': page_obj,
+        'fragment_url': fragment_url(
+            reverse('posts:index_fragment'), page_obj),
+        'live_topics': ['feed'],
     }
 
     return render(request, 'posts/index.html', context)
 
 
+def popular(request):
+    """Популярные посты по рейтингу из таблицы PostRank"""
+    post_list = Post.objects.filter(rank__isnull=False).order_by(
+        '-rank__score', '-pk'
+    )
+    page_obj = post_paginator(request, post_list)
+
+    return render(request, 'posts/popular.html', {'page_obj': page_obj})
+
+
+def group_index(request):
+    """Каталог групп со сводкой из таблицы статистики"""
+    groups = Group.objects.select_related('stats').order_by(
+        F('stats__post_count').desc(nulls_last=True), 'title'
+    )
+
+    return render(request, 'posts/group_index.html', {'groups': groups})
+
+
 def group_posts(request, slug):
     """Список постов группы"""
     group = get_object_or_404(Group, slug=slug)
     group_posts_list = group.posts.all()
+    page_obj = post_paginator(request, group_posts_list)
     context = {
-        'page_obj': post_paginator(request, group_posts_list),
-        'group': group
+        'page_obj': page_obj,
+        'group': group,
+        'fragment_url': fragment_url(
+            reverse('posts:group_list_fragment', args=(slug,)), page_obj),
+        'live_topics': [f'group:{slug}'],
     }
 
     return render(request, 'posts/group_list.html', context)
@@ -36,14 +91,20 @@ def profile(request, username):
     author_posts_list = author.posts.all()
     following = False
     if request.user.is_authenticated:
-        following = Follow.objects.filter(
-            user_id=request.user.pk,
-            author_id=author.pk).exists()
+        following = follow_graph.is_following(request.user.pk, author.pk)
+    page_obj = post_paginator(request, author_posts_list)
     context = {
-        'page_obj': post_paginator(request, author_posts_list),
+        'page_obj': page_obj,
         'author': author,
-        'following': following
+        'following': following,
+        'follower_count': follow_graph.follower_count(author.pk),
+        'following_count': follow_graph.following_count(author.pk),
+        'fragment_url': fragment_url(
+            reverse('posts:profile_fragment', args=(username,)), page_obj),
+        'live_topics': [f'author:{username}'],
     }
+    if request.user == author:
+        context['suggestions'] = get_follow_suggestions(request.user)
 
     return render(request, 'posts/profile.html', context)
 
@@ -56,13 +117,15 @@ def post_detail(request, post_id):
     context = {
         'post': post,
         'form': form,
-        'comments': comments
+        'comments': comments,
+        'live_topics': [f'post:{post.pk}'],
     }
 
     return render(request, 'posts/post_detail.html', context)
 
 
 @login_required
+@ratelimit('add_comment', methods=('POST',))
 def add_comment(request, post_id):
     """Добавление комментария."""
     post = get_object_or_404(Post, pk=post_id)
@@ -72,6 +135,7 @@ def add_comment(request, post_id):
         comment.author = request.user
         comment.post = post
         comment.save()
+        publish_comment(comment)
 
         return redirect('posts:post_detail', post_id=post_id)
 
@@ -79,16 +143,21 @@ def add_comment(request, post_id):
 
 
 @login_required
+@ratelimit('post_create', methods=('POST',))
 def post_create(request):
     """Создание нового поста."""
     form = PostForm(
         request.POST or None,
         files=request.FILES or None,
+        upload_error=getattr(request, 'upload_error', None),
     )
     if form.is_valid():
         post = form.save(commit=False)
         post.author = request.user
         post.save()
+        publish_post(post)
+        if post.image:
+            generate_thumbnails.delay(post.pk)
 
         return redirect('posts:profile', username=post.author)
 
@@ -104,12 +173,15 @@ def post_edit(request, post_id):
     form = PostForm(
         request.POST or None,
         files=request.FILES or None,
-        instance=post
+        instance=post,
+        upload_error=getattr(request, 'upload_error', None),
     )
     if form.is_valid():
         post = form.save(commit=False)
         post.author = request.user
         post.save()
+        if 'image' in form.changed_data and post.image:
+            generate_thumbnails.delay(post.pk)
 
         return redirect('posts:post_detail', post_id)
 
@@ -122,19 +194,35 @@ def post_edit(request, post_id):
     return render(request, 'posts/create_post.html', context)
 
 
+def followed_posts(user):
+    """Посты избранных авторов: id авторов берутся из графа подписок."""
+    author_ids = follow_graph.followed_authors(user.pk)
+    if len(author_ids) > FOLLOWED_AUTHORS_IN_LIMIT:
+        return Post.objects.filter(author__following__user=user)
+    return Post.objects.filter(author_id__in=author_ids)
+
+
 @login_required
 def follow_index(request):
     """Список постов авторов, на которых подписался пользователь."""
+    page_obj = post_paginator(request, followed_posts(request.user))
     context = {
-        'page_obj': post_paginator(
-            request,
-            Post.objects.filter(author__following__user=request.user))
+        'page_obj': page_obj,
+        'fragment_url': fragment_url(
+            reverse('posts:follow_index_fragment'), page_obj),
+        'live_topics': [
+            f'author:{username}' for username in User.objects.filter(
+                pk__in=follow_graph.followed_authors(
+                    request.user.pk)[:MAX_TOPICS]
+            ).values_list('username', flat=True)
+        ],
     }
 
     return render(request, 'posts/follow.html', context)
 
 
 @login_required
+@ratelimit('follow')
 def profile_follow(request, username):
     """Подписаться на автора поста."""
     author = get_object_or_404(User, username=username)
@@ -142,11 +230,13 @@ def profile_follow(request, username):
             user_id=request.user.pk,
             author_id=author.pk).exists() and author != request.user:
         Follow(user_id=request.user.pk, author_id=author.pk).save()
+        discard_suggestions(request.user, [author.pk])
 
     return redirect('posts:follow_index')
 
 
 @login_required
+@ratelimit('follow')
 def profile_unfollow(request, username):
     """Отписаться от автора."""
     Follow.objects.filter(
@@ -154,3 +244,164 @@ def profile_unfollow(request, username):
         author__username=username).delete()
 
     return redirect('posts:follow_index')
+
+
+@login_required
+@require_POST
+def follow_bulk(request):
+    """Подписаться на нескольких авторов или отписаться от них."""
+    usernames = request.POST.getlist('username')
+    action = request.POST.get('action')
+    if (action not in ('follow', 'unfollow') or not usernames
+            or len(usernames) > FOLLOW_BULK_LIMIT):
+        return HttpResponseBadRequest('Неверный запрос')
+    if action == 'follow':
+        follow_authors(request.user, usernames)
+    else:
+        unfollow_authors(request.user, usernames)
+
+    return redirect('posts:follow_index')
+
+
+def feed_fragment(request, post_list, url, group=None):
+    """Порция карточек ленты после курсора, без базового шаблона.
+
+    Адрес следующей порции передаётся в заголовке X-Next-Page.
+    Для ленты группы карточки, как и на странице группы, не ссылаются
+    на саму группу.
+    """
+    try:
+        posts, next_cursor = cursor_page(post_list, request.GET.get('cursor'))
+    except ValueError:
+        return HttpResponseBadRequest('Неверный курсор')
+    response = HttpResponse(render_to_string(
+        'posts/includes/post_list.html', {'posts': posts, 'group': group}
+    ))
+    if next_cursor:
+        response['X-Next-Page'] = f'{url}?cursor={next_cursor}'
+
+    return response
+
+
+def index_fragment(request):
+    """Следующие посты главной страницы."""
+    return feed_fragment(
+        request, Post.objects.all(), reverse('posts:index_fragment'))
+
+
+def group_posts_fragment(request, slug):
+    """Следующие посты группы."""
+    return feed_fragment(
+        request,
+        Post.objects.filter(group__slug=slug),
+        reverse('posts:group_list_fragment', args=(slug,)),
+        group=slug,
+    )
+
+
+def profile_fragment(request, username):
+    """Следующие посты автора."""
+    return feed_fragment(
+        request,
+        Post.objects.filter(author__username=username),
+        reverse('posts:profile_fragment', args=(username,)),
+    )
+
+
+@login_required
+def follow_index_fragment(request):
+    """Следующие посты избранных авторов."""
+    return feed_fragment(
+        request,
+        followed_posts(request.user),
+        reverse('posts:follow_index_fragment'),
+    )
+
+
+def events(request):
+    """Опрос новых событий для клиентов без Server-Sent Events."""
+    after = {
+        kind: request.GET.get(f'{kind}_after') for kind in EVENT_KINDS
+    }
+    try:
+        if all(value is None for value in after.values()):
+            after = None
+        else:
+            after = {kind: int(value) for kind, value in after.items()}
+        new_events, last = poll_events(request.GET.getlist('topic'), after)
+    except (TypeError, ValueError):
+        return HttpResponseBadRequest('Неверный запрос')
+
+    return JsonResponse({'events': new_events, 'last': last})
+
+
+def sitemap_index(request):
+    """Индекс карты сайта: страницы частей по месяцам и время изменения."""
+    starts = sitemaps.chunk_starts()
+    versions = sitemaps.get_chunk_versions(starts)
+    pages = sitemaps.get_chunk_pages(versions)
+    chunks = []
+    for start in starts:
+        location = request.build_absolute_uri(reverse(
+            'posts:sitemap_chunk', args=(start.year, start.month)
+        ))
+        lastmod = datetime.fromtimestamp(versions[start], timezone.utc)
+        chunks.append((location, lastmod))
+        chunks.extend(
+            (f'{location}?p={page}', lastmod)
+            for page in range(2, pages[start] + 1)
+        )
+    content = render_to_string(
+        'posts/sitemap_index.xml', {'chunks': chunks}
+    )
+    etag = '"{}"'.format(hashlib.md5(content.encode()).hexdigest())
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = HttpResponse(content, content_type='application/xml')
+    response['ETag'] = etag
+    return response
+
+
+def sitemap_chunk(request, year, month):
+    """Часть карты сайта: посты одного месяца, страница ``p``.
+
+    Строится заново, только если посты месяца менялись.
+    """
+    try:
+        start = datetime(year, month, 1, tzinfo=timezone.utc)
+        page = int(request.GET.get('p', 1))
+    except (ValueError, OverflowError):
+        raise Http404
+    # Поколение заводится только для месяцев с постами: иначе любой
+    # обходчик наплодит вечных ключей.
+    if start not in sitemaps.chunk_starts():
+        raise Http404
+    version = sitemaps.get_chunk_versions([start])[start]
+    if not 1 <= page <= sitemaps.get_chunk_pages({start: version})[start]:
+        raise Http404
+    name = f'{sitemaps.chunk_name(start)}-{page}'
+    # Адреса в части абсолютные, поэтому ETag у каждого хоста свой.
+    etag = f'"{request.get_host()}-{name}-{int(version * 1000)}"'
+    response = get_conditional_response(
+        request, etag=etag, last_modified=int(version)
+    )
+    if response is None:
+        key = f'posts:sitemap:{request.get_host()}:{name}:{version}'
+        content = cache.get(key)
+        if content is None:
+            urls = [
+                (request.build_absolute_uri(
+                    reverse('posts:post_detail', args=(pk,))
+                ), created)
+                for pk, created in sitemaps.page_posts(
+                    start, page
+                ).values_list('pk', 'created')
+            ]
+            if not urls:
+                raise Http404
+            content = render_to_string('posts/sitemap.xml', {'urls': urls})
+            cache.set(key, content, SITEMAP_CACHE_TIMEOUT)
+        response = HttpResponse(content, content_type='application/xml')
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(version)
+    return response
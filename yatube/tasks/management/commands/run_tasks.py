@@ -0,0 +1,84 @@
+import multiprocessing
+import signal
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connections
+
+from tasks.queue import claim_tasks, execute_task, requeue_stale_tasks
+
+
+def run_claimed_task(pk):
+    close_old_connections()
+    try:
+        return execute_task(pk)
+    finally:
+        close_old_connections()
+
+
+def work(threads, poll_interval, once, stop):
+    """Цикл обработчика: забрать задачи и выполнить их в пуле потоков."""
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        while not stop.is_set():
+            close_old_connections()
+            requeue_stale_tasks()
+            claimed = claim_tasks(threads)
+            if claimed:
+                list(executor.map(run_claimed_task, claimed))
+            elif once:
+                return
+            else:
+                stop.wait(poll_interval)
+
+
+class Command(BaseCommand):
+    help = 'Выполнять задачи из очереди.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--processes', type=int, default=1,
+            help='Число процессов-обработчиков.'
+        )
+        parser.add_argument(
+            '--threads', type=int, default=4,
+            help='Число потоков в каждом процессе.'
+        )
+        parser.add_argument(
+            '--poll-interval', type=float, default=1.0,
+            help='Пауза в секундах, когда очередь пуста.'
+        )
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Выполнить готовые задачи и завершиться.'
+        )
+
+    def handle(self, *args, **options):
+        context = multiprocessing.get_context('fork')
+        stop = context.Event()
+        signal.signal(signal.SIGTERM, lambda *_: stop.set())
+        arguments = (
+            options['threads'], options['poll_interval'], options['once'],
+            stop,
+        )
+        if options['processes'] == 1:
+            work(*arguments)
+            return
+        # Соединения с БД нельзя делить между процессами.
+        connections.close_all()
+        workers = [
+            context.Process(target=work, args=arguments)
+            for _ in range(options['processes'])
+        ]
+        for worker in workers:
+            worker.start()
+        self.stdout.write(
+            f'Запущено {len(workers)} процессов по {options["threads"]} '
+            f'потоков'
+        )
+        try:
+            for worker in workers:
+                worker.join()
+        except KeyboardInterrupt:
+            stop.set()
+            for worker in workers:
+                worker.join()
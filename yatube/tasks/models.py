@@ -0,0 +1,55 @@
+from django.db import models
+from django.utils import timezone
+
+from core.models import CreatedModel
+
+
+class Task(CreatedModel):
+    """Класс: отложенная задача в очереди."""
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUS_CHOICES = (
+        (PENDING, 'В очереди'),
+        (RUNNING, 'Выполняется'),
+        (DONE, 'Выполнена'),
+        (FAILED, 'Ошибка'),
+    )
+
+    name = models.CharField(max_length=200, verbose_name='Задача')
+    arguments = models.TextField(
+        default='{}',
+        verbose_name='Аргументы',
+        help_text='Позиционные и именованные аргументы в JSON'
+    )
+    status = models.CharField(
+        max_length=10,
+        choices=STATUS_CHOICES,
+        default=PENDING,
+        verbose_name='Статус'
+    )
+    attempts = models.PositiveIntegerField(
+        default=0, verbose_name='Число попыток'
+    )
+    max_retries = models.PositiveIntegerField(
+        default=0, verbose_name='Число повторов при ошибке'
+    )
+    run_after = models.DateTimeField(
+        default=timezone.now, verbose_name='Выполнить не раньше'
+    )
+    updated = models.DateTimeField(auto_now=True, verbose_name='Обновлена')
+    last_error = models.TextField(blank=True, verbose_name='Последняя ошибка')
+
+    class Meta:
+        ordering = ('run_after',)
+        verbose_name = 'Задача'
+        verbose_name_plural = 'Задачи'
+        indexes = (
+            models.Index(
+                fields=('status', 'run_after'), name='task_status_run_idx'
+            ),
+        )
+
+    def __str__(self):
+        return f'{self.name} ({self.get_status_display()})'
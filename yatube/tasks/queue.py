@@ -0,0 +1,160 @@
+"""Лёгкая очередь задач, хранящаяся в базе данных.
+
+Задача объявляется декоратором ``task`` в модуле ``tasks.py``
+приложения и ставится в очередь вызовом ``delay``::
+
+    @task(max_retries=3)
+    def send_email(subject, body, from_email, recipients):
+        ...
+
+    send_email.delay('Тема', 'Текст', None, ['user@example.com'])
+
+Аргументы должны сериализоваться в JSON. Задачи выполняет команда
+``python manage.py run_tasks``; при ``TASKS_ALWAYS_EAGER`` задача
+выполняется сразу в текущем процессе.
+"""
+import json
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Count, F, Min
+from django.utils import timezone
+
+from .models import Task
+
+registry = {}
+
+
+class TaskFunction:
+    def __init__(self, function, name, max_retries):
+        self.function = function
+        self.name = name
+        self.max_retries = max_retries
+
+    def __call__(self, *args, **kwargs):
+        return self.function(*args, **kwargs)
+
+    def __repr__(self):
+        return f'<TaskFunction {self.name}>'
+
+    def delay(self, *args, **kwargs):
+        """Поставить задачу в очередь."""
+        return self.apply_async(args, kwargs)
+
+    def apply_async(self, args=(), kwargs=None, countdown=0):
+        """Поставить задачу в очередь с задержкой ``countdown`` секунд."""
+        arguments = json.dumps({'args': list(args), 'kwargs': kwargs or {}})
+        if settings.TASKS_ALWAYS_EAGER:
+            # Аргументы проходят через JSON, как и при работе с очередью.
+            arguments = json.loads(arguments)
+            self.function(*arguments['args'], **arguments['kwargs'])
+            return None
+        return Task.objects.create(
+            name=self.name,
+            arguments=arguments,
+            max_retries=self.max_retries,
+            run_after=timezone.now() + timedelta(seconds=countdown),
+        )
+
+
+def task(function=None, *, name=None, max_retries=None):
+    """Зарегистрировать функцию как задачу очереди."""
+    def decorator(function):
+        task_name = name or f'{function.__module__}.{function.__name__}'
+        task_function = TaskFunction(
+            function,
+            task_name,
+            settings.TASKS_MAX_RETRIES if max_retries is None else max_retries,
+        )
+        registry[task_name] = task_function
+        return task_function
+
+    if function is not None:
+        return decorator(function)
+    return decorator
+
+
+def requeue_stale_tasks():
+    """Вернуть в очередь задачи, зависшие у упавшего обработчика."""
+    deadline = timezone.now() - timedelta(
+        seconds=settings.TASKS_RUNNING_TIMEOUT
+    )
+    return Task.objects.filter(
+        status=Task.RUNNING, updated__lt=deadline
+    ).update(status=Task.PENDING, updated=timezone.now())
+
+
+def claim_tasks(limit):
+    """Атомарно забрать до ``limit`` готовых к выполнению задач.
+
+    Каждая задача забирается условным UPDATE, поэтому одну задачу не
+    получат два обработчика даже в разных процессах.
+    """
+    candidates = Task.objects.filter(
+        status=Task.PENDING, run_after__lte=timezone.now()
+    ).values_list('pk', flat=True)[:limit * 2]
+    claimed = []
+    for pk in candidates:
+        updated = Task.objects.filter(pk=pk, status=Task.PENDING).update(
+            status=Task.RUNNING,
+            attempts=F('attempts') + 1,
+            updated=timezone.now(),
+        )
+        if updated:
+            claimed.append(pk)
+        if len(claimed) == limit:
+            break
+    return claimed
+
+
+def execute_task(pk):
+    """Выполнить забранную задачу и записать результат.
+
+    При ошибке задача повторяется с экспоненциальной задержкой, пока не
+    исчерпаны повторы.
+    """
+    task_record = Task.objects.get(pk=pk)
+    try:
+        task_function = registry[task_record.name]
+        arguments = json.loads(task_record.arguments)
+        task_function(*arguments['args'], **arguments['kwargs'])
+    except Exception:
+        task_record.last_error = traceback.format_exc()
+        if task_record.attempts <= task_record.max_retries:
+            task_record.status = Task.PENDING
+            task_record.run_after = timezone.now() + timedelta(
+                seconds=settings.TASKS_RETRY_DELAY
+                * 2 ** (task_record.attempts - 1)
+            )
+        else:
+            task_record.status = Task.FAILED
+    else:
+        task_record.status = Task.DONE
+    task_record.save(
+        update_fields=('status', 'run_after', 'last_error', 'updated')
+    )
+    return task_record.status
+
+
+def queue_stats():
+    """Глубина очереди по статусам и задачам для панели мониторинга."""
+    by_status = dict(
+        Task.objects.order_by().values_list('status')
+        .annotate(total=Count('pk'))
+    )
+    pending = Task.objects.filter(status=Task.PENDING).order_by()
+    oldest = pending.aggregate(oldest=Min('created'))['oldest']
+    return {
+        'by_status': [
+            (label, by_status.get(status, 0))
+            for status, label in Task.STATUS_CHOICES
+        ],
+        'pending_by_name': (
+            pending.values('name').annotate(total=Count('pk'))
+            .order_by('-total')
+        ),
+        'oldest_pending_age': timezone.now() - oldest if oldest else None,
+        'recent_failures': Task.objects.filter(
+            status=Task.FAILED).order_by('-updated')[:10],
+    }
@@ -0,0 +1,163 @@
+import json
+import os
+import sqlite3
+import tempfile
+from datetime import timedelta
+from http import HTTPStatus
+
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from .models import Task
+from .queue import (
+    claim_tasks, execute_task, queue_stats, registry, requeue_stale_tasks,
+    task
+)
+
+calls = []
+
+
+@task(name='tests.record')
+def record(value):
+    calls.append(value)
+
+
+@task(name='tests.fail', max_retries=1)
+def fail():
+    raise RuntimeError('Ошибка задачи')
+
+
+@override_settings(TASKS_ALWAYS_EAGER=False)
+class TaskQueueTest(TestCase):
+    def setUp(self):
+        calls.clear()
+
+    def test_task_registered(self):
+        self.assertIs(registry['tests.record'], record)
+        self.assertIn('users.tasks.send_email', registry)
+        self.assertIn('posts.tasks.generate_thumbnails', registry)
+
+    def test_delay_enqueues(self):
+        """delay не выполняет задачу, а сохраняет её в очередь."""
+        task_record = record.delay('значение')
+        self.assertEqual(calls, [])
+        self.assertEqual(task_record.status, Task.PENDING)
+        self.assertEqual(
+            json.loads(task_record.arguments),
+            {'args': ['значение'], 'kwargs': {}}
+        )
+
+    def test_claim_and_execute(self):
+        first = record.delay(1)
+        second = record.delay(2)
+        record.apply_async((3,), countdown=60)
+        self.assertEqual(claim_tasks(10), [first.pk, second.pk])
+        self.assertEqual(claim_tasks(10), [])
+        for pk in (first.pk, second.pk):
+            self.assertEqual(execute_task(pk), Task.DONE)
+        self.assertEqual(calls, [1, 2])
+
+    def test_retry_then_fail(self):
+        """Упавшая задача повторяется, затем помечается ошибочной."""
+        task_record = fail.delay()
+        claim_tasks(1)
+        self.assertEqual(execute_task(task_record.pk), Task.PENDING)
+        task_record.refresh_from_db()
+        self.assertGreater(task_record.run_after, timezone.now())
+        self.assertIn('Ошибка задачи', task_record.last_error)
+        Task.objects.filter(pk=task_record.pk).update(
+            run_after=timezone.now()
+        )
+        claim_tasks(1)
+        self.assertEqual(execute_task(task_record.pk), Task.FAILED)
+
+    def test_requeue_stale_tasks(self):
+        task_record = record.delay(1)
+        claim_tasks(1)
+        Task.objects.filter(pk=task_record.pk).update(
+            updated=timezone.now() - timedelta(hours=1)
+        )
+        self.assertEqual(requeue_stale_tasks(), 1)
+        self.assertEqual(claim_tasks(1), [task_record.pk])
+
+    def test_password_reset_is_queued(self):
+        get_user_model().objects.create_user(
+            username='Noname', email='noname@example.com',
+            password='Pa55word!'
+        )
+        response = self.client.post(
+            reverse('users:password_reset'), {'email': 'noname@example.com'}
+        )
+        self.assertEqual(response.status_code, HTTPStatus.FOUND)
+        self.assertEqual(len(mail.outbox), 0)
+        task_record = Task.objects.get(name='users.tasks.send_email')
+        claim_tasks(1)
+        execute_task(task_record.pk)
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ['noname@example.com'])
+
+    def test_dashboard_for_staff_only(self):
+        record.delay(1)
+        response = self.client.get(reverse('tasks:dashboard'))
+        self.assertEqual(response.status_code, HTTPStatus.FOUND)
+        staff = get_user_model().objects.create_user(
+            username='staff', is_staff=True
+        )
+        self.client.force_login(staff)
+        response = self.client.get(reverse('tasks:dashboard'))
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertContains(response, 'tests.record')
+
+
+@override_settings(TASKS_ALWAYS_EAGER=False)
+class RunTasksCommandTest(TransactionTestCase):
+    """Обработчик работает в своих потоках и соединениях с БД.
+
+    Тестовая БД SQLite в памяти с общим кэшем не ждёт блокировок, и
+    запись из двух потоков падает с «table is locked». На время теста
+    соединения переключаются на копию БД в файле, как в боевой.
+    """
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = os.path.join(directory.name, 'db.sqlite3')
+        connection.ensure_connection()
+        memory = connection.connection
+        copy = sqlite3.connect(path)
+        memory.backup(copy)
+        copy.close()
+        # Соединение с БД в памяти не закрывается: иначе она пропадёт.
+        name = connection.settings_dict['NAME']
+        connection.settings_dict['NAME'] = path
+        connection.connection = None
+
+        def restore():
+            connection.close()
+            connection.settings_dict['NAME'] = name
+            connection.connection = memory
+
+        self.addCleanup(restore)
+
+    def test_run_tasks_command(self):
+        calls.clear()
+        record.delay(1)
+        fail.delay()
+        call_command('run_tasks', '--once', '--threads', '2')
+        self.assertEqual(calls, [1])
+        stats = dict(queue_stats()['by_status'])
+        self.assertEqual(stats['Выполнена'], 1)
+        self.assertEqual(stats['В очереди'], 1)
+
+
+class EagerTaskTest(TestCase):
+    def test_eager_task_runs_immediately(self):
+        calls.clear()
+        self.assertIsNone(record.delay('сразу'))
+        self.assertEqual(calls, ['сразу'])
+        self.assertFalse(Task.objects.exists())
@@ -0,0 +1,10 @@
+from django.contrib.admin.views.decorators import staff_member_required
+from django.shortcuts import render
+
+from .queue import queue_stats
+
+
+@staff_member_required
+def dashboard(request):
+    """Глубина очереди задач и последние ошибки."""
+    return render(request, 'tasks/dashboard.html', queue_stats())
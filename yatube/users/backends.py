@@ -0,0 +1,38 @@
+"""Загрузка пользователя сессии через общий кэш.
+
+``AuthenticationMiddleware`` на каждом запросе авторизованного
+пользователя достаёт его строку из БД. ``CachedModelBackend`` хранит
+пользователя в кэше ``USER_CACHE_TIMEOUT`` секунд; запись сбрасывается
+при сохранении и удалении пользователя (смена пароля, новый
+``last_login``) и при выходе, см. ``users.signals``.
+"""
+from django.conf import settings
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import cache
+from django.db import transaction
+
+
+def user_cache_key(user_id):
+    return f'users:user:{user_id}'
+
+
+def invalidate_user(user_id):
+    """Следующий запрос пользователя прочитает его из БД."""
+    def delete():
+        cache.delete(user_cache_key(user_id))
+
+    delete()
+    # Запрос, прочитавший строку до фиксации, мог снова её закэшировать.
+    transaction.on_commit(delete)
+
+
+class CachedModelBackend(ModelBackend):
+    def get_user(self, user_id):
+        key = user_cache_key(user_id)
+        user = cache.get(key)
+        if user is None:
+            user = super().get_user(user_id)
+            if user is None:
+                return None
+            cache.set(key, user, settings.USER_CACHE_TIMEOUT)
+        return user if self.user_can_authenticate(user) else None
@@ -1,9 +1,63 @@
-from django.contrib.auth.forms import UserCreationForm
+from django.contrib.auth.forms import (
+    AuthenticationForm, PasswordResetForm, UserCreationForm
+)
+from django.core.exceptions import ValidationError
+from django.template import loader
 
 from posts.models import User
+from .tasks import send_email
+from .throttle import LoginThrottle
 
 
 class CreationForm(UserCreationForm):
     class Meta(UserCreationForm.Meta):
         model = User
         fields = ('first_name', 'last_name', 'username', 'email')
+
+
+class ThrottledAuthenticationForm(AuthenticationForm):
+    """Вход, отклоняемый без проверки пароля после серии неудач."""
+
+    error_messages = {
+        **AuthenticationForm.error_messages,
+        'throttled': (
+            'Слишком много неудачных попыток входа. '
+            'Повторите через несколько минут.'
+        ),
+    }
+    throttled = False
+
+    def clean(self):
+        throttle = LoginThrottle(
+            self.request, self.cleaned_data.get('username')
+        )
+        if throttle.is_throttled():
+            self.throttled = True
+            raise ValidationError(
+                self.error_messages['throttled'], code='throttled'
+            )
+        try:
+            cleaned_data = super().clean()
+        except ValidationError as error:
+            if error.code == 'invalid_login':
+                throttle.register_failure()
+            raise
+        throttle.reset()
+        return cleaned_data
+
+
+class QueuedPasswordResetForm(PasswordResetForm):
+    """Письмо для сброса пароля отправляется через очередь задач."""
+
+    def send_mail(self, subject_template_name, email_template_name,
+                  context, from_email, to_email,
+                  html_email_template_name=None):
+        subject = loader.render_to_string(subject_template_name, context)
+        subject = ''.join(subject.splitlines())
+        body = loader.render_to_string(email_template_name, context)
+        html_body = None
+        if html_email_template_name is not None:
+            html_body = loader.render_to_string(
+                html_email_template_name, context
+            )
+        send_email.delay(subject, body, from_email, [to_email], html_body)
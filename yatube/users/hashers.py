@@ -0,0 +1,35 @@
+"""Хешеры паролей, стоимость которых задаётся в настройках.
+
+Новые пароли хешируются первым хешером из ``PASSWORD_HASHERS``. При
+успешном входе Django пересчитывает хеш, сделанный другим хешером или
+с другой стоимостью (``must_update``), поэтому смена политики
+применяется к пользователям постепенно, без сброса паролей.
+"""
+from django.conf import settings
+from django.contrib.auth import hashers
+
+
+class PBKDF2PasswordHasher(hashers.PBKDF2PasswordHasher):
+    @property
+    def iterations(self):
+        return settings.PASSWORD_PBKDF2_ITERATIONS
+
+
+class Argon2PasswordHasher(hashers.Argon2PasswordHasher):
+    @property
+    def time_cost(self):
+        return settings.PASSWORD_ARGON2_TIME_COST
+
+    @property
+    def memory_cost(self):
+        return settings.PASSWORD_ARGON2_MEMORY_COST
+
+    @property
+    def parallelism(self):
+        return settings.PASSWORD_ARGON2_PARALLELISM
+
+
+class BCryptSHA256PasswordHasher(hashers.BCryptSHA256PasswordHasher):
+    @property
+    def rounds(self):
+        return settings.PASSWORD_BCRYPT_ROUNDS
@@ -0,0 +1,33 @@
+import time
+
+from django.contrib.auth.hashers import get_hashers
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = (
+        'Измерить время хеширования пароля хешерами из PASSWORD_HASHERS '
+        'с текущей стоимостью.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rounds', type=int, default=5)
+
+    def handle(self, *args, **options):
+        rounds = options['rounds']
+        for number, hasher in enumerate(get_hashers()):
+            try:
+                hasher.encode('bench-password', hasher.salt())
+            except ValueError as error:
+                # Не установлен пакет хешера.
+                self.stdout.write(f'{hasher.algorithm:<20} {error}')
+                continue
+            started = time.perf_counter()
+            for _ in range(rounds):
+                hasher.encode('bench-password', hasher.salt())
+            elapsed = (time.perf_counter() - started) / rounds
+            mark = ' (новые пароли)' if number == 0 else ''
+            self.stdout.write(
+                f'{hasher.algorithm:<20} {elapsed * 1000:8.1f} мс, '
+                f'{1 / elapsed:7.1f} входов/с на ядро{mark}'
+            )
@@ -0,0 +1,12 @@
+from django.core.mail import EmailMultiAlternatives
+
+from tasks.queue import task
+
+
+@task
+def send_email(subject, body, from_email, recipients, html_body=None):
+    """Отправить письмо вне обработки запроса."""
+    message = EmailMultiAlternatives(subject, body, from_email, recipients)
+    if html_body is not None:
+        message.attach_alternative(html_body, 'text/html')
+    message.send()
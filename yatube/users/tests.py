@@ -0,0 +1,186 @@
+from http import HTTPStatus
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.contrib.sessions.backends.db import SessionStore as DBStore
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from .backends import user_cache_key
+
+User = get_user_model()
+
+
+class CachedSessionUserTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username='reader', password='old-password-1'
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.user)
+        self.url = reverse('about:author')
+
+    def test_session_and_user_loaded_from_cache(self):
+        with self.assertNumQueries(1):
+            self.client.get(self.url)
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url)
+        self.assertEqual(response.context['user'], self.user)
+
+    def test_session_kept_in_database(self):
+        session_key = self.client.session.session_key
+        cache.clear()
+        self.assertTrue(DBStore().exists(session_key))
+        response = self.client.get(self.url)
+        self.assertTrue(response.context['user'].is_authenticated)
+
+    def test_user_change_invalidates_cache(self):
+        self.client.get(self.url)
+        self.user.first_name = 'Новое имя'
+        self.user.save()
+        self.assertIsNone(cache.get(user_cache_key(self.user.pk)))
+        response = self.client.get(self.url)
+        self.assertEqual(response.context['user'].first_name, 'Новое имя')
+
+    def test_logout_invalidates_cache(self):
+        self.client.get(self.url)
+        self.client.get(reverse('users:logout'))
+        self.assertIsNone(cache.get(user_cache_key(self.user.pk)))
+        response = self.client.get(self.url)
+        self.assertFalse(response.context['user'].is_authenticated)
+
+    def test_password_change_ends_other_sessions(self):
+        other_client = self.client_class()
+        other_client.force_login(self.user)
+        other_client.get(self.url)
+        self.client.post(reverse('users:password_change'), {
+            'old_password': 'old-password-1',
+            'new_password1': 'new-password-2',
+            'new_password2': 'new-password-2',
+        })
+        response = self.client.get(self.url)
+        self.assertTrue(response.context['user'].is_authenticated)
+        response = other_client.get(self.url)
+        self.assertFalse(response.context['user'].is_authenticated)
+
+    def test_inactive_user_logged_out(self):
+        self.client.get(self.url)
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        self.assertTrue(
+            self.client.get(self.url).context['user'].is_authenticated
+        )
+        User.objects.get(pk=self.user.pk).save()
+        self.assertFalse(
+            self.client.get(self.url).context['user'].is_authenticated
+        )
+
+
+@override_settings(
+    PASSWORD_HASHERS=[
+        'users.hashers.PBKDF2PasswordHasher',
+        'django.contrib.auth.hashers.MD5PasswordHasher',
+    ],
+    PASSWORD_PBKDF2_ITERATIONS=1000,
+)
+class PasswordHasherPolicyTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='reader')
+        self.user.password = make_password('password-1', hasher='md5')
+        self.user.save()
+
+    def login(self):
+        return self.client.post(reverse('users:login'), {
+            'username': 'reader', 'password': 'password-1',
+        })
+
+    def test_new_password_uses_configured_cost(self):
+        self.user.set_password('password-2')
+        self.assertTrue(self.user.password.startswith('pbkdf2_sha256$1000$'))
+
+    def test_old_hash_upgraded_on_login(self):
+        self.assertRedirects(self.login(), reverse('posts:index'))
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.password.startswith('pbkdf2_sha256$1000$'))
+        self.client.logout()
+        with self.settings(PASSWORD_PBKDF2_ITERATIONS=2000):
+            self.login()
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.password.startswith('pbkdf2_sha256$2000$'))
+
+
+@override_settings(
+    LOGIN_THROTTLE_ATTEMPTS=2, LOGIN_THROTTLE_IP_ATTEMPTS=3,
+    LOGIN_THROTTLE_WINDOW=60,
+)
+class LoginThrottleTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username='reader', password='password-1'
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.url = reverse('users:login')
+
+    def login(self, username='reader', password='wrong', **extra):
+        return self.client.post(
+            self.url, {'username': username, 'password': password}, **extra
+        )
+
+    def test_username_throttled_before_password_check(self):
+        for _ in range(2):
+            self.assertEqual(self.login().status_code, HTTPStatus.OK)
+        with mock.patch('django.contrib.auth.forms.authenticate') as check:
+            response = self.login(password='password-1')
+        check.assert_not_called()
+        self.assertEqual(response.status_code, HTTPStatus.TOO_MANY_REQUESTS)
+        self.assertEqual(response['Retry-After'], '60')
+        self.assertContains(
+            response, 'Слишком много неудачных попыток входа',
+            status_code=HTTPStatus.TOO_MANY_REQUESTS,
+        )
+        other_address = self.login(
+            password='password-1', REMOTE_ADDR='10.0.0.2'
+        )
+        self.assertEqual(
+            other_address.status_code, HTTPStatus.TOO_MANY_REQUESTS
+        )
+
+    def test_address_throttled_across_usernames(self):
+        for username in ('first', 'second', 'third'):
+            self.login(username=username)
+        response = self.login(password='password-1')
+        self.assertEqual(response.status_code, HTTPStatus.TOO_MANY_REQUESTS)
+        response = self.login(password='password-1', REMOTE_ADDR='10.0.0.2')
+        self.assertRedirects(response, reverse('posts:index'))
+
+    @override_settings(CLIENT_IP_HEADER='HTTP_X_FORWARDED_FOR')
+    def test_address_taken_from_proxy_header(self):
+        """За прокси у всех один REMOTE_ADDR, но свои адреса клиентов."""
+        for username in ('first', 'second', 'third'):
+            self.login(
+                username=username, HTTP_X_FORWARDED_FOR='1.2.3.4, 10.0.0.5'
+            )
+        response = self.login(
+            password='password-1', HTTP_X_FORWARDED_FOR='10.0.0.5'
+        )
+        self.assertEqual(response.status_code, HTTPStatus.TOO_MANY_REQUESTS)
+        response = self.login(
+            password='password-1', HTTP_X_FORWARDED_FOR='10.0.0.6'
+        )
+        self.assertRedirects(response, reverse('posts:index'))
+
+    def test_success_resets_username_attempts(self):
+        self.login()
+        self.assertRedirects(
+            self.login(password='password-1'), reverse('posts:index')
+        )
+        self.client.logout()
+        self.login()
+        self.assertEqual(self.login().status_code, HTTPStatus.OK)
@@ -0,0 +1,52 @@
+"""Ограничение попыток входа.
+
+Неудачные попытки считаются в общем кэше отдельно для IP-адреса и для
+имени пользователя в окне ``LOGIN_THROTTLE_WINDOW`` секунд. Пока
+счётчик на пределе, вход отклоняется до проверки пароля, и дорогой
+хеш не считается. Успешный вход обнуляет счётчик имени, но не адреса:
+иначе свой аккаунт позволял бы перебирать чужие.
+"""
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+
+from core.proxy import get_client_ip
+
+
+class LoginThrottle:
+    def __init__(self, request, username):
+        self.limits = {}
+        if request is not None:
+            address = get_client_ip(request)
+            self.limits[f'users:login:ip:{address}'] = (
+                settings.LOGIN_THROTTLE_IP_ATTEMPTS
+            )
+        if username:
+            # Имя приходит из формы как есть: в ключ кэша идёт его хеш.
+            digest = hashlib.md5(username.casefold().encode()).hexdigest()
+            self.user_key = f'users:login:user:{digest}'
+            self.limits[self.user_key] = settings.LOGIN_THROTTLE_ATTEMPTS
+        else:
+            self.user_key = None
+
+    def is_throttled(self):
+        attempts = cache.get_many(list(self.limits))
+        return any(
+            attempts.get(key, 0) >= limit
+            for key, limit in self.limits.items()
+        )
+
+    def register_failure(self):
+        window = settings.LOGIN_THROTTLE_WINDOW
+        for key in self.limits:
+            # add + incr атомарны в memcached, в отличие от get + set.
+            cache.add(key, 0, window)
+            try:
+                cache.incr(key)
+            except ValueError:
+                cache.set(key, 1, window)
+
+    def reset(self):
+        if self.user_key is not None:
+            cache.delete(self.user_key)
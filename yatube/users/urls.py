@@ -1,12 +1,12 @@
 from django.contrib.auth.views import (
-    LogoutView, LoginView,
-    PasswordChangeView, PasswordChangeDoneView, PasswordResetView,
+    LogoutView, PasswordChangeView, PasswordChangeDoneView, PasswordResetView,
     PasswordResetDoneView, PasswordResetConfirmView,
     PasswordResetCompleteView
 )
 from django.urls import path
 
 from . import views
+from .forms import QueuedPasswordResetForm
 
 app_name = 'users'
 
@@ -22,7 +22,7 @@ urlpatterns = [
     ),
     path(
         'login/',
-        LoginView.as_view(template_name='users/login.html'),
+        views.ThrottledLoginView.as_view(),
         name='login'
     ),
     path(
@@ -42,7 +42,8 @@ urlpatterns = [
     path(
         'password_reset/',
         PasswordResetView.as_view(
-            template_name='users/password_reset_form.html'
+            template_name='users/password_reset_form.html',
+            form_class=QueuedPasswordResetForm,
         ),
         name='password_reset'
     ),
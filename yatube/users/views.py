@@ -1,10 +1,26 @@
+from http import HTTPStatus
+
+from django.conf import settings
+from django.contrib.auth.views import LoginView
 from django.views.generic import CreateView
 from django.urls import reverse_lazy
 
-from .forms import CreationForm
+from .forms import CreationForm, ThrottledAuthenticationForm
 
 
 class SignUp(CreateView):
     form_class = CreationForm
     success_url = reverse_lazy('posts:index')
     template_name = 'users/signup.html'
+
+
+class ThrottledLoginView(LoginView):
+    form_class = ThrottledAuthenticationForm
+    template_name = 'users/login.html'
+
+    def form_invalid(self, form):
+        response = super().form_invalid(form)
+        if form.throttled:
+            response.status_code = HTTPStatus.TOO_MANY_REQUESTS
+            response['Retry-After'] = settings.LOGIN_THROTTLE_WINDOW
+        return response
@@ -0,0 +1,28 @@
+"""
+ASGI config for yatube project.
+
+It exposes the ASGI callable as a module-level variable named
+``application``. Django views run in a bounded thread pool, see
+``core.asgi.ThreadPoolWSGIAdapter``. Server-Sent Events are served
+natively on ``/events/stream/``, see ``core.events``.
+
+Run it with any ASGI server, for example::
+
+    uvicorn yatube.asgi:application
+"""
+
+import os
+
+from django.core.wsgi import get_wsgi_application
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
+
+django_application = get_wsgi_application()
+
+from core.asgi import PathRouter, ThreadPoolWSGIAdapter  # noqa: E402
+from core.events import EventStreamApplication  # noqa: E402
+
+application = PathRouter(
+    {'/events/stream/': EventStreamApplication()},
+    default=ThreadPoolWSGIAdapter(django_application),
+)
@@ -0,0 +1,21 @@
+"""Выбор профиля настроек по переменной окружения ``DJANGO_ENV``.
+
+Поддерживаются профили ``dev`` (по умолчанию), ``test`` и ``prod``.
+Профиль можно указать и напрямую:
+``DJANGO_SETTINGS_MODULE=yatube.settings.prod``.
+"""
+import os
+
+DJANGO_ENV = os.environ.get('DJANGO_ENV', 'dev').strip().lower()
+
+if DJANGO_ENV == 'prod':
+    from .prod import *  # noqa: F401,F403
+elif DJANGO_ENV == 'test':
+    from .test import *  # noqa: F401,F403
+elif DJANGO_ENV == 'dev':
+    from .dev import *  # noqa: F401,F403
+else:
+    raise ImportError(
+        f'Неизвестный профиль настроек DJANGO_ENV={DJANGO_ENV!r}, '
+        f'ожидается dev, test или prod'
+    )
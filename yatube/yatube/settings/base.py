@@ -0,0 +1,308 @@
+"""Общие настройки проекта для всех окружений (dev/test/prod)."""
+import importlib.util
+import os
+
+
+BASE_DIR = os.path.dirname(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+)
+
+
+def env_bool(name, default=False):
+    """Прочитать булево значение из переменной окружения."""
+    value = os.environ.get(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ('1', 'true', 'yes', 'on')
+
+
+def env_int(name, default):
+    """Прочитать целое число из переменной окружения."""
+    value = os.environ.get(name)
+    if not value:
+        return default
+    return int(value)
+
+
+def env_list(name, default):
+    """Прочитать список значений, разделённых запятыми."""
+    value = os.environ.get(name)
+    if not value:
+        return list(default)
+    return [item.strip() for item in value.split(',') if item.strip()]
+
+
+SECRET_KEY = os.environ.get(
+    'SECRET_KEY',
+    'qpr$(&yk!mlmpexo3%=!i3p&wrzxn@h&34$fgw_0p676n8(z4h'
+)
+
+DEBUG = env_bool('DEBUG', True)
+
+ALLOWED_HOSTS = env_list('ALLOWED_HOSTS', [
+    'localhost',
+    '127.0.0.1',
+    '[::1]',
+    'testserver',
+])
+
+INSTALLED_APPS = [
+    'about.apps.AboutConfig',
+    'core.apps.CoreConfig',
+    'users.apps.UsersConfig',
+    'posts.apps.PostsConfig',
+    'tasks.apps.TasksConfig',
+    'django.contrib.admin',
+    'django.contrib.auth',
+    'django.contrib.contenttypes',
+    'django.contrib.sessions',
+    'django.contrib.messages',
+    'django.contrib.staticfiles',
+    'sorl.thumbnail',
+]
+
+MIDDLEWARE = [
+    'django.middleware.security.SecurityMiddleware',
+    'core.admission.AdmissionControlMiddleware',
+    'core.middleware.ReplicaPinningMiddleware',
+    'django.contrib.sessions.middleware.SessionMiddleware',
+    'django.middleware.common.CommonMiddleware',
+    'django.middleware.csrf.CsrfViewMiddleware',
+    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'core.ratelimit.RateLimitMiddleware',
+    'django.contrib.messages.middleware.MessageMiddleware',
+    'django.middleware.clickjacking.XFrameOptionsMiddleware',
+]
+
+ROOT_URLCONF = 'yatube.urls'
+
+TEMPLATES_DIR = os.path.join(BASE_DIR, 'templates')
+TEMPLATES = [
+    {
+        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'DIRS': [TEMPLATES_DIR],
+        'APP_DIRS': True,
+        'OPTIONS': {
+            'context_processors': [
+                'django.template.context_processors.debug',
+                'django.template.context_processors.request',
+                'django.contrib.auth.context_processors.auth',
+                'django.contrib.messages.context_processors.messages',
+                'core.context_processors.year.year',
+            ],
+        },
+    },
+]
+
+WSGI_APPLICATION = 'yatube.wsgi.application'
+# Число потоков, в которых ASGI-приложение выполняет представления.
+ASGI_THREADS = env_int('ASGI_THREADS', 16)
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.environ.get(
+            'DB_NAME', os.path.join(BASE_DIR, 'db.sqlite3')
+        ),
+        'CONN_MAX_AGE': env_int('CONN_MAX_AGE', 0),
+    }
+}
+
+# Реплики только для чтения, например
+# DB_REPLICAS=/srv/replica1.sqlite3,/srv/replica2.sqlite3
+DATABASE_REPLICAS = []
+for number, name in enumerate(env_list('DB_REPLICAS', []), start=1):
+    alias = f'replica_{number}'
+    DATABASES[alias] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': name,
+        'CONN_MAX_AGE': env_int('CONN_MAX_AGE', 0),
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append(alias)
+
+DATABASE_ROUTERS = ['core.routers.PrimaryReplicaRouter']
+# Приложения, чтение моделей которых уходит на реплики.
+REPLICA_ROUTED_APPS = ('posts',)
+# Сколько секунд после записи клиент читает из основной БД.
+REPLICA_PIN_SECONDS = env_int('REPLICA_PIN_SECONDS', 5)
+
+# PRAGMA для каждого соединения SQLite (см. core/sqlite.py).
+# Ожидание блокировки в миллисекундах.
+SQLITE_BUSY_TIMEOUT = env_int('SQLITE_BUSY_TIMEOUT', 5000)
+# Отрицательное значение - размер кэша страниц в килобайтах.
+SQLITE_CACHE_SIZE = env_int('SQLITE_CACHE_SIZE', -20000)
+# Объём файла БД, читаемый через mmap, в байтах.
+SQLITE_MMAP_SIZE = env_int('SQLITE_MMAP_SIZE', 256 * 1024 * 1024)
+
+AUTH_PASSWORD_VALIDATORS = [
+    {
+        'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
+    },
+    {
+        'NAME': 'django.contrib.auth.password_validation.MinimumLengthValidator',
+    },
+    {
+        'NAME': 'django.contrib.auth.password_validation.CommonPasswordValidator',
+    },
+    {
+        'NAME': 'django.contrib.auth.password_validation.NumericPasswordValidator',
+    },
+]
+
+# Хешер новых паролей: 'argon2', 'bcrypt' или 'pbkdf2'. По умолчанию -
+# первый, для которого установлен пакет (argon2-cffi, bcrypt). Хеши
+# остальных хешеров проверяются и пересчитываются при входе.
+PASSWORD_HASHER_CLASSES = {
+    'argon2': ('argon2', 'users.hashers.Argon2PasswordHasher'),
+    'bcrypt': ('bcrypt', 'users.hashers.BCryptSHA256PasswordHasher'),
+    'pbkdf2': (None, 'users.hashers.PBKDF2PasswordHasher'),
+}
+PASSWORD_HASHER = os.environ.get('PASSWORD_HASHER') or next(
+    name for name, (package, _) in PASSWORD_HASHER_CLASSES.items()
+    if package is None or importlib.util.find_spec(package) is not None
+)
+PASSWORD_HASHERS = [PASSWORD_HASHER_CLASSES[PASSWORD_HASHER][1]] + [
+    hasher for name, (_, hasher) in PASSWORD_HASHER_CLASSES.items()
+    if name != PASSWORD_HASHER
+] + ['django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher']
+# Стоимость хешей. Меньше - быстрее вход и регистрация, но дешевле
+# перебор утёкших хешей; время хеша покажет manage.py bench_hashers.
+PASSWORD_PBKDF2_ITERATIONS = env_int('PASSWORD_PBKDF2_ITERATIONS', 150000)
+PASSWORD_ARGON2_TIME_COST = env_int('PASSWORD_ARGON2_TIME_COST', 2)
+# Память Argon2 в кибибайтах.
+PASSWORD_ARGON2_MEMORY_COST = env_int('PASSWORD_ARGON2_MEMORY_COST', 512)
+PASSWORD_ARGON2_PARALLELISM = env_int('PASSWORD_ARGON2_PARALLELISM', 2)
+PASSWORD_BCRYPT_ROUNDS = env_int('PASSWORD_BCRYPT_ROUNDS', 12)
+
+# Адрес клиента для ограничений по IP (core/proxy.py). За nginx задайте
+# заголовок, в котором прокси передаёт адрес, как ключ request.META
+# (HTTP_X_FORWARDED_FOR или HTTP_X_REAL_IP), и число прокси перед
+# приложением. Пусто - REMOTE_ADDR: без прокси заголовок подделывается.
+CLIENT_IP_HEADER = os.environ.get('CLIENT_IP_HEADER', '')
+TRUSTED_PROXY_COUNT = env_int('TRUSTED_PROXY_COUNT', 1)
+
+# Неудачные попытки входа, после которых вход отклоняется без проверки
+# пароля: для одного имени и для одного IP-адреса за окно в секундах.
+LOGIN_THROTTLE_ATTEMPTS = env_int('LOGIN_THROTTLE_ATTEMPTS', 5)
+LOGIN_THROTTLE_IP_ATTEMPTS = env_int('LOGIN_THROTTLE_IP_ATTEMPTS', 20)
+LOGIN_THROTTLE_WINDOW = env_int('LOGIN_THROTTLE_WINDOW', 300)
+
+# Ограничения частоты запросов (core/ratelimit.py) по областям:
+# 'число/период', период - s, m, h или d. Считаются по пользователю,
+# для анонимов - по IP. 'write' - все POST/PUT/PATCH/DELETE клиента.
+RATELIMIT_ENABLED = env_bool('RATELIMIT_ENABLED', True)
+RATELIMITS = {
+    'write': os.environ.get('RATELIMIT_WRITE', '120/m'),
+    'post_create': os.environ.get('RATELIMIT_POST_CREATE', '10/m'),
+    'add_comment': os.environ.get('RATELIMIT_ADD_COMMENT', '30/m'),
+    'follow': os.environ.get('RATELIMIT_FOLLOW', '60/m'),
+}
+
+# Контроль допуска при перегрузке процесса (core/admission.py).
+ADMISSION_CONTROL_ENABLED = env_bool('ADMISSION_CONTROL_ENABLED', True)
+# Процесс перегружен, если в нём выполняется столько запросов сразу
+# или запрос столько миллисекунд ждал потока пула ASGI.
+ADMISSION_MAX_IN_FLIGHT = env_int('ADMISSION_MAX_IN_FLIGHT', 32)
+ADMISSION_MAX_QUEUE_WAIT_MS = env_int('ADMISSION_MAX_QUEUE_WAIT_MS', 500)
+# При перегрузке не выполняются представления с таким средним временем
+# ответа в миллисекундах и страницы лент дальше ADMISSION_DEEP_PAGE.
+ADMISSION_EXPENSIVE_LATENCY_MS = env_int(
+    'ADMISSION_EXPENSIVE_LATENCY_MS', 100
+)
+ADMISSION_DEEP_PAGE = env_int('ADMISSION_DEEP_PAGE', 5)
+ADMISSION_RETRY_AFTER = env_int('ADMISSION_RETRY_AFTER', 5)
+# Страницы, сохранённая копия которых отдаётся анонимам вместо 503.
+ADMISSION_STALE_VIEWS = ('posts:index', 'posts:group_list', 'posts:popular')
+ADMISSION_STALE_TIMEOUT = 60 * 60
+
+LANGUAGE_CODE = 'ru'
+
+TIME_ZONE = 'UTC'
+
+USE_I18N = True
+
+USE_L10N = True
+
+USE_TZ = True
+
+STATIC_URL = '/static/'
+STATIC_ROOT = os.environ.get(
+    'STATIC_ROOT', os.path.join(BASE_DIR, 'staticfiles')
+)
+
+STATICFILES_DIRS = (os.path.join(BASE_DIR, 'static'),)
+
+# Сессии читаются из кэша и пишутся в БД, чтобы переживать его очистку.
+# Без записи в БД: 'django.contrib.sessions.backends.signed_cookies'.
+SESSION_ENGINE = os.environ.get(
+    'SESSION_ENGINE', 'django.contrib.sessions.backends.cached_db'
+)
+# Пользователь сессии тоже берётся из кэша (users/backends.py).
+AUTHENTICATION_BACKENDS = ['users.backends.CachedModelBackend']
+# Сколько секунд пользователь хранится в кэше.
+USER_CACHE_TIMEOUT = env_int('USER_CACHE_TIMEOUT', 300)
+
+LOGIN_URL = 'users:login'
+LOGIN_REDIRECT_URL = 'posts:index'
+EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
+EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
+
+MEDIA_URL = '/media/'
+MEDIA_ROOT = os.environ.get('MEDIA_ROOT', os.path.join(BASE_DIR, 'media'))
+
+# Отдача медиа (core/media.py). 'x-sendfile' или 'x-accel-redirect'
+# передаёт отдачу файла веб-серверу; для nginx файлы MEDIA_ROOT должны
+# быть доступны в internal-location MEDIA_ACCEL_PREFIX.
+MEDIA_SENDFILE = os.environ.get('MEDIA_SENDFILE', '')
+MEDIA_ACCEL_PREFIX = os.environ.get('MEDIA_ACCEL_PREFIX', '/protected-media/')
+# Сколько секунд браузер может не перепроверять загруженный файл.
+MEDIA_CACHE_MAX_AGE = env_int('MEDIA_CACHE_MAX_AGE', 24 * 60 * 60)
+# Каталоги, имена файлов в которых меняются вместе с содержимым
+# (миниатюры sorl-thumbnail): кэшируются навсегда.
+MEDIA_IMMUTABLE_PREFIXES = ('cache/',)
+
+# Загрузки пишутся потоком во временный файл рядом с MEDIA_ROOT
+# (см. core/uploads.py) и переносятся в хранилище без копирования.
+FILE_UPLOAD_HANDLERS = ['core.uploads.StreamingUploadHandler']
+# Временный файл создаётся с правами 0600 и переносится переименованием:
+# без явных прав веб-сервер не сможет отдать его через X-Sendfile.
+FILE_UPLOAD_PERMISSIONS = 0o644
+# Каталог временных файлов; по умолчанию MEDIA_ROOT/.uploads.
+UPLOAD_TEMP_DIR = os.environ.get('UPLOAD_TEMP_DIR')
+# Наибольший размер загружаемого файла в байтах.
+UPLOAD_MAX_SIZE = env_int('UPLOAD_MAX_SIZE', 10 * 1024 * 1024)
+
+# Сжатие ответов (core.middleware.CompressionMiddleware, включено в prod).
+# Ответы короче этого числа байт отдаются как есть.
+COMPRESSION_MIN_LENGTH = env_int('COMPRESSION_MIN_LENGTH', 200)
+COMPRESSION_GZIP_LEVEL = env_int('COMPRESSION_GZIP_LEVEL', 6)
+# Качество brotli (0-11) для динамических ответов: 11 слишком медленно.
+COMPRESSION_BROTLI_QUALITY = env_int('COMPRESSION_BROTLI_QUALITY', 5)
+# Убирать из HTML лишние пробелы и переводы строк.
+HTML_MINIFY = env_bool('HTML_MINIFY', False)
+
+# Очередь задач (приложение tasks). При TASKS_ALWAYS_EAGER задачи
+# выполняются сразу, без обработчика run_tasks.
+TASKS_ALWAYS_EAGER = env_bool('TASKS_ALWAYS_EAGER', False)
+TASKS_MAX_RETRIES = 3
+# Задержка перед первым повтором в секундах, далее она удваивается.
+TASKS_RETRY_DELAY = 10
+# Через сколько секунд выполняемая задача считается зависшей.
+TASKS_RUNNING_TIMEOUT = 600
+
+CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
+
+# Каталог страниц, отрендеренных командой prerender_pages (core/prerender.py).
+# Пока страницы там нет, она рендерится на каждый запрос.
+PRERENDER_ROOT = os.environ.get(
+    'PRERENDER_ROOT', os.path.join(BASE_DIR, 'prerendered')
+)
+# Сколько секунд браузер может не перепроверять страницы «О проекте».
+PRERENDER_MAX_AGE = env_int('PRERENDER_MAX_AGE', 24 * 60 * 60)
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
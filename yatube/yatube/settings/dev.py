@@ -0,0 +1,5 @@
+"""Настройки для локальной разработки."""
+from .base import *  # noqa: F401,F403
+from .base import env_bool
+
+TASKS_ALWAYS_EAGER = env_bool('TASKS_ALWAYS_EAGER', True)
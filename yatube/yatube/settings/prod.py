@@ -0,0 +1,86 @@
+"""Боевые настройки: производительность важнее удобства отладки.
+
+Все значения, зависящие от окружения, читаются из переменных окружения.
+"""
+import copy
+import os
+
+from .base import *  # noqa: F401,F403
+from .base import env_bool, env_int, env_list
+from . import base
+
+DEBUG = env_bool('DEBUG', False)
+
+SECRET_KEY = os.environ['SECRET_KEY']
+
+ALLOWED_HOSTS = env_list('ALLOWED_HOSTS', [])
+
+DATABASES = copy.deepcopy(base.DATABASES)
+TEMPLATES = copy.deepcopy(base.TEMPLATES)
+
+# Постоянные соединения с БД вместо нового соединения на каждый запрос.
+for database in DATABASES.values():
+    database['CONN_MAX_AGE'] = env_int('CONN_MAX_AGE', 60)
+
+# Скомпилированные шаблоны кэшируются в памяти процесса.
+TEMPLATES[0]['APP_DIRS'] = False
+TEMPLATES[0]['OPTIONS']['debug'] = False
+TEMPLATES[0]['OPTIONS']['loaders'] = [
+    ('django.template.loaders.cached.Loader', [
+        'django.template.loaders.filesystem.Loader',
+        'django.template.loaders.app_directories.Loader',
+    ]),
+]
+TEMPLATES[0]['OPTIONS']['context_processors'] = [
+    processor
+    for processor in TEMPLATES[0]['OPTIONS']['context_processors']
+    if processor != 'django.template.context_processors.debug'
+]
+
+# Общий для всех воркеров кэш.
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get(
+            'CACHE_BACKEND',
+            'django.core.cache.backends.memcached.MemcachedCache'
+        ),
+        'LOCATION': os.environ.get('CACHE_LOCATION', '127.0.0.1:11211'),
+        'TIMEOUT': env_int('CACHE_TIMEOUT', 300),
+    }
+}
+
+# Статика с хешем содержимого в имени файла, её можно кэшировать навсегда.
+STATICFILES_STORAGE = (
+    'django.contrib.staticfiles.storage.ManifestStaticFilesStorage'
+)
+
+MIDDLEWARE = [
+    'django.middleware.security.SecurityMiddleware',
+    'core.middleware.CompressionMiddleware',
+    'django.middleware.http.ConditionalGetMiddleware',
+] + base.MIDDLEWARE[1:]
+
+# Лишние пробелы из HTML убираются до сжатия.
+HTML_MINIFY = env_bool('HTML_MINIFY', True)
+
+# SQL-запросы не пишутся в лог даже при случайно включённом DEBUG.
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'django': {
+            'handlers': ['console'],
+            'level': os.environ.get('DJANGO_LOG_LEVEL', 'WARNING'),
+        },
+        'django.db.backends': {
+            'handlers': ['console'],
+            'level': 'WARNING',
+            'propagate': False,
+        },
+    },
+}
@@ -0,0 +1,49 @@
+"""Настройки для прогона тестов."""
+import copy
+import os
+
+from .base import *  # noqa: F401,F403
+from . import base
+from .base import env_bool
+
+DEBUG = False
+
+EMAIL_BACKEND = 'django.core.mail.backends.locmem.EmailBackend'
+
+TASKS_ALWAYS_EAGER = True
+
+TEST_RUNNER = 'core.test_runner.TimingTestRunner'
+
+# Стойкость хеша паролей в тестах не нужна, а PBKDF2 на каждом
+# create_user занимает десятки миллисекунд.
+PASSWORD_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher']
+
+# Страницы рендерятся на каждый запрос, как без prerender_pages.
+PRERENDER_ROOT = ''
+
+# Картинки постов хранятся в памяти процесса, а не в MEDIA_ROOT.
+DEFAULT_FILE_STORAGE = 'core.storage.InMemoryStorage'
+
+
+class DisableMigrations:
+    """Тестовая БД создаётся по моделям, без прогона миграций."""
+
+    def __contains__(self, app_label):
+        return True
+
+    def __getitem__(self, app_label):
+        return None
+
+
+# TEST_MIGRATIONS=1 - создавать тестовую БД миграциями, как в боевой.
+if not env_bool('TEST_MIGRATIONS', False):
+    MIGRATION_MODULES = DisableMigrations()
+
+# Локальный файл SQLite, заменяющий реплику. При тестах он зеркалирует
+# основную БД, маршрутизация на него включается через DATABASE_REPLICAS.
+DATABASES = copy.deepcopy(base.DATABASES)
+DATABASES['replica'] = {
+    'ENGINE': 'django.db.backends.sqlite3',
+    'NAME': os.path.join(base.BASE_DIR, 'replica.sqlite3'),
+    'TEST': {'MIRROR': 'default'},
+}